@@ -3,7 +3,7 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 
 from app.schemas.diff import DiffRequest, DiffResponse
-from app.services.diff_check import check_diff
+from app.services.diff_check import check_diff, compute_diff
 
 router = APIRouter()
 
@@ -12,11 +12,21 @@ router = APIRouter()
 def get_diff_endpoint(request: DiffRequest) -> DiffResponse:
     """
     Checks if there are any file changes in the given folder path
-    compared to the cached tree.
+    compared to the cached tree. In full mode the added, removed and
+    modified paths are returned as well.
     """
     folder_path = Path(request.folder_path)
     if not folder_path.is_dir():
         raise HTTPException(status_code=400, detail="Invalid folder path")
 
+    if request.mode == "full":
+        diff = compute_diff(folder_path)
+        return DiffResponse(
+            changed=diff.changed,
+            added=diff.added,
+            removed=diff.removed,
+            modified=diff.modified,
+        )
+
     has_changes = check_diff(folder_path)
     return DiffResponse(changed=has_changes)
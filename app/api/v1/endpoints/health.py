@@ -1,8 +1,51 @@
 from fastapi import APIRouter
 
+from app.llm.cache import get_llm_cache
+from app.llm.concurrency import limiter_snapshots
+from app.rag.embedding_cache import get_embedding_cache
+from app.rag.vector_store import vector_store_registry
+
 router = APIRouter()
 
 
 @router.get("")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/limiters")
+def limiters():
+    """
+    Current limit, in-flight count and queue depth of each model endpoint limiter.
+    """
+    return {"limiters": limiter_snapshots()}
+
+
+@router.get("/llm-cache")
+def llm_cache():
+    """
+    Hit/miss counters and estimated tokens saved by the LLM response cache.
+    """
+    cache = get_llm_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/embedding-cache")
+def embedding_cache():
+    """
+    Hit/miss counters and stored size of the chunk embedding cache.
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/vector-stores")
+def vector_stores():
+    """
+    Open vector store handles and registry hit/miss counters.
+    """
+    return vector_store_registry.stats()
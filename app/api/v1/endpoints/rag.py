@@ -1,18 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import time
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from app.core.logging import log_base_dir
-from app.rag.agent import answer_question
+from app.rag.agent import answer_question, astream_answer
 from app.rag.indexer import index_folder
 from app.schemas.rag import (
     IndexFolderRequest,
     IndexFolderResponse,
     RagQueryRequest,
     RagQueryResponse,
+    RagQueryTrailer,
+    RagSource,
+    RagStreamError,
 )
 
 router = APIRouter()
@@ -31,13 +37,17 @@ async def index_folder_endpoint(request: IndexFolderRequest):
 
     start = time.perf_counter()
     with log_base_dir(folder_path):
-        result = index_folder(folder_path, regenerate=request.regenerate)
+        # The pipeline blocks for the whole run; keep it off the event loop.
+        result = await asyncio.to_thread(
+            index_folder, folder_path, regenerate=request.regenerate
+        )
     duration = time.perf_counter() - start
 
     return {
         "folder_path": str(folder_path),
         "added": result["added"],
         "updated": result["updated"],
+        "moved": result["moved"],
         "skipped": result["skipped"],
         "deleted": result["deleted"],
         "duration": duration,
@@ -57,20 +67,87 @@ async def rag_query_endpoint(request: RagQueryRequest):
 
     start = time.perf_counter()
     with log_base_dir(folder_path):
-        answer, sources = answer_question(
-            request.question, folder=str(folder_path), k=request.top_k
+        result = await asyncio.to_thread(
+            answer_question,
+            request.question,
+            folder=str(folder_path),
+            k=request.top_k,
+            mode=request.mode,
+            retrieval=request.retrieval,
         )
     duration = time.perf_counter() - start
 
     return {
         "question": request.question,
-        "answer": answer,
+        "answer": result.answer,
         "sources": [
             {
                 "content": doc.page_content,
                 "metadata": doc.metadata,
             }
-            for doc in sources
+            for doc in result.sources
         ],
         "duration": duration,
+        "mode": result.mode,
+        "timings": result.timings,
+        "cached": result.cached,
     }
+
+
+@router.post("/query/stream")
+async def rag_query_stream_endpoint(request: RagQueryRequest, http: Request):
+    """
+    Streams an answer: the retrieved sources as soon as retrieval completes, then
+    answer tokens as they are generated, then a trailer with per-stage timings.
+    A failure during retrieval or generation ends the stream with an error event.
+    Always answers in direct mode (retrieve, then one generation call).
+    Responds with Server-Sent Events when the client accepts text/event-stream,
+    otherwise with newline-delimited JSON.
+    """
+    folder_path = Path(request.folder_path)
+    if not folder_path.exists() or not folder_path.is_dir():
+        raise HTTPException(
+            status_code=400, detail="folder_path must be an existing directory"
+        )
+    use_sse = "text/event-stream" in http.headers.get("accept", "")
+
+    def encode(event_type: str, payload: dict) -> str:
+        if use_sse:
+            return f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"type": event_type, **payload}) + "\n"
+
+    async def stream():
+        start = time.perf_counter()
+        with log_base_dir(folder_path):
+            async for event in astream_answer(
+                request.question,
+                folder=str(folder_path),
+                k=request.top_k,
+                retrieval=request.retrieval,
+            ):
+                if event["type"] == "sources":
+                    sources = [
+                        RagSource(
+                            content=doc.page_content, metadata=doc.metadata
+                        ).model_dump(by_alias=True)
+                        for doc in event["sources"]
+                    ]
+                    yield encode("sources", {"sources": sources})
+                elif event["type"] == "token":
+                    yield encode("token", {"text": event["text"]})
+                elif event["type"] == "error":
+                    error = RagStreamError(stage=event["stage"], error=event["error"])
+                    yield encode("error", error.model_dump(by_alias=True))
+                else:
+                    trailer = RagQueryTrailer(
+                        answer=event["answer"],
+                        duration=time.perf_counter() - start,
+                        timings=event["timings"],
+                        cached=event["cached"],
+                    )
+                    yield encode("trailer", trailer.model_dump(by_alias=True))
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+    )
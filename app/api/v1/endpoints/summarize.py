@@ -1,17 +1,20 @@
+import json
 from pathlib import Path
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
 from app.core.logging import log_base_dir
 from app.llm.models import initialize_model
 from app.schemas.summarize import (
     FilePathRequest,
     FolderPathRequest,
+    FolderSummaryTrailer,
     MultipleSummariesResponse,
     SingleSummaryResponse,
 )
-from app.services.summarizer.file import summarize_single_file
-from app.services.summarizer.folder import summarize_folder
+from app.services.summarizer.file import summarize_single_file_async
+from app.services.summarizer.folder import iter_folder_summaries, summarize_folder
 
 router = APIRouter()
 
@@ -25,10 +28,10 @@ async def summarize_file_endpoint(request: FilePathRequest):
     """
     file_path = Path(request.file_path)
     with log_base_dir(file_path.parent):
-        summary, duration = summarize_single_file(
+        summary, duration, usage = await summarize_single_file_async(
             str(file_path),
             llm=llm_model,
-            method="stuff",
+            method="auto",
             base_dir=str(file_path.parent),
         )
     stat = file_path.stat()
@@ -41,6 +44,8 @@ async def summarize_file_endpoint(request: FilePathRequest):
         "file_type": file_type,
         "summary": summary,
         "duration": duration,
+        "tokens_in": usage.tokens_in,
+        "tokens_out": usage.tokens_out,
     }
 
 
@@ -60,3 +65,46 @@ async def summarize_folder_endpoint(request: FolderPathRequest):
             llm=llm_model,
             base_dir=request.folder_path,
         )
+
+
+@router.post("/folder/stream")
+async def summarize_folder_stream_endpoint(request: FolderPathRequest, http: Request):
+    """
+    Streams folder summaries as they complete.
+    Cached summaries are sent first, then each new summary, then a trailer with totals.
+    Responds with Server-Sent Events when the client accepts text/event-stream,
+    otherwise with newline-delimited JSON.
+    """
+    use_sse = "text/event-stream" in http.headers.get("accept", "")
+
+    def encode(event_type: str, payload: dict) -> str:
+        if use_sse:
+            return f"event: {event_type}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({"type": event_type, **payload}) + "\n"
+
+    async def stream():
+        with log_base_dir(request.folder_path):
+            async for event in iter_folder_summaries(
+                folder_path=request.folder_path,
+                regenerate=request.regenerate,
+                sync=request.sync,
+                llm=llm_model,
+                base_dir=request.folder_path,
+            ):
+                if event["type"] == "summary":
+                    item = SingleSummaryResponse(**event["data"])
+                    yield encode(
+                        "summary",
+                        {
+                            "cached": event["cached"],
+                            "data": item.model_dump(by_alias=True),
+                        },
+                    )
+                else:
+                    trailer = FolderSummaryTrailer(**event)
+                    yield encode("trailer", trailer.model_dump(by_alias=True))
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+    )
@@ -3,8 +3,8 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 
 from app.core.logging import log_base_dir
-from app.schemas.tree import TreeRequest
-from app.services.tree_generator import get_tree
+from app.schemas.tree import TreePageResponse, TreeRequest
+from app.services.tree_generator import get_tree, get_tree_page
 
 router = APIRouter()
 
@@ -13,11 +13,38 @@ router = APIRouter()
 def read_tree(request: TreeRequest):
     """
     Get the directory tree structure for a given folder path.
+    With sub_path, max_depth, cursor or limit set, returns one lazily expanded
+    page of the tree instead of the whole structure.
     """
     folder_path = Path(request.folder_path)
     if not folder_path.is_dir():
         raise HTTPException(status_code=400, detail="Invalid folder path")
 
+    lazy = (
+        request.sub_path is not None
+        or request.max_depth is not None
+        or request.cursor is not None
+        or request.limit is not None
+    )
     with log_base_dir(folder_path):
-        tree = get_tree(folder_path, regenerate=request.regenerate)
+        if lazy:
+            try:
+                page = get_tree_page(
+                    folder_path,
+                    sub_path=request.sub_path,
+                    max_depth=request.max_depth or 1,
+                    cursor=request.cursor,
+                    limit=request.limit,
+                    regenerate=request.regenerate,
+                    incremental=request.incremental,
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return TreePageResponse(**page)
+
+        tree = get_tree(
+            folder_path,
+            regenerate=request.regenerate,
+            incremental=request.incremental,
+        )
         return tree
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+from app.cache.engine import cache_engine
+from app.cache.utils import batched
+from app.core.logging import log_event
+
+T = TypeVar("T")
+
+# Evict down to this fraction of the size limit so eviction does not run on every write.
+_EVICT_TARGET = 0.9
+_EVICT_BATCH = 256
+
+
+def resolve_cache_path(configured: str) -> Path:
+    """
+    Resolve a cache path setting against the working directory and create its
+    parent directory.
+    """
+    cache_path = Path(configured)
+    if not cache_path.is_absolute():
+        cache_path = Path(os.getcwd()) / cache_path
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    return cache_path
+
+
+class BlobCache:
+    """
+    Persistent key -> blob table evicted least-recently-used once the total
+    stored size exceeds max_bytes. Database errors never reach the caller: a
+    lookup that fails finds nothing and a write that fails is skipped; both are
+    counted and logged as "<name>_error".
+    """
+
+    def __init__(self, db_path: Path, name: str, max_bytes: int):
+        self.db_path = db_path
+        self.name = name
+        self.max_bytes = max_bytes
+        self._schema = (
+            f"""
+            CREATE TABLE IF NOT EXISTS {name} (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """,
+            f"CREATE INDEX IF NOT EXISTS idx_{name}_access ON {name} (last_access)",
+        )
+        self._lock = threading.Lock()
+        # Serializes writers so the stored size stays in step with the table.
+        self._write_lock = threading.Lock()
+        self._stored_bytes: int | None = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _failed(self, operation: str, exc: Exception) -> None:
+        with self._lock:
+            self.errors += 1
+        log_event(f"{self.name}_error", operation=operation, error=str(exc))
+
+    def lookup_many(
+        self,
+        keys: Iterable[str],
+        decode: Callable[[bytes], T],
+        corrupt: tuple[type[Exception], ...] = (ValueError,),
+    ) -> dict[str, T]:
+        """
+        Return key -> decoded value for the keys found, and mark them as used.
+        A row whose value fails to decode with one of the corrupt exceptions is
+        a miss and is deleted.
+        """
+        wanted = list(dict.fromkeys(keys))
+        found: dict[str, T] = {}
+        damaged: list[str] = []
+        try:
+            with cache_engine.connection(self.db_path, self._schema) as conn:
+                for batch in batched(wanted):
+                    placeholders = ",".join("?" * len(batch))
+                    for row in conn.execute(
+                        f"SELECT key, value FROM {self.name} "
+                        f"WHERE key IN ({placeholders})",
+                        batch,
+                    ):
+                        try:
+                            found[row["key"]] = decode(row["value"])
+                        except corrupt as exc:
+                            damaged.append(row["key"])
+                            self._failed("decode", exc)
+                if damaged:
+                    self._delete(conn, damaged)
+                if found:
+                    now = time.time()
+                    with conn:
+                        conn.executemany(
+                            f"UPDATE {self.name} SET last_access=? WHERE key=?",
+                            [(now, key) for key in found],
+                        )
+        except sqlite3.Error as exc:
+            # Values read before the failure are still valid.
+            self._failed("lookup", exc)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def _delete(self, conn, keys: list[str]) -> None:
+        with self._write_lock:
+            with conn:
+                conn.executemany(
+                    f"DELETE FROM {self.name} WHERE key=?", [(key,) for key in keys]
+                )
+            # Recount the size on the next write.
+            self._stored_bytes = None
+
+    def update_many(self, values: dict[str, bytes]) -> None:
+        if not values:
+            return
+        with self._write_lock:
+            try:
+                self._write(values, time.time())
+            except sqlite3.Error as exc:
+                # The transaction was rolled back; recount the size on the next write.
+                self._stored_bytes = None
+                self._failed("update", exc)
+
+    def _write(self, values: dict[str, bytes], now: float) -> None:
+        with cache_engine.connection(self.db_path, self._schema) as conn:
+            with conn:
+                if self._stored_bytes is None:
+                    self._stored_bytes = conn.execute(
+                        f"SELECT COALESCE(SUM(size), 0) FROM {self.name}"
+                    ).fetchone()[0]
+                for key, value in values.items():
+                    previous = conn.execute(
+                        f"SELECT size FROM {self.name} WHERE key=?", (key,)
+                    ).fetchone()
+                    self._stored_bytes += len(value) - (previous[0] if previous else 0)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.name} "
+                    "(key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    [(key, value, len(value), now) for key, value in values.items()],
+                )
+                if self._stored_bytes > self.max_bytes:
+                    self._evict(conn)
+
+    def _evict(self, conn) -> None:
+        target = int(self.max_bytes * _EVICT_TARGET)
+        while self._stored_bytes > target:
+            rows = conn.execute(
+                f"SELECT key, size FROM {self.name} ORDER BY last_access LIMIT ?",
+                (_EVICT_BATCH,),
+            ).fetchall()
+            if not rows:
+                self._stored_bytes = 0
+                return
+            evicted = []
+            for row in rows:
+                if self._stored_bytes <= target:
+                    break
+                evicted.append(row["key"])
+                self._stored_bytes -= row["size"]
+            conn.executemany(
+                f"DELETE FROM {self.name} WHERE key=?", [(key,) for key in evicted]
+            )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": str(self.db_path),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "errors": self.errors,
+                "stored_bytes": self._stored_bytes,
+                "max_bytes": self.max_bytes,
+            }
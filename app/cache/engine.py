@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+MAX_POOLED_CONNECTIONS = 32
+STATEMENT_CACHE_SIZE = 256
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # WAL keeps the database consistent with NORMAL; only the last commits can be lost
+    # on power failure, which is acceptable for a rebuildable cache.
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=67108864",
+)
+
+
+# Idle connections kept per database; more are opened while readers overlap.
+MAX_IDLE_PER_DATABASE = 4
+
+
+def _file_identity(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "schemas", "identity", "generation")
+
+    def __init__(self, conn: sqlite3.Connection, identity, generation: int):
+        self.conn = conn
+        self.schemas: set[tuple[str, ...]] = set()
+        # (device, inode) of the database file the connection has open.
+        self.identity = identity
+        self.generation = generation
+
+
+class CacheEngine:
+    """
+    Pools long-lived SQLite connections per database path. Each caller gets a
+    connection of its own for the duration of the block, so WAL readers run in
+    parallel and SQLite serializes the writers; idle connections are kept in a
+    bounded LRU pool and reuse prepared statements through sqlite3's statement
+    cache. A connection is only reused while its database file is still the one
+    at the path, so deleted or replaced databases are reopened.
+    """
+
+    def __init__(self, max_connections: int = MAX_POOLED_CONNECTIONS):
+        self._max_connections = max_connections
+        self._idle: OrderedDict[str, list[_PooledConnection]] = OrderedDict()
+        self._idle_count = 0
+        self._pool_lock = threading.Lock()
+        # Bumped by close/close_all; connections in use from an older generation
+        # are closed instead of returned to the pool.
+        self._generation = 0
+
+    def _open(self, key: str) -> _PooledConnection:
+        conn = sqlite3.connect(
+            key,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        return _PooledConnection(conn, _file_identity(key), self._generation)
+
+    def _checkout(self, key: str) -> _PooledConnection:
+        identity = _file_identity(key)
+        stale: list[_PooledConnection] = []
+        entry = None
+        with self._pool_lock:
+            idle = self._idle.get(key)
+            while idle:
+                candidate = idle.pop()
+                self._idle_count -= 1
+                if identity is not None and candidate.identity == identity:
+                    entry = candidate
+                    break
+                stale.append(candidate)
+            if idle is not None and not idle:
+                del self._idle[key]
+        self._close_entries(stale)
+        return entry if entry is not None else self._open(key)
+
+    def _release(self, key: str, entry: _PooledConnection) -> None:
+        identity = _file_identity(key)
+        if entry.identity is None:
+            # The file is created lazily on the first write.
+            entry.identity = identity
+        evicted: list[_PooledConnection] = []
+        with self._pool_lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            keep = (
+                identity is not None
+                and entry.identity == identity
+                and entry.generation == self._generation
+                and len(idle) < MAX_IDLE_PER_DATABASE
+            )
+            if keep:
+                idle.append(entry)
+                self._idle_count += 1
+            elif not idle:
+                del self._idle[key]
+            while self._idle_count > self._max_connections:
+                _, oldest = self._idle.popitem(last=False)
+                self._idle_count -= len(oldest)
+                evicted.extend(oldest)
+        if not keep:
+            evicted.append(entry)
+        self._close_entries(evicted)
+
+    @staticmethod
+    def _close_entries(entries: list[_PooledConnection]) -> None:
+        for entry in entries:
+            entry.conn.close()
+
+    @contextmanager
+    def connection(
+        self, db_path: Path, schema: tuple[str, ...] = ()
+    ) -> Iterator[sqlite3.Connection]:
+        """
+        Yield a pooled connection to db_path, used by this caller alone until the
+        block exits. The schema statements are executed once per connection.
+        """
+        key = str(Path(db_path).resolve())
+        entry = self._checkout(key)
+        try:
+            if schema and schema not in entry.schemas:
+                with entry.conn:
+                    for statement in schema:
+                        entry.conn.execute(statement)
+                entry.schemas.add(schema)
+            yield entry.conn
+        except BaseException:
+            if entry.conn.in_transaction:
+                entry.conn.rollback()
+            raise
+        finally:
+            self._release(key, entry)
+
+    def close(self, db_path: Path) -> None:
+        key = str(Path(db_path).resolve())
+        with self._pool_lock:
+            self._generation += 1
+            entries = self._idle.pop(key, [])
+            self._idle_count -= len(entries)
+        self._close_entries(entries)
+
+    def close_all(self) -> None:
+        with self._pool_lock:
+            self._generation += 1
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle.clear()
+            self._idle_count = 0
+        self._close_entries(entries)
+
+
+cache_engine = CacheEngine()
@@ -0,0 +1,84 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.cache.engine import cache_engine
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS index_sources (
+        source TEXT PRIMARY KEY,
+        content_hash TEXT,
+        mtime REAL,
+        ids TEXT NOT NULL
+    )
+    """,
+    "CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value INTEGER)",
+)
+
+
+@dataclass
+class SourceChunks:
+    ids: list[str] = field(default_factory=list)
+    content_hash: str | None = None
+    mtime: float | None = None
+
+
+def load_index_sources(db_path: Path) -> dict[str, SourceChunks] | None:
+    """
+    Return the stored source -> chunks map, or None if it was never saved.
+    """
+    if not db_path.exists():
+        return None
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(
+            "SELECT source, content_hash, mtime, ids FROM index_sources"
+        ).fetchall()
+    return {
+        row["source"]: SourceChunks(
+            json.loads(row["ids"]), row["content_hash"], row["mtime"]
+        )
+        for row in rows
+    }
+
+
+def save_index_sources(db_path: Path, sources: dict[str, SourceChunks]) -> None:
+    """
+    Replace the stored source -> chunks map.
+    """
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("DELETE FROM index_sources")
+            conn.executemany(
+                "INSERT INTO index_sources (source, content_hash, mtime, ids) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (source, chunks.content_hash, chunks.mtime, json.dumps(chunks.ids))
+                    for source, chunks in sources.items()
+                ],
+            )
+
+
+def load_index_version(db_path: Path) -> int | None:
+    """
+    Return the folder's index version, or None if the folder was never indexed.
+    """
+    if not db_path.exists():
+        return None
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute(
+            "SELECT value FROM index_meta WHERE key='version'"
+        ).fetchone()
+    return row[0] if row else 0
+
+
+def bump_index_version(db_path: Path) -> int:
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute(
+                "INSERT INTO index_meta (key, value) VALUES ('version', 1) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+            )
+            return conn.execute(
+                "SELECT value FROM index_meta WHERE key='version'"
+            ).fetchone()[0]
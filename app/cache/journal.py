@@ -0,0 +1,266 @@
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+
+from app.cache.engine import cache_engine
+from app.cache.utils import batched
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS journal (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        event TEXT NOT NULL,
+        path TEXT NOT NULL,
+        dest_path TEXT,
+        is_dir INTEGER NOT NULL,
+        recorded_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS journal_cursors (
+        consumer TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS journal_state (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS journal_snapshot (
+        path TEXT PRIMARY KEY,
+        is_dir INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL
+    )
+    """,
+)
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+MOVED = "moved"
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+@dataclass(frozen=True)
+class JournalEvent:
+    event: str
+    path: str
+    is_dir: bool = False
+    dest_path: str | None = None
+
+
+@dataclass
+class JournalChanges:
+    """
+    Net effect of the journal events after a consumer's cursor.
+    Paths are relative to the watched folder.
+    A move is reported both in moved and as removed(src) + added(dest).
+    """
+
+    seq: int
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    moved: list[tuple[str, str]] = field(default_factory=list)
+    directories: set[str] = field(default_factory=set)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+def has_snapshot(db_path: Path) -> bool:
+    if not db_path.exists():
+        return False
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute(
+            "SELECT value FROM journal_state WHERE key='baseline_seq'"
+        ).fetchone()
+    return row is not None
+
+
+def load_snapshot(db_path: Path) -> dict[str, SnapshotEntry]:
+    """
+    Return the folder state the journal was last brought up to date with.
+    """
+    if not db_path.exists():
+        return {}
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute("SELECT path, is_dir, size, mtime FROM journal_snapshot")
+        return {
+            row["path"]: SnapshotEntry(bool(row["is_dir"]), row["size"], row["mtime"])
+            for row in rows
+        }
+
+
+def record_changes(
+    db_path: Path,
+    events: list[JournalEvent],
+    upserts: dict[str, SnapshotEntry],
+    deletes: Iterable[str] = (),
+    baseline: bool = False,
+) -> None:
+    """
+    Append events and apply the matching snapshot updates in one transaction.
+    With baseline=True the snapshot is recorded as a new starting point: changes
+    made before it are unknown, so every consumer cursor is dropped.
+    """
+    deletes = list(deletes)
+    now = time.time()
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            if baseline:
+                conn.execute("DELETE FROM journal_snapshot")
+                conn.execute("DELETE FROM journal_cursors")
+            conn.executemany(
+                "INSERT INTO journal (event, path, dest_path, is_dir, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (e.event, e.path, e.dest_path, int(e.is_dir), now)
+                    for e in events
+                ],
+            )
+            for batch in batched(deletes):
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(
+                    f"DELETE FROM journal_snapshot WHERE path IN ({placeholders})",
+                    batch,
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO journal_snapshot (path, is_dir, size, mtime) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (path, int(entry.is_dir), entry.size, entry.mtime)
+                    for path, entry in upserts.items()
+                ],
+            )
+            if baseline:
+                seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM journal"
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO journal_state (key, value) "
+                    "VALUES ('baseline_seq', ?)",
+                    (seq,),
+                )
+
+
+def latest_seq(db_path: Path) -> int:
+    if not db_path.exists():
+        return 0
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM journal").fetchone()[0]
+
+
+def get_cursor(db_path: Path, consumer: str) -> int | None:
+    """
+    Return the consumer's cursor, or None when it has none or events after it
+    have been pruned from the journal.
+    """
+    if not db_path.exists():
+        return None
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute(
+            "SELECT seq FROM journal_cursors WHERE consumer=?", (consumer,)
+        ).fetchone()
+        if row is None:
+            return None
+        pruned = conn.execute(
+            "SELECT value FROM journal_state WHERE key='pruned_seq'"
+        ).fetchone()
+    if pruned is not None and row["seq"] < pruned[0]:
+        return None
+    return row["seq"]
+
+
+def set_cursor(db_path: Path, consumer: str, seq: int) -> None:
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO journal_cursors (consumer, seq) VALUES (?, ?)",
+                (consumer, seq),
+            )
+
+
+def load_changes(db_path: Path, since: int) -> JournalChanges:
+    """
+    Fold the events recorded after `since` into their net per-path effect.
+    """
+    status: dict[str, str] = {}
+    changes = JournalChanges(seq=since)
+
+    def created(path: str) -> None:
+        status[path] = MODIFIED if status.get(path) == DELETED else CREATED
+
+    def deleted(path: str) -> None:
+        if status.get(path) == CREATED:
+            del status[path]
+        else:
+            status[path] = DELETED
+
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(
+            "SELECT seq, event, path, dest_path, is_dir FROM journal "
+            "WHERE seq > ? ORDER BY seq",
+            (since,),
+        )
+        for row in rows:
+            changes.seq = row["seq"]
+            path = row["path"]
+            if row["is_dir"]:
+                changes.directories.add(path)
+                if row["dest_path"]:
+                    changes.directories.add(row["dest_path"])
+            if row["event"] == CREATED:
+                created(path)
+            elif row["event"] == MODIFIED:
+                if status.get(path) != CREATED:
+                    status[path] = MODIFIED
+            elif row["event"] == DELETED:
+                deleted(path)
+            elif row["event"] == MOVED:
+                deleted(path)
+                created(row["dest_path"])
+                if not row["is_dir"]:
+                    changes.moved.append((path, row["dest_path"]))
+
+    buckets = {
+        CREATED: changes.added,
+        DELETED: changes.removed,
+        MODIFIED: changes.modified,
+    }
+    for path, state in sorted(status.items()):
+        buckets[state].append(path)
+    return changes
+
+
+def prune(db_path: Path, max_events: int) -> None:
+    """
+    Drop the oldest events beyond max_events. Cursors older than the pruned
+    range become invalid, so those consumers fall back to a full scan.
+    """
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        count, newest = conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM journal"
+        ).fetchone()
+        if count <= max_events:
+            return
+        cutoff = newest - max_events
+        with conn:
+            conn.execute("DELETE FROM journal WHERE seq <= ?", (cutoff,))
+            conn.execute(
+                "INSERT OR REPLACE INTO journal_state (key, value) "
+                "VALUES ('pruned_seq', ?)",
+                (cutoff,),
+            )
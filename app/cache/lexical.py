@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.cache.engine import cache_engine
+from app.cache.utils import batched
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS lexical_chunks (
+        id INTEGER PRIMARY KEY,
+        doc_id TEXT NOT NULL UNIQUE,
+        content TEXT NOT NULL,
+        metadata TEXT NOT NULL
+    )
+    """,
+    # Inverted index over the pre-tokenized chunk terms; rowid = lexical_chunks.id.
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lexical_terms USING fts5(terms)",
+)
+
+
+def _delete_locked(conn, doc_ids: list[str]) -> None:
+    # Statements only, no reads: the whole delete runs inside the write transaction.
+    for batch in batched(doc_ids):
+        placeholders = ",".join("?" * len(batch))
+        conn.execute(
+            "DELETE FROM lexical_terms WHERE rowid IN ("
+            f"SELECT id FROM lexical_chunks WHERE doc_id IN ({placeholders}))",
+            batch,
+        )
+        conn.execute(
+            f"DELETE FROM lexical_chunks WHERE doc_id IN ({placeholders})", batch
+        )
+
+
+def add_chunks(
+    db_path: Path, chunks: Iterable[tuple[str, str, str, dict[str, Any]]]
+) -> None:
+    """
+    Insert or replace chunks given as (doc_id, terms, content, metadata).
+    """
+    rows = list(chunks)
+    if not rows:
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            _delete_locked(conn, [doc_id for doc_id, _, _, _ in rows])
+            for doc_id, terms, content, metadata in rows:
+                cursor = conn.execute(
+                    "INSERT INTO lexical_chunks (doc_id, content, metadata) "
+                    "VALUES (?, ?, ?)",
+                    (doc_id, content, json.dumps(metadata)),
+                )
+                conn.execute(
+                    "INSERT INTO lexical_terms (rowid, terms) VALUES (?, ?)",
+                    (cursor.lastrowid, terms),
+                )
+
+
+def update_metadata(
+    db_path: Path, updates: Iterable[tuple[str, dict[str, Any]]]
+) -> None:
+    rows = [(json.dumps(metadata), doc_id) for doc_id, metadata in updates]
+    if not rows:
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.executemany(
+                "UPDATE lexical_chunks SET metadata=? WHERE doc_id=?", rows
+            )
+
+
+def delete_chunks(db_path: Path, doc_ids: Iterable[str]) -> None:
+    ids = list(doc_ids)
+    if not ids or not db_path.exists():
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            _delete_locked(conn, ids)
+
+
+def count_chunks(db_path: Path) -> int:
+    if not db_path.exists():
+        return 0
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        return conn.execute("SELECT COUNT(*) FROM lexical_chunks").fetchone()[0]
+
+
+def clear_chunks(db_path: Path) -> None:
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("DELETE FROM lexical_terms")
+            conn.execute("DELETE FROM lexical_chunks")
+
+
+def search_chunks(
+    db_path: Path, terms: list[str], limit: int
+) -> list[tuple[str, str, dict[str, Any], float]]:
+    """
+    Return up to limit (doc_id, content, metadata, score) matching any of the
+    terms, best BM25 score first. Lower scores are better, as in FTS5.
+    """
+    if not terms or not db_path.exists():
+        return []
+    query = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(
+            "SELECT c.doc_id, c.content, c.metadata, bm25(lexical_terms) AS score "
+            "FROM lexical_terms JOIN lexical_chunks c ON c.id = lexical_terms.rowid "
+            "WHERE lexical_terms MATCH ? ORDER BY score LIMIT ?",
+            (query, limit),
+        ).fetchall()
+    return [
+        (row["doc_id"], row["content"], json.loads(row["metadata"]), row["score"])
+        for row in rows
+    ]
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+from app.cache.engine import cache_engine
+from app.cache.utils import batched
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS manifest (
+        path TEXT PRIMARY KEY,
+        parent_path TEXT NOT NULL,
+        name TEXT NOT NULL,
+        is_dir INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        inode INTEGER NOT NULL,
+        content_hash TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_manifest_parent ON manifest (parent_path, name)",
+)
+
+_COLUMNS = (
+    "path",
+    "parent_path",
+    "name",
+    "is_dir",
+    "size",
+    "mtime",
+    "inode",
+    "content_hash",
+)
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    parent_path: str
+    name: str
+    is_dir: bool
+    size: int
+    mtime: float
+    inode: int
+    content_hash: str | None = None
+
+    def same_stat(self, other: "ManifestEntry") -> bool:
+        return (
+            self.is_dir == other.is_dir
+            and self.size == other.size
+            and self.mtime == other.mtime
+            and self.inode == other.inode
+        )
+
+    def as_row(self) -> tuple:
+        return (
+            self.path,
+            self.parent_path,
+            self.name,
+            int(self.is_dir),
+            self.size,
+            self.mtime,
+            self.inode,
+            self.content_hash,
+        )
+
+
+def load_manifest(db_path: Path) -> dict[str, ManifestEntry]:
+    """
+    Return the stored manifest (path -> entry).
+    """
+    if not db_path.exists():
+        return {}
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM manifest")
+        return {
+            row["path"]: ManifestEntry(
+                row["path"],
+                row["parent_path"],
+                row["name"],
+                bool(row["is_dir"]),
+                row["size"],
+                row["mtime"],
+                row["inode"],
+                row["content_hash"],
+            )
+            for row in rows
+        }
+
+
+def save_manifest_changes(
+    db_path: Path,
+    upserts: Iterable[ManifestEntry],
+    removed_paths: Iterable[str] = (),
+) -> None:
+    """
+    Write changed entries and drop removed paths in one transaction.
+    """
+    rows = [entry.as_row() for entry in upserts]
+    removed = list(removed_paths)
+    if not rows and not removed:
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            for batch in batched(removed):
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(
+                    f"DELETE FROM manifest WHERE path IN ({placeholders})", batch
+                )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO manifest ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+
+
+def save_content_hashes(db_path: Path, hashes: dict[str, tuple[str, float]]) -> None:
+    """
+    Store content hashes (path -> (hash, mtime it was computed for)).
+    A hash is only kept if the entry's mtime still matches.
+    """
+    if not hashes:
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.executemany(
+                "UPDATE manifest SET content_hash=? WHERE path=? AND mtime=?",
+                [(digest, path, mtime) for path, (digest, mtime) in hashes.items()],
+            )
@@ -0,0 +1,74 @@
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from app.cache.engine import cache_engine
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS query_results (
+        key TEXT PRIMARY KEY,
+        index_version INTEGER NOT NULL,
+        value TEXT NOT NULL,
+        last_access REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_query_results_access "
+    "ON query_results (last_access)",
+)
+
+
+def load_query_result(
+    db_path: Path, key: str, index_version: int
+) -> dict[str, Any] | None:
+    """
+    Return the stored result for key if it was computed at index_version.
+    """
+    if not db_path.exists():
+        return None
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute(
+            "SELECT value FROM query_results WHERE key=? AND index_version=?",
+            (key, index_version),
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE query_results SET last_access=? WHERE key=?",
+                (time.time(), key),
+            )
+    return json.loads(row["value"])
+
+
+def save_query_result(
+    db_path: Path,
+    key: str,
+    index_version: int,
+    value: dict[str, Any],
+    max_entries: int,
+) -> None:
+    """
+    Store a result, dropping the least recently used beyond max_entries.
+    """
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_results "
+                "(key, index_version, value, last_access) VALUES (?, ?, ?, ?)",
+                (key, index_version, json.dumps(value), time.time()),
+            )
+            conn.execute(
+                "DELETE FROM query_results WHERE key NOT IN ("
+                "SELECT key FROM query_results ORDER BY last_access DESC LIMIT ?)",
+                (max_entries,),
+            )
+
+
+def clear_query_results(db_path: Path) -> None:
+    if not db_path.exists():
+        return
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("DELETE FROM query_results")
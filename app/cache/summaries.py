@@ -0,0 +1,176 @@
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.cache.engine import cache_engine
+from app.cache.utils import batched
+
+_FILE_COLUMNS = (
+    "file_path",
+    "file_name",
+    "file_size",
+    "last_modified_time",
+    "file_type",
+    "content_hash",
+)
+
+_SUMMARY_COLUMNS = ("summary", "duration", "tokens_in", "tokens_out")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS summary_rows (
+        content_hash TEXT NOT NULL,
+        model TEXT NOT NULL,
+        prompt_version TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        duration REAL NOT NULL,
+        tokens_in INTEGER NOT NULL DEFAULT 0,
+        tokens_out INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (content_hash, model, prompt_version)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS summary_files (
+        file_path TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        last_modified_time REAL NOT NULL,
+        file_type TEXT NOT NULL,
+        content_hash TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_files_hash ON summary_files (content_hash)",
+)
+
+
+def load_file_rows(db_path: Path) -> dict[str, dict[str, Any]]:
+    """
+    Return the cached file rows (path -> metadata and content hash).
+    """
+    if not db_path.exists():
+        return {}
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(f"SELECT {', '.join(_FILE_COLUMNS)} FROM summary_files")
+        return {row["file_path"]: dict(row) for row in rows}
+
+
+def get_summaries_by_hash(
+    db_path: Path, content_hashes: Iterable[str], model: str, prompt_version: str
+) -> dict[str, dict[str, Any]]:
+    """
+    Look up stored summaries for the given content hashes.
+    Returns a mapping of content hash -> summary, duration and token counts.
+    """
+    hashes = list(set(content_hashes))
+    if not hashes or not db_path.exists():
+        return {}
+    found: dict[str, dict[str, Any]] = {}
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        for batch in batched(hashes):
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT content_hash, {', '.join(_SUMMARY_COLUMNS)} FROM summary_rows "
+                f"WHERE model=? AND prompt_version=? AND content_hash IN ({placeholders})",
+                (model, prompt_version, *batch),
+            )
+            for row in rows:
+                found[row["content_hash"]] = {
+                    col: row[col] for col in _SUMMARY_COLUMNS
+                }
+    return found
+
+
+def load_summary_rows(
+    db_path: Path, model: str, prompt_version: str
+) -> list[dict[str, Any]]:
+    """
+    Build the per-file summary list by joining file rows with their summaries.
+    Files without a summary for this model and prompt version are left out.
+    """
+    if not db_path.exists():
+        return []
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        rows = conn.execute(
+            """
+            SELECT f.file_path, f.file_name, f.file_size, f.last_modified_time,
+                   f.file_type, s.summary, s.duration, s.tokens_in, s.tokens_out
+            FROM summary_files AS f
+            JOIN summary_rows AS s
+              ON s.content_hash = f.content_hash
+             AND s.model = ? AND s.prompt_version = ?
+            ORDER BY f.file_path
+            """,
+            (model, prompt_version),
+        )
+        return [dict(row) for row in rows]
+
+
+def save_summary_changes(
+    db_path: Path,
+    model: str,
+    prompt_version: str,
+    summaries: dict[str, dict[str, Any]],
+    file_rows: list[dict[str, Any]],
+    removed_paths: Iterable[str] = (),
+) -> None:
+    """
+    Upsert new summaries and changed file rows, and drop rows for removed files,
+    all in a single transaction.
+    """
+    removed = list(removed_paths)
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO summary_rows "
+                f"(content_hash, model, prompt_version, {', '.join(_SUMMARY_COLUMNS)}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(_SUMMARY_COLUMNS))})",
+                [
+                    (
+                        content_hash,
+                        model,
+                        prompt_version,
+                        *(row[col] for col in _SUMMARY_COLUMNS),
+                    )
+                    for content_hash, row in summaries.items()
+                ],
+            )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO summary_files ({', '.join(_FILE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_FILE_COLUMNS))})",
+                [tuple(row[col] for col in _FILE_COLUMNS) for row in file_rows],
+            )
+            for batch in batched(removed):
+                placeholders = ",".join("?" * len(batch))
+                conn.execute(
+                    f"DELETE FROM summary_files WHERE file_path IN ({placeholders})",
+                    batch,
+                )
+
+
+def load_legacy_summaries(db_path: Path) -> list[dict[str, Any]] | None:
+    """
+    Return the per-file items of the former single-blob summary cache, or None
+    if the database has no such blob.
+    """
+    if not db_path.exists():
+        return None
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='cache'"
+        ).fetchone()
+        if table is None:
+            return None
+        row = conn.execute("SELECT value FROM cache WHERE key='summaries'").fetchone()
+    if row is None:
+        return []
+    try:
+        return list(json.loads(row[0]).get("summaries", []))
+    except (json.JSONDecodeError, AttributeError, TypeError):
+        # Fail gracefully on corruption; the files are summarized again.
+        return []
+
+
+def drop_legacy_summaries(db_path: Path) -> None:
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS cache")
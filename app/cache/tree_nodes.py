@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import Any
+
+from app.cache.engine import cache_engine
+
+_NODE_COLUMNS = (
+    "file_path",
+    "file_name",
+    "file_size",
+    "last_modified_time",
+    "file_type",
+    "child_count",
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS tree_nodes (
+        file_path TEXT PRIMARY KEY,
+        parent_path TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        file_size INTEGER NOT NULL,
+        last_modified_time REAL NOT NULL,
+        file_type TEXT NOT NULL,
+        child_count INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_tree_nodes_parent "
+    "ON tree_nodes (parent_path, file_name)",
+)
+
+
+def _flatten(nodes: list, parent_path: str, rows: list[tuple]) -> None:
+    for node in nodes:
+        children = node["children"]
+        rows.append(
+            (
+                node["file_path"],
+                parent_path,
+                node["file_name"],
+                node["file_size"],
+                node["last_modified_time"],
+                node["file_type"],
+                None if children is None else len(children),
+            )
+        )
+        if children:
+            _flatten(children, node["file_path"], rows)
+
+
+def save_tree_nodes(db_path: Path, root_path: str, tree: list) -> None:
+    """
+    Replace the per-node table with the given tree, one row per node keyed by
+    path and indexed by parent so single levels can be paged without loading
+    the whole tree.
+    """
+    rows: list[tuple] = []
+    _flatten(tree, root_path, rows)
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("DELETE FROM tree_nodes")
+            conn.executemany(
+                "INSERT INTO tree_nodes (file_path, parent_path, file_name, file_size, "
+                "last_modified_time, file_type, child_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+
+def has_tree_nodes(db_path: Path) -> bool:
+    if not db_path.exists():
+        return False
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        return conn.execute("SELECT 1 FROM tree_nodes LIMIT 1").fetchone() is not None
+
+
+def get_tree_node(db_path: Path, file_path: str) -> dict[str, Any] | None:
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(_NODE_COLUMNS)} FROM tree_nodes WHERE file_path=?",
+            (file_path,),
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def load_children(
+    db_path: Path,
+    parent_path: str,
+    after: str | None = None,
+    limit: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Return the nodes directly under parent_path in name order, starting after
+    the given file name (keyset pagination).
+    """
+    query = f"SELECT {', '.join(_NODE_COLUMNS)} FROM tree_nodes WHERE parent_path=?"
+    params: list[Any] = [parent_path]
+    if after is not None:
+        query += " AND file_name > ?"
+        params.append(after)
+    query += " ORDER BY file_name"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    with cache_engine.connection(db_path, _SCHEMA) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
@@ -1,18 +1,67 @@
 import json
 import sqlite3
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
+
+from app.cache.engine import cache_engine
 
 VDR_DB_DIR = "VDR_DB"
 SAVED_SUMMARY_DB = ".summarycache.db"
 SAVED_TREE_DB = ".treecache.db"
+SAVED_JOURNAL_DB = ".journal.db"
+SAVED_MANIFEST_DB = ".manifest.db"
+SAVED_INDEX_DB = ".indexcache.db"
+SAVED_LEXICAL_DB = ".lexical.db"
+SAVED_QUERY_DB = ".querycache.db"
+
+# SQLite limits the number of bound parameters per statement (999 on older builds).
+MAX_SQL_PARAMS = 900
+
+_CACHE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)",
+)
+# Sidecar files SQLite creates next to a database in WAL mode.
+_SQLITE_SIDECAR_SUFFIXES = ("-wal", "-shm", "-journal")
 
 
 def is_cache_file(file_name: str) -> bool:
     """
     Check if the given file name is a recognized cache file.
     """
-    return file_name in {SAVED_SUMMARY_DB, SAVED_TREE_DB}
+    for suffix in _SQLITE_SIDECAR_SUFFIXES:
+        file_name = file_name.removesuffix(suffix)
+    return file_name in {
+        SAVED_SUMMARY_DB,
+        SAVED_TREE_DB,
+        SAVED_JOURNAL_DB,
+        SAVED_MANIFEST_DB,
+        SAVED_INDEX_DB,
+        SAVED_LEXICAL_DB,
+        SAVED_QUERY_DB,
+    }
+
+
+def is_excluded_name(name: str) -> bool:
+    """
+    Check if a directory entry is left out of folder scans (the VDR_DB directory
+    and cache files).
+    """
+    return name == VDR_DB_DIR or is_cache_file(name)
+
+
+def batched(items: list, size: int = MAX_SQL_PARAMS) -> Iterable[list]:
+    """
+    Split items into lists small enough to bind as statement parameters.
+    """
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _serialize(data: Any) -> str:
+    # Serialize data if it's not already a string
+    if isinstance(data, str):
+        return data
+    return json.dumps(data)
 
 
 def get_json_from_cache(db_path: Path, key: str) -> Optional[Any]:
@@ -24,11 +73,10 @@ def get_json_from_cache(db_path: Path, key: str) -> Optional[Any]:
         return None
 
     try:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        c.execute("SELECT value FROM cache WHERE key=?", (key,))
-        result = c.fetchone()
-        conn.close()
+        with cache_engine.connection(db_path, _CACHE_SCHEMA) as conn:
+            result = conn.execute(
+                "SELECT value FROM cache WHERE key=?", (key,)
+            ).fetchone()
 
         if result:
             return json.loads(result[0])
@@ -39,28 +87,50 @@ def get_json_from_cache(db_path: Path, key: str) -> Optional[Any]:
     return None
 
 
+def get_many_json_from_cache(db_path: Path, keys: Iterable[str]) -> dict[str, Any]:
+    """
+    Retrieve several JSON values in batched queries.
+    Missing or undecodable keys are left out of the result.
+    """
+    keys = list(keys)
+    if not keys or not db_path.exists():
+        return {}
+
+    values: dict[str, Any] = {}
+    try:
+        with cache_engine.connection(db_path, _CACHE_SCHEMA) as conn:
+            for batch in batched(keys):
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for row in rows:
+                    try:
+                        values[row["key"]] = json.loads(row["value"])
+                    except json.JSONDecodeError:
+                        continue
+    except sqlite3.Error:
+        return {}
+    return values
+
+
 def save_json_to_cache(db_path: Path, key: str, data: Any):
     """
     Serialize and save a JSON value to the SQLite cache.
-    Creates the table if it doesn't exist.
     """
-    try:
-        conn = sqlite3.connect(db_path)
-        c = conn.cursor()
-        c.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)")
-
-        # Serialize data if it's not already a string
-        if not isinstance(data, str):
-            json_data = json.dumps(data)
-        else:
-            json_data = data
-
-        c.execute(
-            "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
-            (key, json_data),
-        )
-        conn.commit()
-    finally:
-        # Ensure connection is always closed
-        if "conn" in locals():
-            conn.close()
+    save_many_json_to_cache(db_path, {key: data})
+
+
+def save_many_json_to_cache(db_path: Path, items: dict[str, Any]):
+    """
+    Serialize and save several JSON values in a single transaction.
+    """
+    if not items:
+        return
+    rows = [(key, _serialize(data)) for key, data in items.items()]
+    with cache_engine.connection(db_path, _CACHE_SCHEMA) as conn:
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", rows
+            )
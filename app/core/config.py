@@ -20,6 +20,59 @@ class Settings(BaseSettings):
     BACKEND_HOST: str = "127.0.0.1"
     BACKEND_PORT: int = 8000
     LOG_FILE_PATH: str = "logs/event_times.log"
+    # Adaptive (AIMD) concurrency per model endpoint
+    LLM_CONCURRENCY_INITIAL: int = 10
+    LLM_CONCURRENCY_MIN: int = 1
+    LLM_CONCURRENCY_MAX: int = 64
+    # Retries of throttled model calls, made by the limiter (clients do not retry)
+    LLM_MAX_RETRIES: int = 3
+    # Overrides the model context registry, e.g. for custom Azure deployment names
+    LLM_CONTEXT_WINDOW: int | None = None
+    # Upper bound on the input of one reduce call; larger inputs are reduced as a tree
+    SUMMARY_REDUCE_BATCH_TOKENS: int = 8000
+    # Exact-match LLM response cache shared by all folders
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = ".cache/llmcache.db"
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # Process pool for CPU-bound document parsing; 0 parses in threads instead
+    PARSE_WORKERS: int = min(4, os.cpu_count() or 1)
+    PARSE_MAX_TASKS_PER_CHILD: int = 50
+    # Folder summarization pipeline: workers per stage and bounded queue size
+    SUMMARY_LOAD_CONCURRENCY: int = min(4, os.cpu_count() or 1)
+    SUMMARY_PREPARE_CONCURRENCY: int = 2
+    SUMMARY_LLM_CONCURRENCY: int = 64
+    SUMMARY_PIPELINE_QUEUE_SIZE: int = 32
+    SUMMARY_PIPELINE_LOG_INTERVAL_S: float = 5.0
+    # Threads hashing file contents for change detection
+    HASH_WORKERS: int = min(8, os.cpu_count() or 1)
+    # RAG indexing pipeline: parse/split workers, embedding batches across files
+    # (chunk and token caps per request, batches in flight) and chunks per store write
+    INDEX_PARSE_CONCURRENCY: int = min(4, os.cpu_count() or 1)
+    INDEX_EMBED_BATCH_SIZE: int = 512
+    INDEX_EMBED_BATCH_TOKENS: int = 100_000
+    INDEX_EMBED_CONCURRENCY: int = 4
+    INDEX_WRITE_BATCH_SIZE: int = 2000
+    # Open vector store handles kept per persist directory, closed when idle
+    VECTOR_STORE_MAX_OPEN: int = 8
+    VECTOR_STORE_IDLE_CLOSE_S: float = 600.0
+    # Compiled RAG agents kept per (folder, k, retrieval mode)
+    RAG_AGENT_CACHE_SIZE: int = 32
+    # Candidates taken from each of the vector and BM25 rankings before fusion
+    RAG_FUSION_CANDIDATES: int = 20
+    # Answers kept per folder, valid until the folder's index changes
+    RAG_QUERY_CACHE_ENABLED: bool = True
+    RAG_QUERY_CACHE_MAX_ENTRIES: int = 1000
+    # Chunk embeddings keyed on (model, chunk content hash), shared by all folders
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = ".cache/embeddingcache.db"
+    EMBEDDING_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    # Background watcher journaling changes of folders with a VDR_DB directory
+    WATCHER_ENABLED: bool = False
+    # Full rescan interval used only when watchdog is not installed
+    WATCHER_POLL_INTERVAL_S: float = 60.0
+    WATCHER_RESYNC_INTERVAL_S: float = 300.0
+    WATCHER_MAX_FOLDERS: int = 16
+    WATCHER_JOURNAL_MAX_EVENTS: int = 100_000
     # Add other settings here
 
     class Config:
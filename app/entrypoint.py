@@ -1,12 +1,14 @@
+import multiprocessing
 import os
 
-import uvicorn
 
-from app.core.config import settings
-from app.main import app as fastapi_app
+def main() -> None:
+    # Imported here so frozen worker processes never load the app (see below).
+    import uvicorn
 
+    from app.core.config import settings
+    from app.main import app as fastapi_app
 
-def main() -> None:
     host = os.getenv("BACKEND_HOST", settings.BACKEND_HOST)
     port = int(os.getenv("BACKEND_PORT", settings.BACKEND_PORT))
 
@@ -19,4 +21,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    # In frozen (PyInstaller) builds the document parsing pool's workers start by
+    # running this script; freeze_support hands them over to multiprocessing
+    # before anything else is imported.
+    multiprocessing.freeze_support()
     main()
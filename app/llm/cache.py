@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
+from app.cache.blob_cache import BlobCache, resolve_cache_path
+from app.core.config import settings
+from app.llm.models import get_model_name
+from app.llm.tokens import estimate_tokens
+
+
+class LLMResponseCache:
+    """
+    Persistent exact-match cache of LLM completions.
+    Entries are keyed on a hash of the model name, temperature and rendered prompt,
+    stored zlib-compressed in a BlobCache, so they are evicted least-recently-used
+    past max_bytes. Database errors and corrupt entries never fail the model call;
+    they are misses.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        self._blobs = BlobCache(db_path, "llm_cache", max_bytes)
+        self._lock = threading.Lock()
+        self.tokens_saved = 0
+
+    def lookup(self, key: str, prompt: str) -> str | None:
+        text = self._blobs.lookup_many(
+            [key],
+            lambda value: zlib.decompress(value).decode("utf-8"),
+            corrupt=(zlib.error, UnicodeDecodeError),
+        ).get(key)
+        if text is not None:
+            with self._lock:
+                self.tokens_saved += estimate_tokens(prompt) + estimate_tokens(text)
+        return text
+
+    def update(self, key: str, text: str) -> None:
+        self._blobs.update_many({key: zlib.compress(text.encode("utf-8"))})
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self._blobs.stats(), "tokens_saved": self.tokens_saved}
+
+
+_LLM_CACHE: LLMResponseCache | None = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """
+    Return the process-wide LLM response cache, or None when it is disabled.
+    """
+    global _LLM_CACHE
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE is None:
+            _LLM_CACHE = LLMResponseCache(
+                resolve_cache_path(settings.LLM_CACHE_PATH),
+                settings.LLM_CACHE_MAX_BYTES,
+            )
+        return _LLM_CACHE
+
+
+def prompt_cache_key(llm: ChatOpenAI | AzureChatOpenAI, prompt: str) -> str:
+    temperature = getattr(llm, "temperature", None)
+    digest = hashlib.sha256()
+    for part in (get_model_name(llm), repr(temperature), prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def with_response_cache(
+    runnable: Runnable, llm: ChatOpenAI | AzureChatOpenAI, cache: LLMResponseCache
+) -> Runnable:
+    """
+    Wrap a prompt -> chat model runnable so identical prompts are answered from
+    the cache. Lookups happen before the model runnable, so hits never take a
+    concurrency slot.
+    """
+
+    def call(value: Any, config: RunnableConfig) -> Any:
+        prompt = value.to_string()
+        key = prompt_cache_key(llm, prompt)
+        cached = cache.lookup(key, prompt)
+        if cached is not None:
+            return AIMessage(content=cached)
+        message = runnable.invoke(value, config)
+        if isinstance(message.content, str):
+            cache.update(key, message.content)
+        return message
+
+    async def acall(value: Any, config: RunnableConfig) -> Any:
+        prompt = value.to_string()
+        key = prompt_cache_key(llm, prompt)
+        cached = await asyncio.to_thread(cache.lookup, key, prompt)
+        if cached is not None:
+            return AIMessage(content=cached)
+        message = await runnable.ainvoke(value, config)
+        if isinstance(message.content, str):
+            await asyncio.to_thread(cache.update, key, message.content)
+        return message
+
+    return RunnableLambda(call, afunc=acall, name="llm_response_cache")
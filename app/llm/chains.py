@@ -1,16 +1,40 @@
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
-from app.llm.prompts import MAP_PROMPT, REDUCE_PROMPT, STUFF_PROMPT
+from app.llm.cache import get_llm_cache, with_response_cache
+from app.llm.concurrency import get_limiter, with_limiter
+from app.llm.prompts import (
+    COLLAPSE_PROMPT,
+    MAP_PROMPT,
+    RAG_ANSWER_PROMPT,
+    REDUCE_PROMPT,
+    STUFF_PROMPT,
+)
+
+
+def _limited(llm: ChatOpenAI | AzureChatOpenAI):
+    model = with_limiter(llm, get_limiter(llm))
+    cache = get_llm_cache()
+    if cache is None:
+        return model
+    return with_response_cache(model, llm, cache)
 
 
 def build_map_chain(llm: ChatOpenAI | AzureChatOpenAI):
-    return MAP_PROMPT | llm | StrOutputParser()
+    return MAP_PROMPT | _limited(llm) | StrOutputParser()
 
 
 def build_reduce_chain(llm: ChatOpenAI | AzureChatOpenAI):
-    return REDUCE_PROMPT | llm | StrOutputParser()
+    return REDUCE_PROMPT | _limited(llm) | StrOutputParser()
+
+
+def build_collapse_chain(llm: ChatOpenAI | AzureChatOpenAI):
+    return COLLAPSE_PROMPT | _limited(llm) | StrOutputParser()
 
 
 def build_stuff_chain(llm: ChatOpenAI | AzureChatOpenAI):
-    return STUFF_PROMPT | llm | StrOutputParser()
+    return STUFF_PROMPT | _limited(llm) | StrOutputParser()
+
+
+def build_rag_answer_chain(llm: ChatOpenAI | AzureChatOpenAI):
+    return RAG_ANSWER_PROMPT | _limited(llm) | StrOutputParser()
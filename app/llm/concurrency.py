@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from openai import APITimeoutError, RateLimitError
+
+from app.core.config import settings
+from app.core.logging import log_event
+
+# Error rate (exponentially weighted) above which the limit stops growing.
+ERROR_RATE_TOLERANCE = 0.2
+_EWMA_ALPHA = 0.2
+# Status codes that signal the endpoint is saturated.
+_THROTTLE_STATUS_CODES = {429, 503}
+# Backoff before retrying a throttled call, doubled per attempt.
+RETRY_BASE_DELAY_S = 0.5
+RETRY_MAX_DELAY_S = 20.0
+
+T = TypeVar("T")
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    if isinstance(exc, (RateLimitError, APITimeoutError, TimeoutError)):
+        return True
+    return getattr(exc, "status_code", None) in _THROTTLE_STATUS_CODES
+
+
+def retry_delay(attempt: int, exc: BaseException) -> float:
+    """
+    Seconds to wait before retrying a throttled call: the server's Retry-After
+    when it sends one, otherwise exponential backoff with jitter.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    retry_after = headers.get("retry-after") if headers is not None else None
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), RETRY_MAX_DELAY_S)
+        except ValueError:
+            pass
+    delay = min(RETRY_MAX_DELAY_S, RETRY_BASE_DELAY_S * 2**attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class _Waiter:
+    __slots__ = ("future", "loop", "event", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+            return
+
+        def _resolve() -> None:
+            if not self.future.done():
+                self.future.set_result(None)
+
+        self.loop.call_soon_threadsafe(_resolve)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter shared by every caller of one model endpoint.
+    The limit grows by roughly one slot per window of successful calls while the
+    error rate stays low, and is cut multiplicatively on throttling (429/503) or
+    timeouts. Latency is tracked for reporting only: it scales with the length
+    of each answer, so it says little about the endpoint's saturation.
+    Slots can be taken from both coroutines and threads, so sync and async call
+    paths share one budget. Throttled calls are retried here (call/call_sync)
+    rather than inside the API clients, so every 429 reaches the limiter.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        self._latency_ewma: float | None = None
+        self._error_rate = 0.0
+        self._last_decrease = 0.0
+        self._throttled = 0
+        self._completed = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "latency_ewma_s": self._latency_ewma,
+                "error_rate": round(self._error_rate, 4),
+                "completed": self._completed,
+                "throttled": self._throttled,
+            }
+
+    def _try_acquire_locked(self) -> bool:
+        if not self._waiters and self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return True
+        return False
+
+    def _release_locked(self) -> None:
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < int(self._limit):
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self._in_flight += 1
+            waiter.wake()
+
+    async def acquire(self) -> None:
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._release_locked()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def acquire_sync(self) -> None:
+        with self._lock:
+            if self._try_acquire_locked():
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    def release(
+        self, started: float, error: BaseException | None = None, record: bool = True
+    ) -> None:
+        latency = time.perf_counter() - started
+        with self._lock:
+            if record:
+                self._record_locked(started, latency, error)
+            self._release_locked()
+
+    def _record_locked(
+        self, started: float, latency: float, error: BaseException | None
+    ) -> None:
+        self._completed += 1
+        previous = int(self._limit)
+        if error is not None and is_throttle_error(error):
+            self._throttled += 1
+            # Only back off once per congestion event: calls that started before
+            # the last decrease were already accounted for.
+            if started >= self._last_decrease:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                self._last_decrease = time.perf_counter()
+        else:
+            failed = 1.0 if error is not None else 0.0
+            self._error_rate += _EWMA_ALPHA * (failed - self._error_rate)
+            if error is None:
+                if self._latency_ewma is None:
+                    self._latency_ewma = latency
+                else:
+                    self._latency_ewma += _EWMA_ALPHA * (latency - self._latency_ewma)
+            if error is None and self._error_rate <= ERROR_RATE_TOLERANCE:
+                self._limit = min(
+                    float(self.max_limit), self._limit + 1.0 / max(self._limit, 1.0)
+                )
+
+        if int(self._limit) != previous:
+            log_event(
+                "concurrency_limit",
+                limiter=self.name,
+                limit=int(self._limit),
+                previous=previous,
+                in_flight=self._in_flight,
+                queue_depth=len(self._waiters),
+            )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            # The caller went away (or stopped consuming a stream); this says
+            # nothing about the endpoint's health.
+            self.release(started, record=False)
+            raise
+        except BaseException as exc:
+            self.release(started, exc)
+            raise
+        self.release(started)
+
+    @contextmanager
+    def slot_sync(self) -> Iterator[None]:
+        self.acquire_sync()
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            self.release(started, exc)
+            raise
+        self.release(started)
+
+    def retry_or_raise(self, attempt: int, exc: Exception) -> float:
+        """
+        Return the delay before retry number attempt + 1 of a throttled call;
+        re-raise exc when it is not a throttle or the retries are used up.
+        """
+        if attempt >= settings.LLM_MAX_RETRIES or not is_throttle_error(exc):
+            raise exc
+        delay = retry_delay(attempt, exc)
+        log_event(
+            "llm_retry",
+            limiter=self.name,
+            attempt=attempt + 1,
+            delay_s=delay,
+            error=type(exc).__name__,
+        )
+        return delay
+
+    def call_sync(self, fn: Callable[[], T]) -> T:
+        """
+        Run fn in a slot, retrying throttled calls up to LLM_MAX_RETRIES times.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.slot_sync():
+                    return fn()
+            except Exception as exc:
+                delay = self.retry_or_raise(attempt, exc)
+            time.sleep(delay)
+            attempt += 1
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            try:
+                async with self.slot():
+                    return await fn()
+            except Exception as exc:
+                delay = self.retry_or_raise(attempt, exc)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+_LIMITERS: dict[str, AdaptiveLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def endpoint_key(client: Any) -> str:
+    """
+    Identify the model endpoint a chat or embeddings client talks to.
+    """
+    endpoint = (
+        getattr(client, "azure_endpoint", None)
+        or getattr(client, "openai_api_base", None)
+        or "openai"
+    )
+    model = (
+        getattr(client, "deployment_name", None)
+        or getattr(client, "model_name", None)
+        or getattr(client, "model", None)
+        or type(client).__name__
+    )
+    return f"{endpoint}/{model}"
+
+
+def get_limiter(client: Any) -> AdaptiveLimiter:
+    """
+    Return the process-wide limiter for the client's model endpoint.
+    """
+    key = endpoint_key(client)
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                key,
+                initial_limit=settings.LLM_CONCURRENCY_INITIAL,
+                min_limit=settings.LLM_CONCURRENCY_MIN,
+                max_limit=settings.LLM_CONCURRENCY_MAX,
+            )
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def limiter_snapshots() -> list[dict[str, Any]]:
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+    return [limiter.snapshot() for limiter in limiters]
+
+
+def with_limiter(runnable: Runnable, limiter: AdaptiveLimiter) -> Runnable:
+    """
+    Wrap a runnable so every invocation, including each item of a batch,
+    holds a slot of the limiter.
+    """
+
+    def call(value: Any, config: RunnableConfig) -> Any:
+        return limiter.call_sync(lambda: runnable.invoke(value, config))
+
+    async def acall(value: Any, config: RunnableConfig) -> Any:
+        return await limiter.call(lambda: runnable.ainvoke(value, config))
+
+    return RunnableLambda(call, afunc=acall, name=f"limited:{limiter.name}")
+
+
+class LimiterMiddleware(AgentMiddleware):
+    """
+    Agent middleware that runs every model call of an agent inside a limiter slot.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter):
+        super().__init__()
+        self.limiter = limiter
+
+    def wrap_model_call(self, request, handler):
+        return self.limiter.call_sync(lambda: handler(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await self.limiter.call(lambda: handler(request))
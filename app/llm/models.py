@@ -21,9 +21,20 @@ def initialize_model():
             azure_ad_token_provider=AZURE_TOKEN_PROVIDER,
             temperature=0,
             timeout=1000,
-            max_retries=3,
+            # Throttled calls are retried by the concurrency limiter.
+            max_retries=0,
         )
-    return ChatOpenAI(model="gpt-4.1-nano", temperature=0, timeout=10, max_tokens=1000)
+    return ChatOpenAI(
+        model="gpt-4.1-nano", temperature=0, timeout=10, max_tokens=1000, max_retries=0
+    )
+
+
+def get_model_name(llm: ChatOpenAI | AzureChatOpenAI) -> str:
+    return (
+        getattr(llm, "model_name", None)
+        or getattr(llm, "deployment_name", None)
+        or "unknown"
+    )
 
 
 def initialize_agent():
@@ -1,3 +1,5 @@
+import hashlib
+
 from langchain_core.prompts import PromptTemplate
 
 MAP_PROMPT = PromptTemplate.from_template("""
@@ -35,6 +37,23 @@ Summary: <2-3 sentences>
 {text}
 """)
 
+COLLAPSE_PROMPT = PromptTemplate.from_template("""
+You are an expert summarizer.
+
+The text below consists of PARTIAL SUMMARIES from consecutive sections of the same document.
+
+Task:
+- Merge these summaries into ONE shorter partial summary
+- Keep every distinct key fact; drop repeated points
+- Do NOT add a title or conclusions beyond the text
+- Write at most 4 concise sentences
+
+*ATTENTION*: The text below is NOT raw document content.
+{text}
+
+MERGED SUMMARY:
+""")
+
 STUFF_PROMPT = PromptTemplate.from_template("""
 You are an M&A professional experienced in reviewing transaction-related documents.
 
@@ -52,3 +71,26 @@ Summary: <2-3 sentences>
 *ATTENTION*: The text below is the FULL content to summarize.
 {text}
 """)
+
+RAG_ANSWER_PROMPT = PromptTemplate.from_template("""
+You are a helpful assistant answering questions about the user's documents.
+
+Task:
+- Answer the question using only the retrieved context below
+- If the answer is not in the context, say you don't know
+- Answer in the language of the question
+
+Retrieved context:
+{context}
+
+Question: {question}
+""")
+
+# Identifies the current prompt set; cached summaries are keyed on it so that
+# editing any template invalidates them automatically.
+PROMPT_VERSION = hashlib.sha256(
+    "\x00".join(
+        p.template
+        for p in (MAP_PROMPT, REDUCE_PROMPT, COLLAPSE_PROMPT, STUFF_PROMPT)
+    ).encode()
+).hexdigest()[:16]
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
+from app.core.config import settings
+
+# CJK ideographs, kana and hangul are roughly one token per character for the
+# OpenAI tokenizers; everything else averages about four characters per token.
+_WIDE_CHARS = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]"
+)
+_CHARS_PER_TOKEN = 4
+
+# Leave room for chat formatting overhead and estimator error.
+_SAFETY_MARGIN = 0.1
+
+
+@dataclass(frozen=True)
+class ModelContext:
+    context_window: int
+    max_output_tokens: int
+
+
+# Longest matching prefix wins.
+MODEL_CONTEXTS: dict[str, ModelContext] = {
+    "gpt-5": ModelContext(400_000, 128_000),
+    "gpt-4.1": ModelContext(1_047_576, 32_768),
+    "gpt-4o": ModelContext(128_000, 16_384),
+    "gpt-4-turbo": ModelContext(128_000, 4_096),
+    "gpt-4": ModelContext(8_192, 4_096),
+    "gpt-35-turbo": ModelContext(16_385, 4_096),
+    "gpt-3.5-turbo": ModelContext(16_385, 4_096),
+    "o1": ModelContext(200_000, 100_000),
+    "o3": ModelContext(200_000, 100_000),
+    "o4-mini": ModelContext(200_000, 100_000),
+}
+DEFAULT_MODEL_CONTEXT = ModelContext(128_000, 4_096)
+
+
+@dataclass
+class TokenUsage:
+    tokens_in: int = 0
+    tokens_out: int = 0
+
+    def add(self, prompt: str, completion: str) -> None:
+        self.tokens_in += estimate_tokens(prompt)
+        self.tokens_out += estimate_tokens(completion)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text offline, without a tokenizer download.
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    narrow = len(text) - wide
+    return wide + -(-narrow // _CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Return the longest prefix of text estimated at no more than max_tokens.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
+
+
+def get_model_context(model: str) -> ModelContext:
+    if settings.LLM_CONTEXT_WINDOW:
+        return ModelContext(
+            settings.LLM_CONTEXT_WINDOW, DEFAULT_MODEL_CONTEXT.max_output_tokens
+        )
+    model = model.lower()
+    matches = [prefix for prefix in MODEL_CONTEXTS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_MODEL_CONTEXT
+    return MODEL_CONTEXTS[max(matches, key=len)]
+
+
+def input_token_budget(llm: ChatOpenAI | AzureChatOpenAI, model: str) -> int:
+    """
+    Number of prompt tokens that fit in the model's context window after
+    reserving room for the completion.
+    """
+    context = get_model_context(model)
+    reserved_output = getattr(llm, "max_tokens", None) or context.max_output_tokens
+    available = context.context_window - min(reserved_output, context.max_output_tokens)
+    return int(available * (1 - _SAFETY_MARGIN))
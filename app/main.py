@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.v1.api import api_router
+from .cache.engine import cache_engine
 from .core.config import settings
+from .rag.vector_store import vector_store_registry
+from .services.parse_pool import shutdown_parse_pool
+from .services.watcher import stop_watchers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    stop_watchers()
+    shutdown_parse_pool()
+    vector_store_registry.close_all()
+    cache_engine.close_all()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,16 +1,68 @@
 from __future__ import annotations
 
+import asyncio
+import threading
 import time
-from typing import Iterable, List
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterable, List, Literal
 
 from langchain.agents import create_agent
 from langchain.tools import tool
 from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage
 
+from app.core.config import settings
 from app.core.logging import log_event
-from app.llm.models import initialize_model
-from app.rag.vector_store import get_vector_store
+from app.llm.cache import get_llm_cache, prompt_cache_key
+from app.llm.chains import build_rag_answer_chain
+from app.llm.concurrency import LimiterMiddleware, get_limiter
+from app.llm.models import get_model_name, initialize_model
+from app.llm.prompts import RAG_ANSWER_PROMPT
+from app.rag.lexical import LexicalIndex, lexical_db_path, reciprocal_rank_fusion
+from app.rag.query_cache import (
+    lookup_query_result,
+    query_cache_key,
+    store_query_result,
+)
+from app.rag.vector_store import get_embeddings, vector_store_lease
+
+RagMode = Literal["agent", "direct"]
+RetrievalMode = Literal["hybrid", "vector", "lexical"]
+
+
+@dataclass
+class RagAnswer:
+    answer: str
+    sources: List[Document]
+    mode: RagMode
+    # Seconds per stage (retrieval_s, generation_s in direct mode) and total_s.
+    timings: dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+
+    def to_cache(self) -> dict[str, Any]:
+        return {
+            "answer": self.answer,
+            "sources": [
+                {"id": doc.id, "content": doc.page_content, "metadata": doc.metadata}
+                for doc in self.sources
+            ],
+            "mode": self.mode,
+        }
+
+    @classmethod
+    def from_cache(cls, value: dict[str, Any], duration: float) -> RagAnswer:
+        sources = [
+            Document(
+                id=source["id"],
+                page_content=source["content"],
+                metadata=source["metadata"],
+            )
+            for source in value["sources"]
+        ]
+        return cls(
+            value["answer"], sources, value["mode"], {"total_s": duration}, True
+        )
 
 
 def _collect_documents(messages: Iterable[BaseMessage]) -> List[Document]:
@@ -24,27 +76,59 @@ def _collect_documents(messages: Iterable[BaseMessage]) -> List[Document]:
     return docs
 
 
-def build_rag_agent(folder: str, k: int = 4):
-    vector_store = get_vector_store(folder)
+def format_context(docs: Iterable[Document]) -> str:
+    return "\n\n".join(
+        (f"Source: {doc.metadata}\nContent: {doc.page_content}") for doc in docs
+    )
+
 
+def retrieve(
+    folder: str, query: str, k: int, retrieval: RetrievalMode = "hybrid"
+) -> List[Document]:
+    """
+    Return the k chunks most relevant to the query.
+    "vector" ranks by embedding similarity, "lexical" by BM25 over the chunk
+    terms (no embedding call), and "hybrid" merges both rankings with reciprocal
+    rank fusion.
+    """
+    start = time.perf_counter()
+    # Fusion draws from deeper candidate lists than the k it returns.
+    depth = k if retrieval != "hybrid" else max(k, settings.RAG_FUSION_CANDIDATES)
+    lexical_docs: List[Document] = []
+    vector_docs: List[Document] = []
+    if retrieval != "vector":
+        lexical_docs = LexicalIndex(lexical_db_path(folder)).search(query, depth)
+    lexical_s = time.perf_counter() - start
+    if retrieval != "lexical":
+        with vector_store_lease(folder) as vector_store:
+            vector_docs = get_limiter(get_embeddings()).call_sync(
+                lambda: vector_store.similarity_search(query, k=depth)
+            )
+    if retrieval == "hybrid":
+        retrieved_docs = reciprocal_rank_fusion([vector_docs, lexical_docs], k)
+    else:
+        retrieved_docs = (vector_docs or lexical_docs)[:k]
+    log_event(
+        "retrieval",
+        duration_s=time.perf_counter() - start,
+        lexical_s=lexical_s,
+        folder=folder,
+        k=k,
+        retrieval=retrieval,
+        query_length=len(query),
+        doc_count=len(retrieved_docs),
+        vector_count=len(vector_docs),
+        lexical_count=len(lexical_docs),
+    )
+    return retrieved_docs
+
+
+def build_rag_agent(folder: str, k: int = 4, retrieval: RetrievalMode = "hybrid"):
     @tool(response_format="content_and_artifact")
     def retrieve_context(query: str):
         """Retrieve information to help answer a query."""
-        start = time.perf_counter()
-        retrieved_docs = vector_store.similarity_search(query, k=k)
-        log_event(
-            "retrieval",
-            duration_s=time.perf_counter() - start,
-            folder=folder,
-            k=k,
-            query_length=len(query),
-            doc_count=len(retrieved_docs),
-        )
-        serialized = "\n\n".join(
-            (f"Source: {doc.metadata}\nContent: {doc.page_content}")
-            for doc in retrieved_docs
-        )
-        return serialized, retrieved_docs
+        retrieved_docs = retrieve(folder, query, k, retrieval)
+        return format_context(retrieved_docs), retrieved_docs
 
     tools = [retrieve_context]
     system_prompt = (
@@ -54,17 +138,293 @@ def build_rag_agent(folder: str, k: int = 4):
 
     llm = initialize_model()
 
-    agent = create_agent(llm, tools, system_prompt=system_prompt)
+    agent = create_agent(
+        llm,
+        tools,
+        system_prompt=system_prompt,
+        middleware=[LimiterMiddleware(get_limiter(llm))],
+    )
     return agent
 
 
-def answer_question(
-    question: str, folder: str, k: int = 4
-) -> tuple[str, List[Document]]:
-    agent = build_rag_agent(folder=folder, k=k)
+_AGENTS: OrderedDict[tuple[str, int, str], object] = OrderedDict()
+_AGENTS_LOCK = threading.Lock()
+
+
+def get_rag_agent(folder: str, k: int = 4, retrieval: RetrievalMode = "hybrid"):
+    """
+    Return the compiled agent for (folder, k, retrieval), building it on first use.
+    Agents hold no per-request state, so one instance serves every question;
+    the least recently used ones are dropped beyond RAG_AGENT_CACHE_SIZE.
+    """
+    key = (folder, k, retrieval)
+    with _AGENTS_LOCK:
+        agent = _AGENTS.get(key)
+        if agent is not None:
+            _AGENTS.move_to_end(key)
+            return agent
+    start = time.perf_counter()
+    agent = build_rag_agent(folder=folder, k=k, retrieval=retrieval)
+    log_event(
+        "rag_agent_build", duration_s=time.perf_counter() - start, folder=folder, k=k
+    )
+    with _AGENTS_LOCK:
+        agent = _AGENTS.setdefault(key, agent)
+        while len(_AGENTS) > settings.RAG_AGENT_CACHE_SIZE:
+            _AGENTS.popitem(last=False)
+    return agent
+
+
+_ANSWER_LLM = None
+_ANSWER_CHAIN = None
+_ANSWER_LOCK = threading.Lock()
+
+
+def get_answer_llm():
+    global _ANSWER_LLM
+    with _ANSWER_LOCK:
+        if _ANSWER_LLM is None:
+            _ANSWER_LLM = initialize_model()
+        return _ANSWER_LLM
+
+
+def get_answer_chain():
+    global _ANSWER_CHAIN
+    llm = get_answer_llm()
+    with _ANSWER_LOCK:
+        if _ANSWER_CHAIN is None:
+            _ANSWER_CHAIN = build_rag_answer_chain(llm)
+        return _ANSWER_CHAIN
+
+
+def _answer_cache_key(
+    question: str, k: int, mode: RagMode, retrieval: RetrievalMode
+) -> str:
+    return query_cache_key(
+        question,
+        k=k,
+        mode=mode,
+        retrieval=retrieval,
+        model=get_model_name(get_answer_llm()),
+    )
+
+
+def _answer_direct(
+    question: str, folder: str, k: int, retrieval: RetrievalMode
+) -> RagAnswer:
+    # At most one embedding call and one generation call; no tool-choice round trip.
+    start = time.perf_counter()
+    sources = retrieve(folder, question, k, retrieval)
+    retrieved = time.perf_counter()
+    answer = get_answer_chain().invoke(
+        {"context": format_context(sources), "question": question}
+    )
+    end = time.perf_counter()
+    return RagAnswer(
+        answer,
+        sources,
+        "direct",
+        {
+            "retrieval_s": retrieved - start,
+            "generation_s": end - retrieved,
+            "total_s": end - start,
+        },
+    )
+
+
+def _answer_agent(
+    question: str, folder: str, k: int, retrieval: RetrievalMode
+) -> RagAnswer:
+    start = time.perf_counter()
+    agent = get_rag_agent(folder=folder, k=k, retrieval=retrieval)
     result = agent.invoke({"messages": [{"role": "user", "content": question}]})
 
     messages = result.get("messages", [])
     answer = messages[-1].content if messages else ""
     sources = _collect_documents(messages)
-    return answer, sources
+    return RagAnswer(
+        answer, sources, "agent", {"total_s": time.perf_counter() - start}
+    )
+
+
+async def _astream_generation(llm, prompt_value) -> AsyncIterator[str]:
+    # Streams the model's tokens; the response cache answers repeated prompts
+    # with the whole text at once.
+    cache = get_llm_cache()
+    prompt = prompt_value.to_string()
+    key = prompt_cache_key(llm, prompt)
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.lookup, key, prompt)
+        if cached is not None:
+            yield cached
+            return
+    limiter = get_limiter(llm)
+    # The model stream is read into a queue by its own task, so the limiter slot
+    # (and its latency sample) covers the model alone, not a slow client.
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def produce() -> None:
+        produced = False
+        attempt = 0
+        while True:
+            try:
+                async with limiter.slot():
+                    async for chunk in llm.astream(prompt_value):
+                        if isinstance(chunk.content, str) and chunk.content:
+                            produced = True
+                            queue.put_nowait(chunk.content)
+                return
+            except Exception as exc:
+                # Tokens already sent cannot be taken back, so only a stream that
+                # failed before its first token is retried.
+                if produced:
+                    raise
+                delay = limiter.retry_or_raise(attempt, exc)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    producer = asyncio.create_task(produce())
+    producer.add_done_callback(lambda _: queue.put_nowait(finished))
+    parts: list[str] = []
+    try:
+        while (text := await queue.get()) is not finished:
+            parts.append(text)
+            yield text
+        producer.result()
+    finally:
+        if not producer.done():
+            producer.cancel()
+    if cache is not None:
+        await asyncio.to_thread(cache.update, key, "".join(parts))
+
+
+def _stream_error(folder: str, stage: str, exc: Exception) -> dict[str, Any]:
+    log_event("rag_stream_error", folder=folder, stage=stage, error=str(exc))
+    return {"type": "error", "stage": stage, "error": str(exc)}
+
+
+async def astream_answer(
+    question: str, folder: str, k: int = 4, retrieval: RetrievalMode = "hybrid"
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Answer a question in direct mode, yielding events as they become available:
+    {"type": "sources", "sources": [...]} once retrieval completes, then
+    {"type": "token", "text": ...} per generated token, and finally
+    {"type": "done", "answer": ..., "timings": {...}, "cached": ...}.
+    A cached answer is yielded as a single token. If retrieval or generation
+    fails, the last event is {"type": "error", "stage": ..., "error": ...} instead.
+    """
+    start = time.perf_counter()
+    key = _answer_cache_key(question, k, "direct", retrieval)
+    version, value = await asyncio.to_thread(lookup_query_result, folder, key)
+    if value is not None:
+        result = RagAnswer.from_cache(value, time.perf_counter() - start)
+        log_event(
+            "rag_answer",
+            folder=folder,
+            mode="direct",
+            k=k,
+            source_count=len(result.sources),
+            streamed=True,
+            cached=True,
+            **result.timings,
+        )
+        yield {"type": "sources", "sources": result.sources}
+        yield {"type": "token", "text": result.answer}
+        yield {
+            "type": "done",
+            "answer": result.answer,
+            "timings": result.timings,
+            "cached": True,
+        }
+        return
+
+    try:
+        sources = await asyncio.to_thread(retrieve, folder, question, k, retrieval)
+    except Exception as exc:
+        yield _stream_error(folder, "retrieval", exc)
+        return
+    retrieved = time.perf_counter()
+    yield {"type": "sources", "sources": sources}
+
+    prompt_value = RAG_ANSWER_PROMPT.format_prompt(
+        context=format_context(sources), question=question
+    )
+    parts: list[str] = []
+    first_token = None
+    try:
+        async for text in _astream_generation(get_answer_llm(), prompt_value):
+            if first_token is None:
+                first_token = time.perf_counter()
+            parts.append(text)
+            yield {"type": "token", "text": text}
+    except Exception as exc:
+        yield _stream_error(folder, "generation", exc)
+        return
+    end = time.perf_counter()
+    answer = "".join(parts)
+    if version is not None:
+        await asyncio.to_thread(
+            store_query_result,
+            folder,
+            key,
+            version,
+            RagAnswer(answer, sources, "direct").to_cache(),
+        )
+
+    timings = {
+        "retrieval_s": retrieved - start,
+        "first_token_s": (first_token or end) - start,
+        "generation_s": end - retrieved,
+        "total_s": end - start,
+    }
+    log_event(
+        "rag_answer",
+        folder=folder,
+        mode="direct",
+        k=k,
+        source_count=len(sources),
+        streamed=True,
+        cached=False,
+        **timings,
+    )
+    yield {"type": "done", "answer": answer, "timings": timings, "cached": False}
+
+
+def answer_question(
+    question: str,
+    folder: str,
+    k: int = 4,
+    mode: RagMode = "agent",
+    retrieval: RetrievalMode = "hybrid",
+) -> RagAnswer:
+    """
+    Answer a question from the folder's index.
+    mode="direct" retrieves the top k chunks for the question and makes a single
+    generation call; mode="agent" lets a cached tool-calling agent decide what
+    to retrieve, at the cost of at least two model round trips.
+    See retrieve for the retrieval modes.
+    Answers are cached per folder until its index changes.
+    """
+    start = time.perf_counter()
+    key = _answer_cache_key(question, k, mode, retrieval)
+    version, value = lookup_query_result(folder, key)
+    if value is not None:
+        result = RagAnswer.from_cache(value, time.perf_counter() - start)
+    elif mode == "direct":
+        result = _answer_direct(question, folder, k, retrieval)
+    else:
+        result = _answer_agent(question, folder, k, retrieval)
+    if value is None and version is not None:
+        store_query_result(folder, key, version, result.to_cache())
+    log_event(
+        "rag_answer",
+        folder=folder,
+        mode=result.mode,
+        k=k,
+        source_count=len(result.sources),
+        cached=result.cached,
+        **result.timings,
+    )
+    return result
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.cache.blob_cache import BlobCache, resolve_cache_path
+from app.core.config import settings
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def embedding_model_name(embeddings: Any) -> str:
+    """
+    Identify the vectors an embeddings client produces: model plus dimensions.
+    """
+    model = (
+        getattr(embeddings, "model", None)
+        or getattr(embeddings, "deployment", None)
+        or type(embeddings).__name__
+    )
+    dimensions = getattr(embeddings, "dimensions", None)
+    return f"{model}:{dimensions}" if dimensions else str(model)
+
+
+def _cache_key(model: str, digest: str) -> str:
+    return f"{model}\x00{digest}"
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of chunk embeddings keyed on (model, chunk content hash).
+    Vectors are stored as float32 in a BlobCache, so they are evicted
+    least-recently-used past max_bytes and database errors never fail indexing.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int):
+        self._blobs = BlobCache(db_path, "embedding_cache", max_bytes)
+
+    def lookup_many(
+        self, model: str, digests: Iterable[str]
+    ) -> dict[str, list[float]]:
+        """
+        Return chunk hash -> vector for the hashes found in the cache.
+        """
+        wanted = {_cache_key(model, digest): digest for digest in digests}
+        found = self._blobs.lookup_many(
+            wanted, lambda value: array("f", value).tolist()
+        )
+        return {wanted[key]: vector for key, vector in found.items()}
+
+    def update_many(self, model: str, vectors: dict[str, list[float]]) -> None:
+        self._blobs.update_many(
+            {
+                _cache_key(model, digest): array("f", vector).tobytes()
+                for digest, vector in vectors.items()
+            }
+        )
+
+    def stats(self) -> dict[str, Any]:
+        return self._blobs.stats()
+
+
+_EMBEDDING_CACHE: EmbeddingCache | None = None
+_EMBEDDING_CACHE_LOCK = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """
+    Return the process-wide embedding cache, or None when it is disabled.
+    """
+    global _EMBEDDING_CACHE
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return None
+    with _EMBEDDING_CACHE_LOCK:
+        if _EMBEDDING_CACHE is None:
+            _EMBEDDING_CACHE = EmbeddingCache(
+                resolve_cache_path(settings.EMBEDDING_CACHE_PATH),
+                settings.EMBEDDING_CACHE_MAX_BYTES,
+            )
+        return _EMBEDDING_CACHE
@@ -1,92 +1,568 @@
 from __future__ import annotations
 
+import hashlib
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from langchain_community.vectorstores.utils import filter_complex_metadata
-
+from langchain_core.documents import Document
+
+from app.cache.index_sources import (
+    SourceChunks,
+    bump_index_version,
+    load_index_sources,
+    load_index_version,
+    save_index_sources,
+)
+from app.cache.journal import JournalChanges
+from app.cache.utils import SAVED_INDEX_DB, VDR_DB_DIR
+from app.core.config import settings
 from app.core.logging import log_event
-from app.rag.loaders import iter_supported_files, load_file
+from app.llm.concurrency import get_limiter
+from app.llm.tokens import estimate_tokens
+from app.rag.embedding_cache import (
+    EmbeddingCache,
+    chunk_hash,
+    embedding_model_name,
+    get_embedding_cache,
+)
+from app.rag.lexical import LexicalIndex, lexical_db_path
+from app.rag.loaders import SUPPORTED_SUFFIXES, is_supported_file, load_file
+from app.rag.query_cache import clear_query_cache
 from app.rag.splitter import get_splitter
-from app.rag.vector_store import get_vector_store
-
-
-def _collect_paths(folder: Path) -> tuple[list[Path], set[str]]:
+from app.rag.vector_store import chroma_collection, vector_store_lease
+from app.services.hashing import hash_files
+from app.services.manifest import (
+    manifest_files,
+    resolve_content_hashes,
+    scan_manifest,
+)
+from app.services.watcher import (
+    INDEX_CONSUMER,
+    acknowledge,
+    journal_seq,
+    pending_changes,
+)
+
+
+def _collect_paths(folder: Path) -> tuple[list[Path], set[str], dict[str, str]]:
     # Cache file list once so we can both index and compare against existing DB entries.
-    paths = list(iter_supported_files(folder))
+    entries = [
+        entry
+        for entry in manifest_files(scan_manifest(folder))
+        if Path(entry.name).suffix.lower() in SUPPORTED_SUFFIXES
+    ]
+    paths = [Path(entry.path) for entry in entries]
     # Build a set of current file sources to detect deletions in the vector store.
     current_sources = {str(path.resolve()) for path in paths}
-    return paths, current_sources
+    return paths, current_sources, resolve_content_hashes(folder, entries)
+
+
+def _collect_changed_paths(
+    changes: JournalChanges,
+) -> tuple[list[Path], set[str], dict[str, str]]:
+    # Only journaled additions and edits need indexing; removals are deleted by source.
+    paths = [
+        Path(p)
+        for p in (*changes.added, *changes.modified)
+        if p not in changes.directories and is_supported_file(Path(p))
+    ]
+    removed_sources = {
+        str(Path(p).resolve())
+        for p in changes.removed
+        if p not in changes.directories and is_supported_file(Path(p))
+    }
+    paths = [path for path in paths if path.is_file()]
+    return paths, removed_sources, hash_files(str(path) for path in paths)
 
 
-def _get_existing_for_source(vector_store, source: str):
-    return vector_store.get(where={"source": source}, include=["metadatas"])
+# Chroma reads and deletes are sent in batches of this many ids; larger
+# requests exceed SQLite's bound-variable limit inside Chroma.
+_DELETE_BATCH = 5000
+_GET_BATCH = 5000
+# Ids checked in each direction before the saved source map is trusted.
+_VERIFY_SAMPLE = 64
 
 
-def _should_update(existing, mtime: float, regenerate: bool) -> bool:
-    if regenerate or not existing["ids"]:
+class _SourceIndex:
+    """
+    Source -> stored chunk ids, content hash and mtime, used for the skip, update,
+    move and delete decisions of one indexing run.
+    The map is kept next to the folder's caches and trusted while its chunk count
+    matches the collection and a sample of ids agrees with it both ways; otherwise
+    it is rebuilt with one paged metadata read.
+    """
+
+    def __init__(self, vector_store, db_path: Path):
+        self.db_path = db_path
+        self.by_source = load_index_sources(db_path)
+        collection = chroma_collection(vector_store)
+        expected = collection.count()
+        if self.by_source is None or not self._matches(collection, expected):
+            self.by_source = self._read_store(vector_store)
+            log_event("index_snapshot_rebuild", chunk_count=expected)
+        self.by_hash: dict[str, set[str]] = {}
+        for source, chunks in self.by_source.items():
+            if chunks.content_hash:
+                self.by_hash.setdefault(chunks.content_hash, set()).add(source)
+
+    def _matches(self, collection, expected: int) -> bool:
+        if sum(len(chunks.ids) for chunks in self.by_source.values()) != expected:
+            return False
+        # Ids of sources spread over the map must be stored under that source...
+        sources = [source for source, chunks in self.by_source.items() if chunks.ids]
+        step = max(1, len(sources) // _VERIFY_SAMPLE)
+        sample = {
+            self.by_source[source].ids[-1]: source
+            for source in sources[::step][:_VERIFY_SAMPLE]
+        }
+        if sample:
+            stored = collection.get(ids=list(sample), include=["metadatas"])
+            if len(stored["ids"]) != len(sample):
+                return False
+            for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                if str((metadata or {}).get("source", "")) != sample[doc_id]:
+                    return False
+        # ...and stored chunks must be in the map under their own source.
+        stored = collection.get(limit=_VERIFY_SAMPLE, include=["metadatas"])
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            chunks = self.by_source.get(str((metadata or {}).get("source", "")))
+            if chunks is None or doc_id not in chunks.ids:
+                return False
         return True
-    old_mtime = existing["metadatas"][0].get("mtime")
-    log_event("index_mtime_check", old_mtime=old_mtime, current_mtime=mtime)
-    return old_mtime != mtime
 
+    @staticmethod
+    def _read_store(vector_store) -> dict[str, SourceChunks]:
+        by_source: dict[str, SourceChunks] = {}
+        offset = 0
+        while True:
+            stored = vector_store.get(
+                include=["metadatas"], limit=_GET_BATCH, offset=offset
+            )
+            for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                metadata = metadata or {}
+                chunks = by_source.setdefault(
+                    str(metadata.get("source", "")),
+                    SourceChunks(
+                        content_hash=metadata.get("content_hash"),
+                        mtime=metadata.get("mtime"),
+                    ),
+                )
+                chunks.ids.append(doc_id)
+            if len(stored["ids"]) < _GET_BATCH:
+                return by_source
+            offset += _GET_BATCH
+
+    def existing(self, source: str) -> SourceChunks:
+        return self.by_source.get(source) or SourceChunks()
+
+    def sources_with_content(self, content_hash: str) -> dict[str, list[str]]:
+        # Chunks already stored for identical content, grouped by their source.
+        return {
+            source: self.by_source[source].ids
+            for source in self.by_hash.get(content_hash, ())
+            if source in self.by_source
+        }
+
+    def record(
+        self, source: str, ids: list[str], content_hash: str | None, mtime: float
+    ) -> None:
+        # Chunks stored during this run, so later identical files can reuse them.
+        self.by_source[source] = SourceChunks(ids, content_hash, mtime)
+        if content_hash:
+            self.by_hash.setdefault(content_hash, set()).add(source)
+
+    def forget(self, source: str) -> None:
+        self.by_source.pop(source, None)
+
+    def save(self) -> None:
+        save_index_sources(self.db_path, self.by_source)
+
+
+def _move_source(
+    vector_store, lexical: LexicalIndex, ids: list[str], source: str, mtime: float
+) -> list[str]:
+    """
+    Re-store chunks under a new source path, keeping their embeddings.
+    They get the new path's ids, so a file created later at the old path cannot
+    collide with them.
+    """
+    new_ids = _copy_source(vector_store, lexical, ids, source, mtime)
+    kept = set(new_ids)
+    _delete_ids(vector_store, lexical, [i for i in ids if i not in kept])
+    return new_ids
 
-def _upsert_file(vector_store, splitter, path: Path, existing) -> bool:
-    source = str(path.resolve())
-    mtime = path.stat().st_mtime
 
-    file_start = time.perf_counter()
+def _copy_source(
+    vector_store, lexical: LexicalIndex, ids: list[str], source: str, mtime: float
+) -> list[str]:
+    """
+    Store a copy of existing chunks under a new source, reusing their embeddings.
+    """
+    collection = chroma_collection(vector_store)
+    stored = collection.get(
+        ids=ids, include=["metadatas", "documents", "embeddings"]
+    )
+    new_ids = _chunk_ids(
+        source, [chunk_hash(document) for document in stored["documents"]]
+    )
+    metadatas = [
+        {**metadata, "source": source, "mtime": mtime}
+        for metadata in stored["metadatas"]
+    ]
+    collection.add(
+        ids=new_ids,
+        embeddings=stored["embeddings"],
+        documents=stored["documents"],
+        metadatas=metadatas,
+    )
+    lexical.add(zip(new_ids, stored["documents"], metadatas))
+    return new_ids
+
+
+def _should_update(
+    existing: SourceChunks, content_hash: str | None, mtime: float, regenerate: bool
+) -> bool:
+    if regenerate or not existing.ids:
+        return True
+    old_hash = existing.content_hash
+    if old_hash and content_hash:
+        # Content decides; a copy or touch that keeps the bytes is not re-indexed.
+        log_event("index_hash_check", old_hash=old_hash, current_hash=content_hash)
+        return old_hash != content_hash
+    # Chunks indexed before content hashes were stored.
+    old_mtime = existing.mtime
+    log_event("index_mtime_check", old_mtime=old_mtime, current_mtime=mtime)
+    return old_mtime != mtime
 
-    if existing["ids"]:
-        vector_store.delete(ids=existing["ids"])
 
-    docs = load_file(path)
+@dataclass
+class _FileJob:
+    path: Path
+    source: str
+    content_hash: str | None
+    mtime: float
+    # Ids of the chunks stored for the previous version of the file.
+    existing_ids: frozenset[str] = frozenset()
+    # Filled by the pipeline: ids of all chunks of the file, or the failure.
+    ids: list[str] = field(default_factory=list)
+    error: str | None = None
+    # Chunks the file already had, refreshed once its new chunks are written.
+    unchanged: list[tuple[str, Document]] = field(default_factory=list)
+    # New chunks of the file not written (or dropped) yet.
+    unwritten: int = 0
+    # Ids that should have been deleted when the file finished but could not be.
+    leftover_ids: list[str] = field(default_factory=list)
+
+
+@dataclass
+class _PipelineStats:
+    chunk_count: int = 0
+    unchanged_chunks: int = 0
+    cache_hits: int = 0
+    batch_sizes: list[int] = field(default_factory=list)
+    duration_s: float = 0.0
+
+    def as_log(self) -> dict[str, float | int]:
+        return {
+            "chunk_count": self.chunk_count,
+            "chunks_per_s": (
+                self.chunk_count / self.duration_s if self.duration_s else 0.0
+            ),
+            "unchanged_chunks": self.unchanged_chunks,
+            "embed_cache_hits": self.cache_hits,
+            "embedded_chunks": sum(self.batch_sizes),
+            "embed_batch_count": len(self.batch_sizes),
+            "embed_batch_size_avg": (
+                sum(self.batch_sizes) / len(self.batch_sizes)
+                if self.batch_sizes
+                else 0.0
+            ),
+            "embed_batch_size_max": max(self.batch_sizes, default=0),
+        }
+
+
+def _chunk_ids(source: str, digests: list[str]) -> list[str]:
+    """
+    Derive stable chunk ids from the source and each chunk's content hash, so an
+    edited file keeps the ids of its unchanged chunks. Repeated chunks within a
+    file are told apart by their occurrence.
+    """
+    seen: dict[str, int] = {}
+    ids = []
+    for digest in digests:
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        key = f"{source}\x00{digest}\x00{occurrence}"
+        ids.append(hashlib.sha256(key.encode("utf-8")).hexdigest())
+    return ids
+
 
-    # Skip files that yield no content
+def _prepare_file(splitter, job: _FileJob) -> list[Document]:
+    """
+    Parse and split one file into chunks carrying its source metadata.
+    Returns no chunks when the file yields no content.
+    """
+    file_start = time.perf_counter()
+    docs = load_file(job.path)
     if not docs or all(not d.page_content.strip() for d in docs):
-        return False
+        return []
 
-    split_start = time.perf_counter()
     splits = splitter.split_documents(docs)
-    split_duration = time.perf_counter() - split_start
     for d in splits:
-        d.metadata.update({"source": source, "mtime": mtime})
-
-    filtered_splits = filter_complex_metadata(splits)
-    embed_start = time.perf_counter()
-    vector_store.add_documents(filtered_splits)
-    embed_duration = time.perf_counter() - embed_start
-
+        d.metadata.update({"source": job.source, "mtime": job.mtime})
+        if job.content_hash:
+            d.metadata["content_hash"] = job.content_hash
+    chunks = filter_complex_metadata(splits)
     log_event(
         "index_file",
         duration_s=time.perf_counter() - file_start,
-        source=source,
-        chunk_count=len(filtered_splits),
-        chunking_s=split_duration,
-        embedding_s=embed_duration,
+        source=job.source,
+        chunk_count=len(chunks),
     )
-    return True
+    return chunks
+
+
+def _iter_prepared(pool: ThreadPoolExecutor, splitter, jobs: list[_FileJob]):
+    # Keep a bounded window of files parsing ahead of the embedding stage.
+    window = max(1, settings.INDEX_PARSE_CONCURRENCY) * 2
+    pending: deque = deque()
+    remaining = iter(jobs)
+
+    def submit_next() -> None:
+        job = next(remaining, None)
+        if job is not None:
+            pending.append(
+                (job, pool.submit(copy_context().run, _prepare_file, splitter, job))
+            )
+
+    for _ in range(window):
+        submit_next()
+    while pending:
+        job, future = pending.popleft()
+        submit_next()
+        try:
+            yield job, future.result()
+        except Exception as exc:
+            job.error = str(exc)
+            log_event("index_error", source=job.source, error=job.error)
 
 
-def _delete_removed_sources(vector_store, current_sources: set[str]) -> set[str]:
-    # After indexing, remove any stored chunks whose source file no longer exists.
-    existing_all = vector_store.get(include=["metadatas"])
-    ids_to_delete: list[str] = []
+def _embed_batch(
+    embeddings, texts: list[str], digests: list[str], cache: EmbeddingCache | None
+) -> list[list[float]]:
+    vectors = get_limiter(embeddings).call_sync(
+        lambda: embeddings.embed_documents(texts)
+    )
+    if cache is not None:
+        cache.update_many(embedding_model_name(embeddings), dict(zip(digests, vectors)))
+    return vectors
+
+
+def _index_files(
+    vector_store,
+    lexical: LexicalIndex,
+    splitter,
+    jobs: list[_FileJob],
+    stats: _PipelineStats,
+    regenerate: bool = False,
+) -> None:
+    """
+    Parse and split files in worker threads, embed their chunks in batches that
+    span files with several batches in flight, and write embedded chunks to the
+    store and the lexical index in groups. Sets each job's chunk ids, or its error.
+    Chunks a file already had are only given fresh metadata, and vectors of known
+    chunk contents come from the embedding cache; only the rest are embedded.
+    As soon as all new chunks of a file are stored, the ids it no longer has are
+    deleted; a failed file instead loses the chunks written for it.
+    """
+    start = time.perf_counter()
+    embeddings = vector_store.embeddings
+    collection = chroma_collection(vector_store)
+    cache = get_embedding_cache()
+    model = embedding_model_name(embeddings)
+    batch: list[tuple[_FileJob, str, str, Document]] = []
+    batch_tokens = 0
+    in_flight: dict[Future, list[tuple[_FileJob, str, str, Document]]] = {}
+    to_write: list[tuple[_FileJob, str, Document, list[float]]] = []
+
+    def fail(job: _FileJob, exc: BaseException) -> None:
+        if job.error is None:
+            job.error = str(exc)
+            log_event("index_error", source=job.source, error=job.error)
+
+    def finish(job: _FileJob) -> None:
+        # All new chunks of the file are stored (or dropped): refresh the ones it
+        # kept and delete the ids it no longer has, before moving on.
+        current_ids = set(job.ids)
+        if job.error is None:
+            try:
+                _update_metadata(collection, lexical, job.unchanged)
+            except Exception as exc:
+                fail(job, exc)
+        if job.error is None:
+            stale = [i for i in job.existing_ids if i not in current_ids]
+        else:
+            # The previous version of the file stays indexed.
+            stale = [i for i in job.ids if i not in job.existing_ids]
+        job.unchanged = []
+        try:
+            _delete_ids(vector_store, lexical, stale)
+        except Exception as exc:
+            log_event("index_error", source=job.source, error=str(exc))
+            job.leftover_ids = stale
+
+    def written(jobs) -> None:
+        for job in jobs:
+            job.unwritten -= 1
+            if job.unwritten == 0:
+                finish(job)
+
+    def flush_writes() -> None:
+        if not to_write:
+            return
+        try:
+            collection.upsert(
+                ids=[doc_id for _, doc_id, _, _ in to_write],
+                embeddings=[vector for _, _, _, vector in to_write],
+                documents=[doc.page_content for _, _, doc, _ in to_write],
+                metadatas=[doc.metadata for _, _, doc, _ in to_write],
+            )
+            lexical.add(
+                (doc_id, doc.page_content, doc.metadata)
+                for _, doc_id, doc, _ in to_write
+            )
+        except Exception as exc:
+            for job, _, _, _ in to_write:
+                fail(job, exc)
+        jobs = [job for job, _, _, _ in to_write]
+        to_write.clear()
+        written(jobs)
+
+    def collect(done) -> None:
+        for future in done:
+            items = in_flight.pop(future)
+            try:
+                vectors = future.result()
+            except Exception as exc:
+                for job, _, _, _ in items:
+                    fail(job, exc)
+                written(job for job, _, _, _ in items)
+                continue
+            to_write.extend(
+                (job, doc_id, doc, vector)
+                for (job, doc_id, _, doc), vector in zip(items, vectors)
+            )
+        if len(to_write) >= settings.INDEX_WRITE_BATCH_SIZE:
+            flush_writes()
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, settings.INDEX_PARSE_CONCURRENCY),
+        thread_name_prefix="index-parse",
+    ) as parse_pool, ThreadPoolExecutor(
+        max_workers=max(1, settings.INDEX_EMBED_CONCURRENCY),
+        thread_name_prefix="index-embed",
+    ) as embed_pool:
+
+        def submit_batch() -> None:
+            nonlocal batch, batch_tokens
+            if not batch:
+                return
+            while len(in_flight) >= max(1, settings.INDEX_EMBED_CONCURRENCY):
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            future = embed_pool.submit(
+                copy_context().run,
+                _embed_batch,
+                embeddings,
+                [doc.page_content for _, _, _, doc in batch],
+                [digest for _, _, digest, _ in batch],
+                cache,
+            )
+            in_flight[future] = batch
+            stats.batch_sizes.append(len(batch))
+            batch, batch_tokens = [], 0
+
+        for job, chunks in _iter_prepared(parse_pool, splitter, jobs):
+            stats.chunk_count += len(chunks)
+            digests = [chunk_hash(doc.page_content) for doc in chunks]
+            job.ids = _chunk_ids(job.source, digests)
+            fresh = []
+            for doc_id, digest, doc in zip(job.ids, digests, chunks):
+                if doc_id in job.existing_ids and not regenerate:
+                    job.unchanged.append((doc_id, doc))
+                else:
+                    fresh.append((job, doc_id, digest, doc))
+            stats.unchanged_chunks += len(chunks) - len(fresh)
+            job.unwritten = len(fresh)
+            if not fresh:
+                finish(job)
+            cached = (
+                cache.lookup_many(model, {digest for _, _, digest, _ in fresh})
+                if cache is not None and fresh and not regenerate
+                else {}
+            )
+            for item in fresh:
+                digest, doc = item[2], item[3]
+                if digest in cached:
+                    stats.cache_hits += 1
+                    to_write.append((job, item[1], doc, cached[digest]))
+                    continue
+                tokens = estimate_tokens(doc.page_content)
+                if batch and (
+                    len(batch) >= settings.INDEX_EMBED_BATCH_SIZE
+                    or batch_tokens + tokens > settings.INDEX_EMBED_BATCH_TOKENS
+                ):
+                    submit_batch()
+                batch.append(item)
+                batch_tokens += tokens
+            if len(to_write) >= settings.INDEX_WRITE_BATCH_SIZE:
+                flush_writes()
+        submit_batch()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+        flush_writes()
+    stats.duration_s += time.perf_counter() - start
+
+
+def _update_metadata(
+    collection, lexical: LexicalIndex, chunks: list[tuple[str, Document]]
+) -> None:
+    # Unchanged chunks keep their embeddings; only their metadata (mtime, content
+    # hash, start index) is refreshed.
+    for start in range(0, len(chunks), _DELETE_BATCH):
+        group = chunks[start : start + _DELETE_BATCH]
+        collection.update(
+            ids=[doc_id for doc_id, _ in group],
+            metadatas=[doc.metadata for _, doc in group],
+        )
+        lexical.update_metadata((doc_id, doc.metadata) for doc_id, doc in group)
+
+
+def _delete_ids(vector_store, lexical: LexicalIndex, ids: list[str]) -> None:
+    for start in range(0, len(ids), _DELETE_BATCH):
+        batch = ids[start : start + _DELETE_BATCH]
+        vector_store.delete(ids=batch)
+        lexical.delete(batch)
+
+
+def _removed_source_ids(
+    source_index: _SourceIndex, gone_sources
+) -> tuple[list[str], set[str]]:
+    # Stored chunks whose source file no longer exists.
+    ids: list[str] = []
     deleted_sources: set[str] = set()
-    for doc_id, metadata in zip(
-        existing_all.get("ids", []), existing_all.get("metadatas", [])
-    ):
-        if not metadata:
-            continue
-        source = str(metadata.get("source", ""))
-        if source and source not in current_sources:
-            ids_to_delete.append(doc_id)
+    for source in gone_sources:
+        existing = source_index.existing(source)
+        if existing.ids:
+            ids.extend(existing.ids)
             deleted_sources.add(source)
-
-    if ids_to_delete:
-        vector_store.delete(ids=ids_to_delete)
-
-    return deleted_sources
+    return ids, deleted_sources
 
 
 def index_folder(folder: Path, regenerate: bool = False) -> dict[str, int]:
@@ -94,56 +570,175 @@ def index_folder(folder: Path, regenerate: bool = False) -> dict[str, int]:
     Args:
         folder (Path): The folder to index.
         regenerate (bool): If True, reprocess all files even if they haven't changed.
+    When the folder is watched, only files in its change journal are visited.
     Returns:
-        dict[str, int]: A dictionary with counts of added, updated, skipped, and errors.
+        dict[str, int]: A dictionary with counts of added, updated, moved, deleted,
+        skipped, and errors. Moved and copied files reuse the stored chunks of
+        identical content without parsing or embedding.
     """
+    with vector_store_lease(folder) as vector_store:
+        return _index_folder(folder, vector_store, regenerate)
+
+
+def _index_folder(folder: Path, vector_store, regenerate: bool) -> dict[str, int]:
     start_time = time.perf_counter()
-    vector_store = get_vector_store(folder)
     splitter = get_splitter()
 
     added = 0
     updated = 0
+    moved = 0
     skipped = 0
     errors = 0
 
-    paths, current_sources = _collect_paths(folder)
-
-    for path in paths:
-        source = str(path.resolve())
-        mtime = path.stat().st_mtime
-        log_event("index_start", source=source)
-        existing = _get_existing_for_source(vector_store, source)
-        if not _should_update(existing, mtime, regenerate):
-            log_event("index_skip", source=source)
-            skipped += 1
-            continue
-        log_event("index_update", source=source)
-        try:
-            indexed = _upsert_file(vector_store, splitter, path, existing)
-        except Exception as exc:
-            errors += 1
-            log_event("index_error", source=source, error=str(exc))
-            continue
-
-        if not indexed:
-            skipped += 1
-            continue
-
-        if existing["ids"]:
-            updated += 1
-        else:
-            added += 1
-
-    deleted_sources = _delete_removed_sources(vector_store, current_sources)
+    changes = None if regenerate else pending_changes(folder, INDEX_CONSUMER)
+    if changes is not None:
+        seq = changes.seq
+        paths, removed_sources, hashes = _collect_changed_paths(changes)
+
+        def is_gone(source: str) -> bool:
+            return source in removed_sources or not Path(source).exists()
+    else:
+        seq = journal_seq(folder)
+        paths, current_sources, hashes = _collect_paths(folder)
+
+        def is_gone(source: str) -> bool:
+            return source not in current_sources
+
+    db_dir = folder / VDR_DB_DIR
+    db_dir.mkdir(parents=True, exist_ok=True)
+    source_index = _SourceIndex(vector_store, db_dir / SAVED_INDEX_DB)
+    lexical = LexicalIndex(lexical_db_path(folder))
+    lexical.sync(vector_store)
+    # Ids a finished file could not delete, retried with the removed sources.
+    leftover_ids: list[str] = []
+
+    stats = _PipelineStats()
+    pending = paths
+    while pending:
+        jobs: list[tuple[_FileJob, SourceChunks]] = []
+        # Files whose content is already being embedded in this pass are decided
+        # in the next one, where they can copy the freshly stored chunks.
+        deferred: list[Path] = []
+        embedding_hashes: set[str] = set()
+        for path in pending:
+            source = str(path.resolve())
+            mtime = path.stat().st_mtime
+            content_hash = hashes.get(str(path))
+            log_event("index_start", source=source)
+            existing = source_index.existing(source)
+            if not _should_update(existing, content_hash, mtime, regenerate):
+                log_event("index_skip", source=source)
+                skipped += 1
+                continue
+            if not existing.ids and content_hash and not regenerate:
+                if content_hash in embedding_hashes:
+                    deferred.append(path)
+                    continue
+                # Identical content already indexed: carry its chunks over instead
+                # of parsing and embedding the file again.
+                by_source = source_index.sources_with_content(content_hash)
+                gone = [s for s in by_source if is_gone(s)]
+                try:
+                    if gone:
+                        source_index.record(
+                            source,
+                            _move_source(
+                                vector_store, lexical, by_source[gone[0]], source, mtime
+                            ),
+                            content_hash,
+                            mtime,
+                        )
+                        source_index.forget(gone[0])
+                        log_event(
+                            "index_move", source=source, previous_source=gone[0]
+                        )
+                        moved += 1
+                        continue
+                    if by_source:
+                        copied_from = next(iter(by_source))
+                        source_index.record(
+                            source,
+                            _copy_source(
+                                vector_store,
+                                lexical,
+                                by_source[copied_from],
+                                source,
+                                mtime,
+                            ),
+                            content_hash,
+                            mtime,
+                        )
+                        log_event(
+                            "index_copy", source=source, copied_from=copied_from
+                        )
+                        added += 1
+                        continue
+                except Exception as exc:
+                    log_event("index_error", source=source, error=str(exc))
+            log_event("index_update", source=source)
+            if content_hash:
+                embedding_hashes.add(content_hash)
+            jobs.append(
+                (
+                    _FileJob(
+                        path, source, content_hash, mtime, frozenset(existing.ids)
+                    ),
+                    existing,
+                )
+            )
+
+        _index_files(
+            vector_store, lexical, splitter, [job for job, _ in jobs], stats, regenerate
+        )
+        for job, existing in jobs:
+            leftover_ids.extend(job.leftover_ids)
+            if job.error is not None:
+                # The previous version of the file stays indexed.
+                errors += 1
+                continue
+            if not job.ids:
+                # The file no longer yields content; its old chunks are deleted.
+                source_index.forget(job.source)
+                skipped += 1
+                continue
+            source_index.record(job.source, job.ids, job.content_hash, job.mtime)
+            if existing.ids:
+                updated += 1
+            else:
+                added += 1
+        pending = deferred
+
+    if changes is not None:
+        gone_sources = removed_sources
+    else:
+        gone_sources = [s for s in source_index.by_source if s and is_gone(s)]
+    removed_ids, deleted_sources = _removed_source_ids(source_index, gone_sources)
+    _delete_ids(vector_store, lexical, leftover_ids + removed_ids)
+    for source in deleted_sources:
+        source_index.forget(source)
+    source_index.save()
+    deleted = len(deleted_sources)
+    if added or updated or moved or deleted or errors:
+        # Cached answers are keyed on the version, so they expire with this bump.
+        index_version = bump_index_version(source_index.db_path)
+        clear_query_cache(folder)
+    else:
+        index_version = load_index_version(source_index.db_path)
+    if not errors:
+        # Failed files stay in the journal so the next run retries them.
+        acknowledge(folder, INDEX_CONSUMER, seq)
 
     log_event(
         "index_folder",
         duration_s=time.perf_counter() - start_time,
         added=added,
         updated=updated,
-        deleted=len(deleted_sources),
+        moved=moved,
+        deleted=deleted,
         skipped=skipped,
         errors=errors,
+        index_version=index_version,
+        **stats.as_log(),
     )
 
     # ToDO: When generate the DB, and remove the DB folder manually, the next time,
@@ -151,7 +746,8 @@ def index_folder(folder: Path, regenerate: bool = False) -> dict[str, int]:
     return {
         "added": added,
         "updated": updated,
-        "deleted": len(deleted_sources),
+        "moved": moved,
+        "deleted": deleted,
         "skipped": skipped,
         "errors": errors,
     }
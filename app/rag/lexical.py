@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Iterable, Union
+
+from langchain_core.documents import Document
+
+from app.cache.lexical import (
+    add_chunks,
+    clear_chunks,
+    count_chunks,
+    delete_chunks,
+    search_chunks,
+    update_metadata,
+)
+from app.cache.utils import SAVED_LEXICAL_DB
+from app.core.logging import log_event
+from app.rag.vector_store import chroma_collection, persist_directory_for
+
+_WORD = re.compile(r"[^\W_]+")
+# Scripts written without spaces; runs of them are indexed as character bigrams.
+_CJK = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+# Longer queries are cut to this many distinct terms.
+_MAX_QUERY_TERMS = 64
+# Constant of reciprocal rank fusion; dampens the weight of the top ranks.
+RRF_K = 60
+_READ_BATCH = 5000
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split text into lowercase, NFKC-normalized words; CJK runs become bigrams.
+    """
+    tokens: list[str] = []
+    for word in _WORD.findall(unicodedata.normalize("NFKC", text).lower()):
+        position = 0
+        for run in _CJK.finditer(word):
+            if run.start() > position:
+                tokens.append(word[position : run.start()])
+            chars = run.group()
+            if len(chars) == 1:
+                tokens.append(chars)
+            else:
+                tokens.extend(chars[i : i + 2] for i in range(len(chars) - 1))
+            position = run.end()
+        if position < len(word):
+            tokens.append(word[position:])
+    return tokens
+
+
+def chunk_terms(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def lexical_db_path(folder: Union[str, Path, None] = None) -> Path:
+    # Kept inside the Chroma persist directory so both indexes live and go together.
+    return Path(persist_directory_for(folder)) / SAVED_LEXICAL_DB
+
+
+class LexicalIndex:
+    """
+    On-disk BM25 index of the chunks of one vector store, kept in step with it
+    by the indexer.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+
+    def add(self, chunks: Iterable[tuple[str, str, dict]]) -> None:
+        # Chunks given as (id, content, metadata).
+        add_chunks(
+            self.db_path,
+            (
+                (doc_id, chunk_terms(content), content, metadata)
+                for doc_id, content, metadata in chunks
+            ),
+        )
+
+    def update_metadata(self, updates: Iterable[tuple[str, dict]]) -> None:
+        update_metadata(self.db_path, updates)
+
+    def delete(self, doc_ids: Iterable[str]) -> None:
+        delete_chunks(self.db_path, doc_ids)
+
+    def sync(self, vector_store) -> None:
+        """
+        Rebuild the index from the collection when their chunk counts differ,
+        e.g. for collections indexed before the lexical index existed.
+        """
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        expected = chroma_collection(vector_store).count()
+        if count_chunks(self.db_path) == expected:
+            return
+        start = time.perf_counter()
+        clear_chunks(self.db_path)
+        offset = 0
+        while True:
+            stored = vector_store.get(
+                include=["documents", "metadatas"], limit=_READ_BATCH, offset=offset
+            )
+            self.add(
+                (doc_id, content or "", metadata or {})
+                for doc_id, content, metadata in zip(
+                    stored["ids"], stored["documents"], stored["metadatas"]
+                )
+            )
+            if len(stored["ids"]) < _READ_BATCH:
+                break
+            offset += _READ_BATCH
+        log_event(
+            "lexical_rebuild",
+            duration_s=time.perf_counter() - start,
+            chunk_count=expected,
+        )
+
+    def search(self, query: str, k: int) -> list[Document]:
+        terms = list(dict.fromkeys(tokenize(query)))[:_MAX_QUERY_TERMS]
+        return [
+            Document(id=doc_id, page_content=content, metadata=metadata)
+            for doc_id, content, metadata, _ in search_chunks(self.db_path, terms, k)
+        ]
+
+
+def reciprocal_rank_fusion(
+    result_lists: Iterable[list[Document]], k: int
+) -> list[Document]:
+    """
+    Merge ranked lists: each document scores the sum of 1 / (RRF_K + rank) over
+    the lists it appears in; the k best are returned.
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank)
+            docs.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+    return [docs[key] for key in ranked[:k]]
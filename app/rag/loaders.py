@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import hashlib
 from pathlib import Path
 from typing import Iterable, List
 
@@ -8,15 +7,8 @@ from langchain_community.document_loaders import PyMuPDFLoader, TextLoader
 from langchain_core.documents import Document
 
 from app.cache.utils import VDR_DB_DIR
-from app.services.file_loader import load_file as load_office_file
-
-
-def file_hash(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+from app.services.manifest import manifest_files, scan_manifest
+from app.services.parse_pool import load_file_pooled
 
 
 def _load_txt_file(path: Path) -> List[Document]:
@@ -34,18 +26,21 @@ def load_file(path: Path) -> List[Document]:
     # if suffix == ".pdf":
     #     return _load_pdf_file(path)
     try:
-        return load_office_file(str(path))
+        return load_file_pooled(str(path))
     except ValueError:
         return []
 
 
+SUPPORTED_SUFFIXES = {".pdf", ".pptx", ".docx", ".xls", ".xlsx"}
+
+
+def is_supported_file(path: Path) -> bool:
+    return path.suffix.lower() in SUPPORTED_SUFFIXES and VDR_DB_DIR not in path.parts
+
+
 def iter_supported_files(folder: Path) -> Iterable[Path]:
-    supported = {".pdf", ".pptx", ".docx", ".xls", ".xlsx"}
-    for path in folder.rglob("*"):
-        if not path.is_file():
-            continue
-        if VDR_DB_DIR in path.parts:
-            continue
-        if path.suffix.lower() not in supported:
+    for entry in manifest_files(scan_manifest(folder)):
+        path = Path(entry.path)
+        if path.suffix.lower() not in SUPPORTED_SUFFIXES:
             continue
         yield path
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+from typing import Any, Union
+
+from app.cache.index_sources import load_index_version
+from app.cache.query_results import (
+    clear_query_results,
+    load_query_result,
+    save_query_result,
+)
+from app.cache.utils import SAVED_INDEX_DB, SAVED_QUERY_DB, VDR_DB_DIR
+from app.core.config import settings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Fold the variations that do not change a question's meaning: Unicode form,
+    case, surrounding and repeated whitespace, and trailing question marks.
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip("?？ ")
+
+
+def query_cache_key(question: str, **params: Any) -> str:
+    payload = json.dumps(
+        {"question": normalize_question(question), **params}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _db_dir(folder: Union[str, Path]) -> Path:
+    return Path(folder) / VDR_DB_DIR
+
+
+def lookup_query_result(
+    folder: Union[str, Path], key: str
+) -> tuple[int | None, dict[str, Any] | None]:
+    """
+    Return (index version, cached result) for the folder. The version is None
+    when the folder was never indexed or caching is disabled; results are only
+    returned for the current version.
+    """
+    if not settings.RAG_QUERY_CACHE_ENABLED:
+        return None, None
+    db_dir = _db_dir(folder)
+    version = load_index_version(db_dir / SAVED_INDEX_DB)
+    if version is None:
+        return None, None
+    return version, load_query_result(db_dir / SAVED_QUERY_DB, key, version)
+
+
+def store_query_result(
+    folder: Union[str, Path], key: str, version: int, value: dict[str, Any]
+) -> None:
+    save_query_result(
+        _db_dir(folder) / SAVED_QUERY_DB,
+        key,
+        version,
+        value,
+        settings.RAG_QUERY_CACHE_MAX_ENTRIES,
+    )
+
+
+def clear_query_cache(folder: Union[str, Path]) -> None:
+    clear_query_results(_db_dir(folder) / SAVED_QUERY_DB)
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 
+from chromadb import Collection
 from langchain_chroma import Chroma
 from langchain_openai import AzureOpenAIEmbeddings, OpenAIEmbeddings
 
+from app.core.config import settings
+from app.core.logging import log_event
 from app.llm.models import AZURE_OPENAI_ENDPOINT, AZURE_TOKEN_PROVIDER
 from app.rag.config import COLLECTION, DB_DIR, OPENAI_EMBEDDINGS_MODEL, VDR_DB_DIR
 
@@ -17,23 +24,247 @@ def initialize_embeddings() -> OpenAIEmbeddings | AzureOpenAIEmbeddings:
             azure_endpoint=AZURE_OPENAI_ENDPOINT,
             # api_version=AZURE_OPENAI_API_VERSION,
             azure_ad_token_provider=AZURE_TOKEN_PROVIDER,
+            # Throttled calls are retried by the concurrency limiter.
+            max_retries=0,
         )
 
-    return OpenAIEmbeddings(model=OPENAI_EMBEDDINGS_MODEL)
+    return OpenAIEmbeddings(model=OPENAI_EMBEDDINGS_MODEL, max_retries=0)
 
 
-def get_vector_store(folder: Union[str, Path, None] = None) -> Chroma:
-    embeddings = initialize_embeddings()
+_EMBEDDINGS: OpenAIEmbeddings | AzureOpenAIEmbeddings | None = None
+_EMBEDDINGS_LOCK = threading.Lock()
+
+
+def get_embeddings() -> OpenAIEmbeddings | AzureOpenAIEmbeddings:
+    """
+    Return the process-wide embeddings client; every vector store shares it and
+    its HTTP connection pool.
+    """
+    global _EMBEDDINGS
+    with _EMBEDDINGS_LOCK:
+        if _EMBEDDINGS is None:
+            _EMBEDDINGS = initialize_embeddings()
+        return _EMBEDDINGS
+
+
+def persist_directory_for(folder: Union[str, Path, None] = None) -> str:
     if folder is None:
-        persist_directory = DB_DIR
-    else:
-        db_path = Path(DB_DIR)
-        if db_path.is_absolute():
-            persist_directory = str(db_path)
-        else:
-            persist_directory = str(Path(folder) / VDR_DB_DIR / DB_DIR)
-    return Chroma(
-        collection_name=COLLECTION,
-        embedding_function=embeddings,
-        persist_directory=persist_directory,
+        return DB_DIR
+    db_path = Path(DB_DIR)
+    if db_path.is_absolute():
+        return str(db_path)
+    return str(Path(folder) / VDR_DB_DIR / DB_DIR)
+
+
+def _registry_key(persist_directory: str) -> str:
+    # Relative, dotted and symlinked spellings of a directory share one handle.
+    return str(Path(persist_directory).resolve())
+
+
+class _StoreEntry:
+    __slots__ = (
+        "persist_directory",
+        "store",
+        "error",
+        "ready",
+        "last_used",
+        "leases",
     )
+
+    def __init__(self, persist_directory: str):
+        self.persist_directory = persist_directory
+        # Set by the caller that opens the handle; others wait on ready.
+        self.store: Chroma | None = None
+        self.error: BaseException | None = None
+        self.ready = threading.Event()
+        self.last_used = time.monotonic()
+        # The opening caller holds a lease so the entry cannot be evicted meanwhile.
+        self.leases = 1
+
+
+class VectorStoreRegistry:
+    """
+    Keeps one open Chroma handle per persist directory in a bounded LRU map,
+    keyed on the resolved path. Handles are opened on first use, and closed when
+    evicted or idle for idle_close_s, unless a lease holds them open. The map is
+    guarded by a lock; a handle is opened outside of it while concurrent callers
+    for the same directory wait on its entry. Hits and misses are counted and logged.
+    """
+
+    def __init__(self, max_open: int, idle_close_s: float):
+        self.max_open = max_open
+        self.idle_close_s = idle_close_s
+        self._entries: OrderedDict[str, _StoreEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+
+    def _checkout(self, persist_directory: str, lease: bool) -> Chroma:
+        with self._lock:
+            entry = self._entries.get(persist_directory)
+            hit = entry is not None
+            if hit:
+                self.hits += 1
+                self._entries.move_to_end(persist_directory)
+                if lease:
+                    entry.leases += 1
+            else:
+                self.misses += 1
+                entry = _StoreEntry(persist_directory)
+                self._entries[persist_directory] = entry
+            entry.last_used = time.monotonic()
+        log_event(
+            "vector_store_registry",
+            persist_directory=persist_directory,
+            hit=hit,
+            hits=self.hits,
+            misses=self.misses,
+        )
+        if hit:
+            entry.ready.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.store
+        return self._open(entry, lease)
+
+    def _open(self, entry: _StoreEntry, lease: bool) -> Chroma:
+        start = time.perf_counter()
+        try:
+            entry.store = Chroma(
+                collection_name=COLLECTION,
+                embedding_function=get_embeddings(),
+                persist_directory=entry.persist_directory,
+            )
+        except BaseException as exc:
+            entry.error = exc
+            with self._lock:
+                if self._entries.get(entry.persist_directory) is entry:
+                    del self._entries[entry.persist_directory]
+            entry.ready.set()
+            raise
+        entry.ready.set()
+        with self._lock:
+            if not lease:
+                entry.leases -= 1
+            log_event(
+                "vector_store_open",
+                duration_s=time.perf_counter() - start,
+                persist_directory=entry.persist_directory,
+                open_count=len(self._entries),
+            )
+            closing = self._evict_locked()
+            self._start_sweeper_locked()
+        self._close(closing)
+        return entry.store
+
+    def get(self, persist_directory: str) -> Chroma:
+        return self._checkout(_registry_key(persist_directory), lease=False)
+
+    @contextmanager
+    def lease(self, persist_directory: str) -> Iterator[Chroma]:
+        """
+        Yield the handle for persist_directory, keeping it open while in use.
+        """
+        persist_directory = _registry_key(persist_directory)
+        store = self._checkout(persist_directory, lease=True)
+        try:
+            yield store
+        finally:
+            with self._lock:
+                entry = self._entries.get(persist_directory)
+                if entry is not None and entry.store is store:
+                    entry.leases -= 1
+                    entry.last_used = time.monotonic()
+
+    def _evict_locked(self) -> list[_StoreEntry]:
+        evicted = []
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_open:
+                break
+            if self._entries[key].leases == 0:
+                evicted.append(self._entries.pop(key))
+        return evicted
+
+    def close_idle(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key
+                for key, entry in self._entries.items()
+                if entry.leases == 0 and now - entry.last_used >= self.idle_close_s
+            ]
+            closing = [self._entries.pop(key) for key in idle]
+        self._close(closing)
+
+    def _start_sweeper_locked(self) -> None:
+        if self._sweeper is not None or self.idle_close_s <= 0:
+            return
+
+        def sweep() -> None:
+            while not self._stop.wait(max(self.idle_close_s / 2, 1.0)):
+                self.close_idle()
+
+        self._sweeper = threading.Thread(
+            target=sweep, name="vector-store-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    @staticmethod
+    def _close(entries: list[_StoreEntry]) -> None:
+        for entry in entries:
+            client = getattr(entry.store, "_client", None)
+            try:
+                # Releases the client's reference to Chroma's shared system; the
+                # system (and its SQLite files) stops with the last reference.
+                if client is not None and hasattr(client, "close"):
+                    client.close()
+            except Exception as exc:
+                log_event("vector_store_close_error", error=str(exc))
+            log_event(
+                "vector_store_close",
+                persist_directory=entry.persist_directory,
+            )
+
+    def close_all(self) -> None:
+        self._stop.set()
+        with self._lock:
+            closing = list(self._entries.values())
+            self._entries.clear()
+            sweeper, self._sweeper = self._sweeper, None
+        self._close(closing)
+        if sweeper is not None:
+            sweeper.join()
+        self._stop.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "open": list(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "max_open": self.max_open,
+            }
+
+
+vector_store_registry = VectorStoreRegistry(
+    settings.VECTOR_STORE_MAX_OPEN, settings.VECTOR_STORE_IDLE_CLOSE_S
+)
+
+
+def chroma_collection(vector_store: Chroma) -> Collection:
+    """
+    Return the chromadb collection behind a vector store, for the id-level reads
+    and writes the LangChain wrapper does not offer. langchain_chroma only exposes
+    it as a private attribute; keep every access to it here.
+    """
+    return vector_store._collection
+
+
+@contextmanager
+def vector_store_lease(folder: Union[str, Path, None] = None) -> Iterator[Chroma]:
+    with vector_store_registry.lease(persist_directory_for(folder)) as store:
+        yield store
@@ -1,9 +1,13 @@
+from typing import Literal
+
 from pydantic import BaseModel
 from pydantic.alias_generators import to_camel
 
 
 class DiffRequest(BaseModel):
     folder_path: str
+    # "fast" stops at the first difference (file edits included); "full" lists every changed path.
+    mode: Literal["fast", "full"] = "fast"
 
     class Config:
         alias_generator = to_camel
@@ -12,3 +16,6 @@ class DiffRequest(BaseModel):
 
 class DiffResponse(BaseModel):
     changed: bool
+    added: list[str] = []
+    removed: list[str] = []
+    modified: list[str] = []
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 from pydantic.alias_generators import to_camel
 
@@ -15,6 +17,7 @@ class IndexFolderResponse(BaseModel):
     folder_path: str
     added: int
     updated: int
+    moved: int = 0
     skipped: int
     deleted: int
     duration: float
@@ -28,6 +31,10 @@ class RagQueryRequest(BaseModel):
     question: str
     folder_path: str
     top_k: int = 4
+    # "direct": retrieve then one generation call; "agent": tool-calling agent
+    mode: Literal["agent", "direct"] = "agent"
+    # "hybrid": vector and BM25 rankings merged; "lexical" needs no embedding call
+    retrieval: Literal["hybrid", "vector", "lexical"] = "hybrid"
 
     class Config:
         alias_generator = to_camel
@@ -48,6 +55,31 @@ class RagQueryResponse(BaseModel):
     answer: str
     sources: list[RagSource]
     duration: float
+    mode: str = "agent"
+    timings: dict[str, float] = {}
+    # Served from the result cache of the folder's current index version
+    cached: bool = False
+
+    class Config:
+        alias_generator = to_camel
+        populate_by_name = True
+
+
+class RagQueryTrailer(BaseModel):
+    answer: str
+    duration: float
+    timings: dict[str, float] = {}
+    cached: bool = False
+
+    class Config:
+        alias_generator = to_camel
+        populate_by_name = True
+
+
+class RagStreamError(BaseModel):
+    # Sent instead of the trailer when retrieval or generation fails mid-stream.
+    stage: str
+    error: str
 
     class Config:
         alias_generator = to_camel
@@ -10,6 +10,8 @@ class SingleSummaryResponse(BaseModel):
     file_type: str
     summary: str
     duration: float
+    tokens_in: int | None = None
+    tokens_out: int | None = None
 
     class Config:
         alias_generator = to_camel
@@ -21,6 +23,17 @@ class MultipleSummariesResponse(BaseModel):
     duration: float
 
 
+class FolderSummaryTrailer(BaseModel):
+    total: int
+    cached: int
+    generated: int
+    duration: float
+
+    class Config:
+        alias_generator = to_camel
+        populate_by_name = True
+
+
 class FilePathRequest(BaseModel):
     file_path: str
 
@@ -1,10 +1,26 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic.alias_generators import to_camel
 
 
 class TreeRequest(BaseModel):
     folder_path: str
     regenerate: bool = False
+    incremental: bool = False
+    # Setting any of these returns a TreePageResponse instead of the full tree.
+    sub_path: str | None = None
+    max_depth: int | None = Field(default=None, ge=1)
+    cursor: str | None = None
+    limit: int | None = Field(default=None, ge=1)
+
+    class Config:
+        alias_generator = to_camel
+        populate_by_name = True
+
+
+class TreePageResponse(BaseModel):
+    # Nodes keep the shape of the full tree, plus child_count for directories.
+    nodes: list[dict]
+    next_cursor: str | None = None
 
     class Config:
         alias_generator = to_camel
@@ -1,57 +1,152 @@
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from app.cache.utils import (
     SAVED_TREE_DB,
     VDR_DB_DIR,
-    get_json_from_cache,
-    is_cache_file,
+    get_many_json_from_cache,
+    is_excluded_name,
 )
+from app.services.manifest import scan_manifest
+from app.services.watcher import TREE_CONSUMER, pending_changes
+
+
+@dataclass
+class FolderDiff:
+    changed: bool = False
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+
+
+def _load_cached_tree(folder_path: Path) -> tuple[list | None, float | None]:
+    db_path = folder_path / VDR_DB_DIR / SAVED_TREE_DB
+    cached = get_many_json_from_cache(db_path, ["tree", "tree_root_mtime"])
+    return cached.get("tree"), cached.get("tree_root_mtime")
+
+
+def _scan_dir(dir_path: Path) -> dict[str, tuple[float, bool]]:
+    """
+    List a directory as path -> (mtime, is_dir), skipping what the manifest walk
+    and the cached tree skip as well.
+    """
+    entries = {}
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if is_excluded_name(entry.name):
+                continue
+            try:
+                entries[entry.path] = (entry.stat().st_mtime, entry.is_dir())
+            except FileNotFoundError:
+                # Removed during the scan, or a dangling symlink.
+                continue
+    return entries
+
+
+def _dir_entries_changed(dir_path: Path, cached_nodes: list) -> bool:
+    """
+    List a directory and compare its entries and their mtimes with the cached nodes.
+    Subdirectories are compared by their own mtime only.
+    """
+    entries = _scan_dir(dir_path)
+    if entries.keys() != {node["file_path"] for node in cached_nodes}:
+        return True
+    for node in cached_nodes:
+        mtime, is_dir = entries[node["file_path"]]
+        if mtime != node["last_modified_time"]:
+            return True
+        if is_dir != (node["children"] is not None):
+            return True
+    return False
+
+
+def _tree_changed(dir_path: Path, cached_nodes: list) -> bool:
+    """
+    List every cached directory and compare its entries, their types and mtimes,
+    stopping at the first difference. File mtimes are compared too: editing a
+    file in place does not change its directory's mtime.
+    """
+    if _dir_entries_changed(dir_path, cached_nodes):
+        return True
+    for node in cached_nodes:
+        if node["children"] is not None and _tree_changed(
+            Path(node["file_path"]), node["children"]
+        ):
+            return True
+    return False
 
 
 def check_diff(folder_path: Path) -> bool:
     """
     Compares the live directory against the cached tree to check for changes.
-    Returns True if there are any new, deleted, or modified files.
+    Returns True as soon as a new, deleted, renamed or modified entry is found.
+
+    This is the fast mode: it stops at the first difference instead of listing
+    them all (see compute_diff).
+    When the folder is watched, the change journal answers without touching the disk.
     """
-    db_path = folder_path / VDR_DB_DIR / SAVED_TREE_DB
-    cached_tree = get_json_from_cache(db_path, "tree")
+    cached_tree, _ = _load_cached_tree(folder_path)
 
     # If there's no cache, there's no "difference" by default.
     if not cached_tree:
         return False
 
-    # Flatten the cached tree into a dictionary for easy lookup.
-    cached_files = {}
-
-    def flatten_tree(nodes):
-        for node in nodes:
-            cached_files[node["file_path"]] = node["last_modified_time"]
-            if node.get("children"):
-                flatten_tree(node["children"])
+    changes = pending_changes(folder_path, TREE_CONSUMER)
+    if changes is not None:
+        return changes.changed
 
-    flatten_tree(cached_tree)
-
-    # Get the current state of files on disk.
-    current_files = {}
     try:
-        for item in folder_path.rglob("*"):
-            if is_cache_file(item.name) or VDR_DB_DIR in item.parts:
-                continue
-            try:
-                current_files[str(item)] = item.stat().st_mtime
-            except FileNotFoundError:
-                continue  # File might have been deleted during iteration.
+        return _tree_changed(folder_path, cached_tree)
     except FileNotFoundError:
-        # If the whole folder is gone, that's a change.
+        # If the whole folder (or a directory of it) is gone, that's a change.
         return True
 
-    # Compare the two sets of files.
-    if set(cached_files.keys()) != set(current_files.keys()):
-        return True  # New or deleted files found.
 
-    # Check for modifications in existing files.
-    for path, mtime in current_files.items():
-        if path in cached_files and cached_files[path] != mtime:
-            return True  # A file was modified.
+def _flatten_tree(nodes: list, flat: dict[str, dict]) -> None:
+    for node in nodes:
+        flat[node["file_path"]] = node
+        if node["children"]:
+            _flatten_tree(node["children"], flat)
 
-    return False
+
+def compute_diff(folder_path: Path) -> FolderDiff:
+    """
+    Compares the live directory against the cached tree and lists every added,
+    removed and modified path, so callers can sync only those.
+    Directory mtime changes are not reported as modifications themselves; their
+    effect shows up as added or removed entries.
+    When the folder is watched, the change journal answers without touching the disk.
+    """
+    cached_tree, _ = _load_cached_tree(folder_path)
+    diff = FolderDiff()
+    if not cached_tree:
+        return diff
+
+    changes = pending_changes(folder_path, TREE_CONSUMER)
+    if changes is not None:
+        return FolderDiff(
+            changed=changes.changed,
+            added=changes.added,
+            removed=changes.removed,
+            modified=changes.modified,
+        )
+
+    cached_nodes: dict[str, dict] = {}
+    _flatten_tree(cached_tree, cached_nodes)
+    current = scan_manifest(folder_path)
+    for path, entry in current.items():
+        node = cached_nodes.get(path)
+        if node is None or entry.is_dir != (node["children"] is not None):
+            diff.added.append(path)
+        elif not entry.is_dir and entry.mtime != node["last_modified_time"]:
+            diff.modified.append(path)
+    for path, node in cached_nodes.items():
+        entry = current.get(path)
+        if entry is None or entry.is_dir != (node["children"] is not None):
+            diff.removed.append(path)
+    diff.added.sort()
+    diff.removed.sort()
+    diff.modified.sort()
+    diff.changed = bool(diff.added or diff.removed or diff.modified)
+    return diff
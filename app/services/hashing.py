@@ -0,0 +1,53 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from app.core.config import settings
+
+# Files at least this large are hashed through a memory map instead of reads.
+_MMAP_THRESHOLD = 64 * 1024 * 1024
+_BUFFER_SIZE = 1024 * 1024
+
+
+def file_hash(path: Path) -> str:
+    """
+    SHA-256 of a file's content, read with large buffers (or mmap for big files).
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb", buffering=0) as f:
+        if os.fstat(f.fileno()).st_size >= _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                digest.update(mapped)
+            return digest.hexdigest()
+        buffer = bytearray(_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while read := f.readinto(buffer):
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+def hash_files(paths: Iterable[str]) -> dict[str, str]:
+    """
+    Hash several files in parallel threads (hashlib and file reads release the GIL).
+    Files that cannot be read are left out of the result.
+    """
+    paths = list(paths)
+    if not paths:
+        return {}
+
+    def safe_hash(path: str) -> str | None:
+        try:
+            return file_hash(Path(path))
+        except OSError:
+            return None
+
+    workers = max(1, min(settings.HASH_WORKERS, len(paths)))
+    if workers == 1:
+        digests = map(safe_hash, paths)
+        return {p: d for p, d in zip(paths, digests) if d is not None}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as pool:
+        digests = pool.map(safe_hash, paths)
+        return {p: d for p, d in zip(paths, digests) if d is not None}
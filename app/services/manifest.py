@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.cache.manifest import (
+    ManifestEntry,
+    load_manifest,
+    save_content_hashes,
+    save_manifest_changes,
+)
+from app.cache.utils import SAVED_MANIFEST_DB, VDR_DB_DIR, is_excluded_name
+from app.core.logging import log_event
+from app.services.hashing import hash_files
+from app.services.watcher import journal_seq
+
+
+def manifest_db_path(folder: Path) -> Path:
+    return folder / VDR_DB_DIR / SAVED_MANIFEST_DB
+
+
+def _walk(folder: Path) -> dict[str, ManifestEntry]:
+    """
+    Walk top-down like os.walk: each directory's entries in scandir order,
+    then its subdirectories one after another.
+    """
+    entries: dict[str, ManifestEntry] = {}
+    stack = [str(folder)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                dir_entries = list(it)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        subdirs = []
+        for entry in dir_entries:
+            if is_excluded_name(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+                is_dir = entry.is_dir()
+            except FileNotFoundError:
+                # Removed during the scan, or a dangling symlink.
+                continue
+            entries[entry.path] = ManifestEntry(
+                entry.path,
+                current,
+                entry.name,
+                is_dir,
+                stat.st_size,
+                stat.st_mtime,
+                stat.st_ino,
+            )
+            # Symlinked directories are listed but not descended into.
+            if is_dir and not entry.is_symlink():
+                subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
+    return entries
+
+
+# Last scan of each watched folder with the journal position it was taken at.
+# While the journal has not moved, the folder is unchanged and the scan is reused.
+_SCANS: dict[str, tuple[int, dict[str, ManifestEntry]]] = {}
+_SCANS_LOCK = threading.Lock()
+
+
+def scan_manifest(folder: Path) -> dict[str, ManifestEntry]:
+    """
+    Walk the folder once with scandir and bring its manifest in VDR_DB up to date.
+    Returns the live entries (path -> entry). Stored content hashes are carried
+    over for entries whose inode, size and mtime are unchanged; only changed and
+    removed entries are written.
+
+    For a watched folder the scan is reused until its change journal moves, so
+    the tree, diff, summary and index consumers share one walk.
+    """
+    start = time.perf_counter()
+    key = str(folder.resolve())
+    seq = journal_seq(folder)
+    with _SCANS_LOCK:
+        cached = _SCANS.get(key)
+    if seq is not None and cached is not None and cached[0] == seq:
+        log_event("manifest_scan_reused", folder_path=str(folder), journal_seq=seq)
+        return dict(cached[1])
+
+    db_path = manifest_db_path(folder)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    stored = cached[1] if cached is not None else load_manifest(db_path)
+    current = _walk(folder)
+
+    changed = []
+    for path, entry in current.items():
+        previous = stored.get(path)
+        if previous is not None and previous.same_stat(entry):
+            entry.content_hash = previous.content_hash
+        else:
+            changed.append(entry)
+    removed = stored.keys() - current.keys()
+    save_manifest_changes(db_path, changed, removed)
+    with _SCANS_LOCK:
+        if seq is None:
+            _SCANS.pop(key, None)
+        else:
+            _SCANS[key] = (seq, current)
+
+    log_event(
+        "manifest_scan",
+        duration_s=time.perf_counter() - start,
+        folder_path=str(folder),
+        entry_count=len(current),
+        changed=len(changed),
+        removed=len(removed),
+    )
+    return dict(current)
+
+
+def manifest_files(entries: dict[str, ManifestEntry]) -> list[ManifestEntry]:
+    return [entry for entry in entries.values() if not entry.is_dir]
+
+
+def store_content_hashes(folder: Path, hashes: dict[str, tuple[str, float]]) -> None:
+    """
+    Remember content hashes (path -> (hash, mtime hashed)) in the manifest.
+    """
+    db_path = manifest_db_path(folder)
+    if db_path.exists():
+        save_content_hashes(db_path, hashes)
+    with _SCANS_LOCK:
+        cached = _SCANS.get(str(folder.resolve()))
+    if cached is not None:
+        for path, (digest, mtime) in hashes.items():
+            entry = cached[1].get(path)
+            if entry is not None and entry.mtime == mtime:
+                entry.content_hash = digest
+
+
+def resolve_content_hashes(
+    folder: Path, entries: list[ManifestEntry]
+) -> dict[str, str]:
+    """
+    Return path -> content hash for the given entries. Hashes stored for an
+    unchanged (inode, size, mtime) are reused; the rest are hashed in parallel
+    and remembered in the manifest.
+    """
+    hashes = {e.path: e.content_hash for e in entries if e.content_hash}
+    missing = [e for e in entries if not e.content_hash]
+    computed = hash_files(e.path for e in missing)
+    for entry in missing:
+        if entry.path in computed:
+            entry.content_hash = hashes[entry.path] = computed[entry.path]
+    store_content_hashes(
+        folder, {e.path: (e.content_hash, e.mtime) for e in missing if e.content_hash}
+    )
+    if missing:
+        log_event(
+            "content_hash",
+            folder_path=str(folder),
+            reused=len(entries) - len(missing),
+            hashed=len(computed),
+        )
+    return hashes
+
+
+def entry_file_type(entry: ManifestEntry) -> str:
+    return "directory" if entry.is_dir else Path(entry.name).suffix
+
+
+def build_tree(folder: Path, entries: dict[str, ManifestEntry]) -> list[dict[str, Any]]:
+    """
+    Build the nested tree structure from manifest entries, each level sorted
+    by path like the directory walk it replaces.
+    """
+    children: dict[str, list[ManifestEntry]] = {}
+    for entry in entries.values():
+        children.setdefault(entry.parent_path, []).append(entry)
+
+    def build(parent_path: str) -> list[dict[str, Any]]:
+        nodes = []
+        for entry in sorted(children.get(parent_path, []), key=lambda e: Path(e.path)):
+            nodes.append(
+                {
+                    "file_path": entry.path,
+                    "file_name": entry.name,
+                    "file_size": entry.size,
+                    "last_modified_time": entry.mtime,
+                    "file_type": entry_file_type(entry),
+                    "children": build(entry.path) if entry.is_dir else None,
+                }
+            )
+        return nodes
+
+    return build(str(folder))
@@ -0,0 +1,102 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.file_loader import load_file
+
+_POOL: ProcessPoolExecutor | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def _parse_in_worker(file_path: str) -> list[tuple[str, dict[str, Any]]]:
+    # Return plain text and metadata; Document objects stay out of the pickle payload.
+    return [(doc.page_content, doc.metadata) for doc in load_file(file_path)]
+
+
+def _to_documents(parsed: list[tuple[str, dict[str, Any]]]) -> list[Document]:
+    return [
+        Document(page_content=text, metadata=metadata) for text, metadata in parsed
+    ]
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _POOL
+    if settings.PARSE_WORKERS <= 0:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                # Recycle workers to contain memory leaked by the parsers.
+                max_tasks_per_child=settings.PARSE_MAX_TASKS_PER_CHILD,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def _reset_pool(broken: ProcessPoolExecutor) -> None:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is broken:
+            _POOL = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+async def _load_async_once(file_path: str) -> list[Document]:
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(load_file, file_path)
+    try:
+        parsed = await asyncio.wrap_future(pool.submit(_parse_in_worker, file_path))
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+    return _to_documents(parsed)
+
+
+def _load_once(file_path: str) -> list[Document]:
+    pool = _get_pool()
+    if pool is None:
+        return load_file(file_path)
+    try:
+        parsed = pool.submit(_parse_in_worker, file_path).result()
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+    return _to_documents(parsed)
+
+
+async def load_file_async(file_path: str) -> list[Document]:
+    """
+    Parse a file in the process pool (or a thread when PARSE_WORKERS is 0)
+    without blocking the event loop.
+    """
+    try:
+        return await _load_async_once(file_path)
+    except BrokenProcessPool:
+        # A worker died (e.g. a parser crashed); retry once on a fresh pool.
+        return await _load_async_once(file_path)
+
+
+def load_file_pooled(file_path: str) -> list[Document]:
+    """
+    Blocking variant of load_file_async for synchronous callers.
+    """
+    try:
+        return _load_once(file_path)
+    except BrokenProcessPool:
+        return _load_once(file_path)
+
+
+def shutdown_parse_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
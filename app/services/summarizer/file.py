@@ -1,64 +1,112 @@
 import asyncio
 import time
+from dataclasses import dataclass, field
 
+from langchain_core.documents import Document
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
 from app.core.logging import log_base_dir, log_event
-from app.services.file_loader import load_file
+from app.llm.tokens import TokenUsage
+from app.services.parse_pool import load_file_async
 from app.services.summarizer.utils import (
     choose_method,
-    summarize_with_map_reduce,
-    summarize_with_stuff,
+    split_for_map,
+    summarize_with_map_reduce_async,
+    summarize_with_stuff_async,
 )
 
 
-def summarize_single_file(
-    file_path: str,
-    llm: ChatOpenAI | AzureChatOpenAI,
-    method: str = "auto",
-    base_dir: str | None = None,
-) -> tuple[str, float]:
-    start = time.perf_counter()
-    if base_dir:
-        with log_base_dir(base_dir):
-            return _summarize_single_file(file_path, llm, method, start)
-    return _summarize_single_file(file_path, llm, method, start)
+@dataclass
+class FileSummaryJob:
+    """
+    State of one file as it moves through the load, prepare and LLM stages.
+    summary is set once the job is finished, successfully or not; failed tells
+    the two apart.
+    """
 
+    file_path: str
+    method: str = "auto"
+    start: float = field(default_factory=time.perf_counter)
+    docs: list[Document] | None = None
+    chunks: list[Document] | None = None
+    summary: str | None = None
+    usage: TokenUsage = field(default_factory=TokenUsage)
+    duration: float = 0.0
+    failed: bool = False
 
-def _summarize_single_file(
-    file_path: str,
-    llm: ChatOpenAI | AzureChatOpenAI,
-    method: str,
-    start: float,
-) -> tuple[str, float]:
+    def fail(self, error: Exception) -> None:
+        self.failed = True
+        self.summary = f"Error during summarization: {str(error)}"
+        log_event("summary_error", file_path=self.file_path, error=str(error))
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+        self.docs = self.chunks = None
+        log_event(
+            "summary_file",
+            duration_s=self.duration,
+            file_path=self.file_path,
+            tokens_in=self.usage.tokens_in,
+            tokens_out=self.usage.tokens_out,
+        )
+
+
+async def load_stage(job: FileSummaryJob) -> None:
+    try:
+        job.docs = await load_file_async(job.file_path)
+    except Exception as e:
+        job.fail(e)
+
+
+def prepare_stage(job: FileSummaryJob, llm: ChatOpenAI | AzureChatOpenAI) -> None:
     try:
-        docs = load_file(file_path)
+        job.method = choose_method(job.docs, job.method, llm)
+        log_event("summary_method", file_path=job.file_path, method=job.method)
+        if job.method == "map-reduce":
+            job.chunks = split_for_map(job.docs)
+    except Exception as e:
+        job.fail(e)
 
-        use_method = choose_method(docs, method)
-        log_event("summary_method", file_path=file_path, method=use_method)
 
-        if use_method == "map-reduce":
-            summary = summarize_with_map_reduce(docs, llm)
+async def llm_stage(job: FileSummaryJob, llm: ChatOpenAI | AzureChatOpenAI) -> None:
+    try:
+        if job.method == "map-reduce":
+            job.summary, job.usage = await summarize_with_map_reduce_async(
+                job.docs, llm, chunks=job.chunks
+            )
         else:
-            summary = summarize_with_stuff(docs, llm)
+            job.summary, job.usage = await summarize_with_stuff_async(job.docs, llm)
     except Exception as e:
-        summary = f"Error during summarization: {str(e)}"
-        log_event("summary_error", file_path=file_path, error=str(e))
-
-    duration = time.perf_counter() - start
-    log_event("summary_file", duration_s=duration, file_path=file_path)
-    return summary, duration
+        job.fail(e)
 
 
 async def summarize_single_file_async(
     file_path: str,
-    semaphore: asyncio.Semaphore,
     llm: ChatOpenAI | AzureChatOpenAI,
     method: str = "auto",
     base_dir: str | None = None,
-):
-    async with semaphore:
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            None, summarize_single_file, file_path, llm, method, base_dir
-        )
+) -> tuple[str, float, TokenUsage]:
+    """
+    Summarizes one file on the event loop. Only file parsing runs in a worker
+    process; LLM calls are awaited natively and bounded by the model endpoint's
+    adaptive limiter in the chains.
+    """
+    if base_dir:
+        with log_base_dir(base_dir):
+            return await _summarize_single_file_async(file_path, llm, method)
+    return await _summarize_single_file_async(file_path, llm, method)
+
+
+async def _summarize_single_file_async(
+    file_path: str,
+    llm: ChatOpenAI | AzureChatOpenAI,
+    method: str,
+) -> tuple[str, float, TokenUsage]:
+    job = FileSummaryJob(file_path, method=method)
+    await load_stage(job)
+    if job.summary is None:
+        await asyncio.to_thread(prepare_stage, job, llm)
+    if job.summary is None:
+        await llm_stage(job, llm)
+    job.finish()
+    return job.summary, job.duration, job.usage
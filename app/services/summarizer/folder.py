@@ -1,40 +1,178 @@
 import asyncio
-import os
 import time
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Any, AsyncIterator
 
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
-from app.cache.utils import (
-    SAVED_SUMMARY_DB,
-    VDR_DB_DIR,
-    get_json_from_cache,
-    is_cache_file,
-    save_json_to_cache,
+from app.cache.journal import JournalChanges
+from app.cache.summaries import (
+    drop_legacy_summaries,
+    get_summaries_by_hash,
+    load_file_rows,
+    load_legacy_summaries,
+    load_summary_rows,
+    save_summary_changes,
 )
-from app.core.logging import log_event
+from app.cache.utils import SAVED_SUMMARY_DB, VDR_DB_DIR
+from app.core.logging import log_base_dir, log_event
+from app.llm.models import get_model_name
+from app.llm.prompts import PROMPT_VERSION
 from app.schemas.summarize import MultipleSummariesResponse
-from app.services.summarizer.file import summarize_single_file_async
+from app.services.hashing import hash_files
+from app.services.manifest import (
+    entry_file_type,
+    manifest_files,
+    scan_manifest,
+    store_content_hashes,
+)
+from app.services.summarizer.pipeline import iter_pipeline_summaries
+from app.services.watcher import (
+    SUMMARY_CONSUMER,
+    acknowledge,
+    journal_seq,
+    pending_changes,
+)
 
 
-async def summarize_folder(
+def _file_meta(file_path: Path) -> dict[str, Any] | None:
+    try:
+        stat = file_path.stat()
+        file_type = "directory" if file_path.is_dir() else file_path.suffix
+    except FileNotFoundError:
+        return None
+    return {
+        "file_path": str(file_path),
+        "file_name": file_path.name,
+        "file_size": stat.st_size,
+        "last_modified_time": stat.st_mtime,
+        "file_type": file_type,
+    }
+
+
+def _scan_folder(folder_path: str) -> dict[str, dict[str, Any]]:
+    current_files_meta = {}
+    for entry in manifest_files(scan_manifest(Path(folder_path))):
+        current_files_meta[entry.path] = {
+            "file_path": entry.path,
+            "file_name": entry.name,
+            "file_size": entry.size,
+            "last_modified_time": entry.mtime,
+            "file_type": entry_file_type(entry),
+            # Known when the file's inode, size and mtime are unchanged since hashing.
+            "content_hash": entry.content_hash,
+        }
+    return current_files_meta
+
+
+def _apply_journal(
+    cached_files: dict[str, dict[str, Any]], changes: JournalChanges
+) -> dict[str, dict[str, Any]]:
+    """
+    Derive the current file list from the cached rows and the journaled changes,
+    stat-ing only the paths that changed.
+    """
+    current_files_meta = {path: dict(row) for path, row in cached_files.items()}
+    for path in changes.removed:
+        current_files_meta.pop(path, None)
+    for path in (*changes.added, *changes.modified):
+        current_files_meta.pop(path, None)
+        if path in changes.directories:
+            continue
+        meta = _file_meta(Path(path))
+        if meta is not None and meta["file_type"] != "directory":
+            current_files_meta[path] = meta
+    return current_files_meta
+
+
+def _import_legacy_summaries(db_path: Path, model: str) -> None:
+    """
+    Move summaries of the former single-blob cache into rows, so upgrading does
+    not summarize every file again; files changed since are left out. The blob
+    is dropped afterwards.
+    """
+    items = load_legacy_summaries(db_path)
+    if items is None:
+        return
+    unchanged: list[tuple[dict[str, Any], dict[str, Any]]] = []
+    for item in items:
+        meta = _file_meta(Path(item.get("file_path", "")))
+        if (
+            meta is not None
+            and meta["file_size"] == item.get("file_size")
+            and meta["last_modified_time"] == item.get("last_modified_time")
+            and item.get("summary") is not None
+        ):
+            unchanged.append((meta, item))
+    hashes = hash_files(meta["file_path"] for meta, _ in unchanged)
+    summaries: dict[str, dict[str, Any]] = {}
+    file_rows: list[dict[str, Any]] = []
+    for meta, item in unchanged:
+        content_hash = hashes.get(meta["file_path"])
+        if content_hash is None:
+            continue
+        meta["content_hash"] = content_hash
+        file_rows.append(meta)
+        summaries[content_hash] = {
+            "summary": item["summary"],
+            "duration": item.get("duration") or 0.0,
+            "tokens_in": item.get("tokens_in") or 0,
+            "tokens_out": item.get("tokens_out") or 0,
+        }
+    save_summary_changes(db_path, model, PROMPT_VERSION, summaries, file_rows)
+    drop_legacy_summaries(db_path)
+    log_event(
+        "summary_legacy_import",
+        legacy_count=len(items),
+        imported_count=len(file_rows),
+    )
+
+
+def _summary_item(meta: dict[str, Any], summary: dict[str, Any]) -> dict:
+    return {
+        **{k: v for k, v in meta.items() if k != "content_hash"},
+        **summary,
+    }
+
+
+async def iter_folder_summaries(
     folder_path: str,
     regenerate: bool,
     sync: bool,
     llm: ChatOpenAI | AzureChatOpenAI,
     base_dir: str | None = None,
-) -> MultipleSummariesResponse:
+) -> AsyncIterator[dict[str, Any]]:
     """
-    Summarizes files in a folder with caching.
+    Yields folder summaries as they become available.
+    Summaries are stored one row per file content, keyed by content hash, model and
+    prompt version, so renamed or duplicated files reuse an existing summary.
     - If regenerate=True: Forces regeneration of all summaries, ignoring any cache.
     - If sync=True: Intelligently updates the cache by summarizing only new or modified files.
     - If regenerate=False and sync=False: Returns cached data if it exists, otherwise generates all.
+    When the folder is watched, sync reads the change journal instead of walking the folder.
+
+    Cached summaries are yielded first as {"type": "summary", "cached": True, ...},
+    then each new summary as soon as it completes, and finally a {"type": "trailer"}
+    event with totals. New rows are written to the cache in background threads
+    while the remaining files are still being summarized.
     """
     path_obj = Path(folder_path)
     db_dir = path_obj / VDR_DB_DIR
     db_dir.mkdir(parents=True, exist_ok=True)
     db_path = db_dir / SAVED_SUMMARY_DB
+    model = get_model_name(llm)
     start_time = time.perf_counter()
+    await asyncio.to_thread(_import_legacy_summaries, db_path, model)
+
+    def trailer(cached_count: int, generated_count: int) -> dict[str, Any]:
+        return {
+            "type": "trailer",
+            "total": cached_count + generated_count,
+            "cached": cached_count,
+            "generated": generated_count,
+            "duration": time.perf_counter() - start_time,
+        }
 
     # --- Force regenerate: ignore cache ---
     if regenerate:
@@ -43,108 +181,220 @@ async def summarize_folder(
         pass
     # --- Fast Cache check (if not regenerating or syncing) ---
     elif not sync:
-        cached_data = get_json_from_cache(db_path, "summaries")
-        if cached_data:
+        cached_rows = await asyncio.to_thread(
+            load_summary_rows, db_path, model, PROMPT_VERSION
+        )
+        if cached_rows:
             log_event("summary_cache_hit", folder_path=folder_path)
-            return MultipleSummariesResponse(**cached_data)
+            for item in cached_rows:
+                yield {"type": "summary", "cached": True, "data": item}
+            yield trailer(len(cached_rows), 0)
+            return
         # If no cache, fall through to the full generation logic below
 
     # --- Sync (Smart Update) or Initial Generation ---
-    cached_summaries_map = {}
-    if sync and not regenerate:
-        cached_data = get_json_from_cache(db_path, "summaries")
-        if cached_data:
-            cached_response = MultipleSummariesResponse(**cached_data)
-            for summary_item in cached_response.summaries:
-                cached_summaries_map[summary_item.file_path] = summary_item
-
-    # 1. Get the current state of files on disk
-    current_files_meta = {}
-    for root, dirs, files in os.walk(folder_path):
-        if VDR_DB_DIR in dirs:
-            dirs.remove(VDR_DB_DIR)
-        for file in files:
-            if is_cache_file(file):
-                continue
-            file_path = Path(root) / file
-            try:
-                stat = file_path.stat()
-                file_type = "directory" if file_path.is_dir() else file_path.suffix
-                current_files_meta[str(file_path)] = {
-                    "file_path": str(file_path),
-                    "file_name": file_path.name,
-                    "file_size": stat.st_size,
-                    "last_modified_time": stat.st_mtime,
-                    "file_type": file_type,
-                }
-            except FileNotFoundError:
-                continue
-
-    # 2. Decide which files to summarize
-    files_to_summarize_meta = []
-    final_summaries = []
+    cached_files = await asyncio.to_thread(load_file_rows, db_path)
 
-    if regenerate:
-        # If regenerating, all current files must be summarized.
-        files_to_summarize_meta = list(current_files_meta.values())
+    # 1. Get the current state of files on disk, from the journal when it can tell
+    changes = (
+        None
+        if regenerate
+        else await asyncio.to_thread(pending_changes, path_obj, SUMMARY_CONSUMER)
+    )
+    if changes is not None:
+        seq = changes.seq
+        current_files_meta = _apply_journal(cached_files, changes)
     else:
-        for path, meta in current_files_meta.items():
-            cached_item = cached_summaries_map.get(path)
-            # Summarize if:
-            # - No cached item exists.
-            # - We are in sync mode and the file is modified.
-            if not cached_item or (
-                sync and cached_item.last_modified_time != meta["last_modified_time"]
-            ):
-                files_to_summarize_meta.append(meta)
-            else:
-                # This file is unchanged, reuse the cached summary
-                final_summaries.append(cached_item.model_dump())
-
-    # 3. Summarize only the necessary files
-    if files_to_summarize_meta:
+        seq = await asyncio.to_thread(journal_seq, path_obj)
+        current_files_meta = await asyncio.to_thread(_scan_folder, folder_path)
+
+    # 2. Resolve content hashes, rehashing only files whose size or mtime changed
+    changed_paths = set()
+    for path, meta in current_files_meta.items():
+        cached_file = None if regenerate else cached_files.get(path)
+        if (
+            cached_file
+            and cached_file["file_size"] == meta["file_size"]
+            and cached_file["last_modified_time"] == meta["last_modified_time"]
+        ):
+            meta["content_hash"] = cached_file["content_hash"]
+            continue
+        changed_paths.add(path)
+    # Hashes memoized in the manifest are reused; the rest are hashed in parallel.
+    to_hash = [p for p in changed_paths if not current_files_meta[p].get("content_hash")]
+    new_hashes = await asyncio.to_thread(hash_files, to_hash)
+    for path in to_hash:
+        if path in new_hashes:
+            current_files_meta[path]["content_hash"] = new_hashes[path]
+        else:
+            del current_files_meta[path]
+            changed_paths.discard(path)
+    if new_hashes:
+        await asyncio.to_thread(
+            store_content_hashes,
+            path_obj,
+            {
+                path: (digest, current_files_meta[path]["last_modified_time"])
+                for path, digest in new_hashes.items()
+            },
+        )
+
+    # 3. Decide which contents to summarize; identical contents are summarized once
+    known_summaries = (
+        {}
+        if regenerate
+        else await asyncio.to_thread(
+            get_summaries_by_hash,
+            db_path,
+            (meta["content_hash"] for meta in current_files_meta.values()),
+            model,
+            PROMPT_VERSION,
+        )
+    )
+    files_by_hash: dict[str, list[dict[str, Any]]] = {}
+    for meta in current_files_meta.values():
+        files_by_hash.setdefault(meta["content_hash"], []).append(meta)
+
+    # A changed path carrying the content of a removed path is a move or rename:
+    # its row is rewritten to the new path and the summary is reused as is.
+    removed_paths = set(cached_files) - set(current_files_meta)
+    removed_hashes = {cached_files[path]["content_hash"] for path in removed_paths}
+    moved_count = sum(
+        1
+        for path in changed_paths
+        if current_files_meta[path]["content_hash"] in removed_hashes
+    )
+
+    # Persist changed rows whose summary is already known and drop removed files
+    pending_writes = [
+        asyncio.create_task(
+            asyncio.to_thread(
+                save_summary_changes,
+                db_path,
+                model,
+                PROMPT_VERSION,
+                {},
+                [
+                    current_files_meta[path]
+                    for path in changed_paths
+                    if current_files_meta[path]["content_hash"] in known_summaries
+                ],
+                removed_paths,
+            )
+        )
+    ]
+
+    cached_count = 0
+    for content_hash, summary in known_summaries.items():
+        for meta in files_by_hash.get(content_hash, []):
+            cached_count += 1
+            yield {
+                "type": "summary",
+                "cached": True,
+                "data": _summary_item(meta, summary),
+            }
+
+    # 4. Summarize only the necessary files, yielding each as it completes
+    files_to_summarize = {
+        content_hash: metas[0]
+        for content_hash, metas in files_by_hash.items()
+        if content_hash not in known_summaries
+    }
+    generated_count = 0
+    tokens_in = tokens_out = 0
+    if files_to_summarize:
         log_event(
             "summary_batch_start",
             folder_path=folder_path,
-            file_count=len(files_to_summarize_meta),
+            file_count=len(files_to_summarize),
         )
-        semaphore = asyncio.Semaphore(10)
-        tasks = [
-            summarize_single_file_async(
-                file_meta["file_path"],
-                semaphore,
-                llm,
-                method="stuff",
-                base_dir=base_dir,
-            )
-            for file_meta in files_to_summarize_meta
-        ]
-        new_results = await asyncio.gather(*tasks)
-
-        for i, file_meta in enumerate(files_to_summarize_meta):
-            summary, duration = new_results[i]
-            summary_data = {
-                **file_meta,
-                "summary": summary,
-                "duration": duration,
-            }
-            final_summaries.append(summary_data)
+
+        log_context = log_base_dir(base_dir) if base_dir else nullcontext()
+        try:
+            with log_context:
+                async for content_hash, job in iter_pipeline_summaries(
+                    (
+                        (content_hash, file_meta["file_path"])
+                        for content_hash, file_meta in files_to_summarize.items()
+                    ),
+                    llm,
+                ):
+                    summary = {
+                        "summary": job.summary,
+                        "duration": job.duration,
+                        "tokens_in": job.usage.tokens_in,
+                        "tokens_out": job.usage.tokens_out,
+                    }
+                    tokens_in += job.usage.tokens_in
+                    tokens_out += job.usage.tokens_out
+                    metas = files_by_hash[content_hash]
+                    # An error text is not stored as the summary of the content:
+                    # its file rows are saved without one, so the next sync retries.
+                    pending_writes.append(
+                        asyncio.create_task(
+                            asyncio.to_thread(
+                                save_summary_changes,
+                                db_path,
+                                model,
+                                PROMPT_VERSION,
+                                {} if job.failed else {content_hash: summary},
+                                metas,
+                            )
+                        )
+                    )
+                    for meta in metas:
+                        generated_count += 1
+                        yield {
+                            "type": "summary",
+                            "cached": False,
+                            "data": _summary_item(meta, summary),
+                        }
+        finally:
+            # Rows of summaries that already finished are kept even if the
+            # consumer stops early.
+            await asyncio.gather(*pending_writes, return_exceptions=True)
     else:
         log_event("summary_noop", folder_path=folder_path)
 
-    # 4. Create final response and save to cache
-    total_duration = time.perf_counter() - start_time
+    await asyncio.gather(*pending_writes)
+    await asyncio.to_thread(acknowledge, path_obj, SUMMARY_CONSUMER, seq)
+
+    event = trailer(cached_count, generated_count)
     log_event(
         "summary_batch",
-        duration_s=total_duration,
+        duration_s=event["duration"],
         folder_path=folder_path,
-        file_count=len(final_summaries),
+        file_count=event["total"],
+        summarized_count=len(files_to_summarize),
+        changed_file_count=len(changed_paths),
+        moved_file_count=moved_count,
+        tokens_in=tokens_in,
+        tokens_out=tokens_out,
         regenerate=regenerate,
         sync=sync,
     )
-    response = MultipleSummariesResponse(
-        summaries=final_summaries, duration=total_duration
-    )
+    yield event
+
 
-    save_json_to_cache(db_path, "summaries", response.model_dump())
-    return response
+async def summarize_folder(
+    folder_path: str,
+    regenerate: bool,
+    sync: bool,
+    llm: ChatOpenAI | AzureChatOpenAI,
+    base_dir: str | None = None,
+) -> MultipleSummariesResponse:
+    """
+    Summarizes files in a folder with caching and returns them in one response.
+    See iter_folder_summaries for the caching rules.
+    """
+    summaries = []
+    duration = 0.0
+    async for event in iter_folder_summaries(
+        folder_path, regenerate, sync, llm, base_dir=base_dir
+    ):
+        if event["type"] == "summary":
+            summaries.append(event["data"])
+        else:
+            duration = event["duration"]
+    summaries.sort(key=lambda item: item["file_path"])
+    return MultipleSummariesResponse(summaries=summaries, duration=duration)
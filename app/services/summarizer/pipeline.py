@@ -0,0 +1,121 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Iterable
+
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
+
+from app.core.config import settings
+from app.core.logging import log_event
+from app.services.summarizer.file import (
+    FileSummaryJob,
+    llm_stage,
+    load_stage,
+    prepare_stage,
+)
+
+# Marks the end of a stage's output.
+_DONE = object()
+
+
+async def _run_stage(
+    worker_count: int,
+    inbox: asyncio.Queue,
+    outbox: asyncio.Queue,
+    finished: asyncio.Queue,
+    handle: Callable[[FileSummaryJob], Awaitable[None]],
+) -> None:
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Hand the marker on so sibling workers stop as well.
+                await inbox.put(_DONE)
+                return
+            key, job = item
+            await handle(job)
+            # Failed jobs skip the remaining stages.
+            await (finished if job.summary is not None else outbox).put((key, job))
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, worker_count))))
+    finally:
+        await outbox.put(_DONE)
+
+
+async def iter_pipeline_summaries(
+    files: Iterable[tuple[Hashable, str]],
+    llm: ChatOpenAI | AzureChatOpenAI,
+    method: str = "auto",
+) -> AsyncIterator[tuple[Hashable, FileSummaryJob]]:
+    """
+    Summarizes (key, file_path) pairs through a staged pipeline and yields
+    (key, finished job) pairs in completion order.
+
+    Parsing, preprocessing (method choice and chunking) and LLM dispatch each run
+    with their own worker count, connected by bounded queues. Parsing keeps working
+    ahead while the LLM stage is busy, and the queue sizes cap how many parsed
+    documents are held in memory at once. LLM calls inside the last stage are
+    additionally bounded by the endpoint's adaptive limiter.
+    """
+    queue_size = settings.SUMMARY_PIPELINE_QUEUE_SIZE
+    load_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    prepare_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    llm_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    # Output is bounded too, so a slow consumer (e.g. a streaming client) applies
+    # back-pressure to the whole pipeline.
+    out_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def prepare(job: FileSummaryJob) -> None:
+        await asyncio.to_thread(prepare_stage, job, llm)
+
+    async def dispatch(job: FileSummaryJob) -> None:
+        await llm_stage(job, llm)
+
+    async def feed() -> None:
+        for key, file_path in files:
+            await load_q.put((key, FileSummaryJob(file_path, method=method)))
+        await load_q.put(_DONE)
+
+    def log_depths() -> None:
+        log_event(
+            "summary_pipeline_depth",
+            load_queue=load_q.qsize(),
+            prepare_queue=prepare_q.qsize(),
+            llm_queue=llm_q.qsize(),
+            output_queue=out_q.qsize(),
+        )
+
+    async def monitor() -> None:
+        while True:
+            await asyncio.sleep(settings.SUMMARY_PIPELINE_LOG_INTERVAL_S)
+            log_depths()
+
+    tasks: list[asyncio.Task[Any]] = [
+        asyncio.create_task(feed()),
+        asyncio.create_task(
+            _run_stage(
+                settings.SUMMARY_LOAD_CONCURRENCY, load_q, prepare_q, out_q, load_stage
+            )
+        ),
+        asyncio.create_task(
+            _run_stage(
+                settings.SUMMARY_PREPARE_CONCURRENCY, prepare_q, llm_q, out_q, prepare
+            )
+        ),
+        asyncio.create_task(
+            _run_stage(settings.SUMMARY_LLM_CONCURRENCY, llm_q, out_q, out_q, dispatch)
+        ),
+        asyncio.create_task(monitor()),
+    ]
+    try:
+        while True:
+            item = await out_q.get()
+            if item is _DONE:
+                break
+            key, job = item
+            job.finish()
+            yield key, job
+        log_depths()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
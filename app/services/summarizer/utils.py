@@ -1,12 +1,24 @@
+import time
 from pathlib import Path
 
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 
+from app.core.config import settings
+from app.core.logging import log_event
 from app.llm.chains import (
+    build_collapse_chain,
     build_map_chain,
     build_reduce_chain,
     build_stuff_chain,
 )
+from app.llm.models import get_model_name
+from app.llm.prompts import COLLAPSE_PROMPT, MAP_PROMPT, REDUCE_PROMPT, STUFF_PROMPT
+from app.llm.tokens import (
+    TokenUsage,
+    estimate_tokens,
+    input_token_budget,
+    truncate_to_tokens,
+)
 from app.services.chunking import split_docs
 
 
@@ -22,42 +34,167 @@ def get_file_name_from_docs(docs: list) -> str:
     return Path(file_path).name
 
 
-def choose_method(docs, method: str) -> str:
+def _stuff_text(docs) -> str:
+    return "\n\n".join(d.page_content for d in docs)
+
+
+def choose_method(docs, method: str, llm: ChatOpenAI | AzureChatOpenAI) -> str:
+    """
+    Pick the cheapest strategy that fits the model's context window.
+    A single stuff call is preferred whenever the whole document fits; map-reduce
+    is used only when it does not, even if stuff was requested explicitly.
+    """
     if method == "map-reduce":
         return "map-reduce"
-    if method == "stuff":
-        return "stuff"
-    # auto
-    return "map-reduce" if len(docs) > 20 else "stuff"
 
+    model = get_model_name(llm)
+    budget = input_token_budget(llm, model)
+    prompt_tokens = estimate_tokens(STUFF_PROMPT.template) + estimate_tokens(
+        _stuff_text(docs)
+    )
+    if prompt_tokens <= budget:
+        return "stuff"
 
-def summarize_with_map_reduce(docs, llm: ChatOpenAI | AzureChatOpenAI) -> str:
+    log_event(
+        "summary_context_overflow",
+        model=model,
+        requested_method=method,
+        prompt_tokens=prompt_tokens,
+        budget_tokens=budget,
+    )
+    return "map-reduce"
+
+
+def _group_by_tokens(texts: list[str], max_tokens: int) -> list[list[str]]:
+    """
+    Group consecutive texts into batches whose combined size stays within max_tokens.
+    A single text larger than the limit gets a batch of its own.
+    """
+    batches: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = estimate_tokens(text) + 1
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _collapse_summaries(
+    summaries: list[str],
+    llm: ChatOpenAI | AzureChatOpenAI,
+    collapse_tokens: int,
+    reduce_tokens: int,
+    usage: TokenUsage,
+) -> list[str]:
+    """
+    Reduce partial summaries level by level until they fit into one reduce call
+    of reduce_tokens; each collapse call takes at most collapse_tokens of text.
+    Every batch of a level is collapsed concurrently.
+    """
+    collapse_chain = build_collapse_chain(llm)
+    level = 0
+    while sum(estimate_tokens(s) + 1 for s in summaries) > reduce_tokens:
+        batches = _group_by_tokens(summaries, collapse_tokens)
+        if len(batches) == len(summaries):
+            # No two summaries fit one collapse call (or a lone summary exceeds the
+            # reduce call): shorten them so the next level makes progress.
+            limit = (
+                reduce_tokens - 1 if len(summaries) == 1 else collapse_tokens // 2 - 1
+            )
+            log_event(
+                "summary_reduce_truncate",
+                level=level,
+                summary_count=len(summaries),
+                max_tokens=limit,
+            )
+            summaries = [truncate_to_tokens(s, limit) for s in summaries]
+            continue
+        level += 1
+        start = time.perf_counter()
+        collapse_inputs = [{"text": "\n".join(batch)} for batch in batches]
+        summaries = await collapse_chain.abatch(collapse_inputs)
+        for collapse_input, collapsed in zip(collapse_inputs, summaries):
+            usage.add(COLLAPSE_PROMPT.format(**collapse_input), collapsed)
+        log_event(
+            "summary_reduce_level",
+            duration_s=time.perf_counter() - start,
+            level=level,
+            batch_count=len(batches),
+        )
+    return summaries
+
+
+def split_for_map(docs) -> list:
     chunks = split_docs(docs)
 
     # Filter out empty chunks and check if there's any content left
     non_empty_chunks = [d for d in chunks if d.page_content.strip()]
     if not non_empty_chunks:
         raise ValueError("No text to summarize after chunking")
+    return non_empty_chunks
+
+
+async def summarize_with_map_reduce_async(
+    docs, llm: ChatOpenAI | AzureChatOpenAI, chunks: list | None = None
+) -> tuple[str, TokenUsage]:
+    """
+    Summarize docs with map-reduce. Pass chunks when the documents were already
+    split by split_for_map.
+    """
+    non_empty_chunks = chunks if chunks is not None else split_for_map(docs)
 
     map_chain = build_map_chain(llm)
     reduce_chain = build_reduce_chain(llm)
+    usage = TokenUsage()
 
     map_inputs = [{"text": d.page_content} for d in non_empty_chunks]
-    map_summaries = map_chain.batch(map_inputs)
+    map_summaries = await map_chain.abatch(map_inputs)
+    for map_input, map_summary in zip(map_inputs, map_summaries):
+        usage.add(MAP_PROMPT.format(**map_input), map_summary)
+
+    window = min(
+        settings.SUMMARY_REDUCE_BATCH_TOKENS,
+        input_token_budget(llm, get_model_name(llm)),
+    )
+    # Each prompt's own text counts against the window it is sent in.
+    collapse_budget = window - estimate_tokens(COLLAPSE_PROMPT.template)
+    reduce_budget = window - estimate_tokens(REDUCE_PROMPT.template)
+    if min(collapse_budget, reduce_budget) < 4:
+        raise ValueError(
+            f"SUMMARY_REDUCE_BATCH_TOKENS ({window}) leaves no room for summaries "
+            "next to the reduce prompts"
+        )
+    map_summaries = await _collapse_summaries(
+        map_summaries, llm, collapse_budget, reduce_budget, usage
+    )
 
     combined = "\n".join(map_summaries)
     file_name = get_file_name_from_docs(docs)
 
-    return reduce_chain.invoke({"text": combined, "file_name": file_name})
+    reduce_input = {"text": combined, "file_name": file_name}
+    summary = await reduce_chain.ainvoke(reduce_input)
+    usage.add(REDUCE_PROMPT.format(text=combined), summary)
+    return summary, usage
 
 
-def summarize_with_stuff(docs, llm: ChatOpenAI | AzureChatOpenAI) -> str:
+async def summarize_with_stuff_async(
+    docs, llm: ChatOpenAI | AzureChatOpenAI
+) -> tuple[str, TokenUsage]:
     chain = build_stuff_chain(llm)
     file_name = get_file_name_from_docs(docs)
 
-    text = "\n\n".join(d.page_content for d in docs)
+    text = _stuff_text(docs)
 
     # In case of empty documents or scanned PDFs
     if not text.strip():
         raise ValueError("No text to summarize")
-    return chain.invoke({"text": text, "file_name": file_name})
+    summary = await chain.ainvoke({"text": text, "file_name": file_name})
+    usage = TokenUsage()
+    usage.add(STUFF_PROMPT.format(text=text, file_name=file_name), summary)
+    return summary, usage
@@ -1,3 +1,4 @@
+import os
 import time
 from pathlib import Path
 
@@ -5,17 +6,34 @@ from app.cache.utils import (
     SAVED_TREE_DB,
     VDR_DB_DIR,
     get_json_from_cache,
-    is_cache_file,
-    save_json_to_cache,
+    get_many_json_from_cache,
+    is_excluded_name,
+    save_many_json_to_cache,
+)
+from app.cache.tree_nodes import (
+    get_tree_node,
+    has_tree_nodes,
+    load_children,
+    save_tree_nodes,
 )
 from app.core.logging import log_event
+from app.services.manifest import build_tree, scan_manifest
+from app.services.watcher import (
+    TREE_CONSUMER,
+    acknowledge,
+    journal_seq,
+    pending_changes,
+)
 
 
-def get_tree(path: Path, regenerate: bool = False):
+def get_tree(path: Path, regenerate: bool = False, incremental: bool = False):
     """
     Get the directory tree structure.
     It first tries to get it from a local sqlite cache unless regeneration is requested.
     If not found or regeneration is forced, it generates the tree, saves it to the cache, and returns it.
+    With incremental=True, regeneration re-scans only directories whose mtime changed
+    since the cached tree was built and reuses every other cached node, or returns
+    the cached tree as is when the folder's change journal has nothing new.
     """
     db_dir = path / VDR_DB_DIR
     db_dir.mkdir(parents=True, exist_ok=True)
@@ -27,17 +45,103 @@ def get_tree(path: Path, regenerate: bool = False):
             log_event("tree_cache_hit", folder_path=str(path))
             return cached_tree
 
-    tree = _generate_tree(path)
-    save_json_to_cache(db_path, "tree", tree)
+    seq = journal_seq(path)
+    counts = {"added": 0, "removed": 0, "changed": 0}
+    cached = (
+        get_many_json_from_cache(db_path, ["tree", "tree_root_mtime"])
+        if incremental
+        else {}
+    )
+    try:
+        root_mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        root_mtime = None
+    changes = pending_changes(path, TREE_CONSUMER) if "tree" in cached else None
+    if changes is not None and not changes.changed:
+        log_event("tree_journal_noop", folder_path=str(path))
+        return cached["tree"]
+    if "tree" in cached and "tree_root_mtime" in cached:
+        tree = _update_tree(
+            path, cached["tree"], root_mtime == cached["tree_root_mtime"], counts
+        )
+        if changes is not None and changes.modified:
+            # The journal also knows about in-place edits the mtime walk skips.
+            _refresh_nodes(tree, set(changes.modified), counts)
+    else:
+        incremental = False
+        tree = build_tree(path, scan_manifest(path))
+    save_many_json_to_cache(db_path, {"tree": tree, "tree_root_mtime": root_mtime})
+    save_tree_nodes(db_path, str(path), tree)
+    acknowledge(path, TREE_CONSUMER, seq)
     log_event(
         "tree_generated",
         duration_s=time.perf_counter() - start,
         folder_path=str(path),
         regenerate=regenerate,
+        incremental=incremental,
+        **counts,
     )
     return tree
 
 
+def get_tree_page(
+    path: Path,
+    sub_path: str | None = None,
+    max_depth: int = 1,
+    cursor: str | None = None,
+    limit: int | None = None,
+    regenerate: bool = False,
+    incremental: bool = False,
+) -> dict:
+    """
+    Get one page of the tree below sub_path (the folder itself by default),
+    expanded max_depth levels deep, from the per-node table in the tree cache.
+    cursor is the next_cursor of the previous page and limit caps the number of
+    nodes on the first level. Directories beyond max_depth have children=None;
+    their child_count tells whether they can be expanded.
+    Raises ValueError if sub_path is not a directory in the cached tree.
+    """
+    db_path = path / VDR_DB_DIR / SAVED_TREE_DB
+    if regenerate or not has_tree_nodes(db_path):
+        tree = get_tree(path, regenerate=regenerate, incremental=incremental)
+        if not has_tree_nodes(db_path):
+            # Tree cached before the node table existed.
+            save_tree_nodes(db_path, str(path), tree)
+
+    parent_path = str(path / sub_path) if sub_path else str(path)
+    if parent_path != str(path):
+        parent = get_tree_node(db_path, parent_path)
+        if parent is None or parent["child_count"] is None:
+            raise ValueError(f"Not a directory in the cached tree: {sub_path}")
+
+    nodes = load_children(
+        db_path, parent_path, after=cursor, limit=None if limit is None else limit + 1
+    )
+    next_cursor = None
+    if limit is not None and len(nodes) > limit:
+        nodes = nodes[:limit]
+        next_cursor = nodes[-1]["file_name"]
+    _expand_nodes(db_path, nodes, max_depth - 1)
+    log_event(
+        "tree_page",
+        folder_path=str(path),
+        sub_path=sub_path,
+        max_depth=max_depth,
+        node_count=len(nodes),
+    )
+    return {"nodes": nodes, "next_cursor": next_cursor}
+
+
+def _expand_nodes(db_path: Path, nodes: list[dict], depth: int) -> None:
+    for node in nodes:
+        node["children"] = None
+        if depth > 0 and node["child_count"]:
+            node["children"] = load_children(db_path, node["file_path"])
+            _expand_nodes(db_path, node["children"], depth - 1)
+        elif node["child_count"] == 0:
+            node["children"] = []
+
+
 def _generate_tree(current_path: Path):
     """
     Recursively generate the directory tree structure.
@@ -46,7 +150,7 @@ def _generate_tree(current_path: Path):
     try:
         for item in sorted(current_path.iterdir()):
             # Skip the cache file
-            if is_cache_file(item.name) or item.name == VDR_DB_DIR:
+            if is_excluded_name(item.name):
                 continue
 
             stat = item.stat()
@@ -67,3 +171,123 @@ def _generate_tree(current_path: Path):
     except FileNotFoundError:
         return []
     return tree
+
+
+def _count_nodes(nodes) -> int:
+    return sum(1 + _count_nodes(node["children"] or []) for node in nodes)
+
+
+def _refresh_nodes(nodes, paths: set[str], counts: dict) -> None:
+    """
+    Re-stat the file nodes whose paths are listed, in place.
+    """
+    for node in nodes:
+        if node["children"] is not None:
+            _refresh_nodes(node["children"], paths, counts)
+            continue
+        if node["file_path"] not in paths:
+            continue
+        try:
+            stat = os.stat(node["file_path"])
+        except FileNotFoundError:
+            continue
+        if (
+            stat.st_mtime != node["last_modified_time"]
+            or stat.st_size != node["file_size"]
+        ):
+            node["file_size"] = stat.st_size
+            node["last_modified_time"] = stat.st_mtime
+            counts["changed"] += 1
+
+
+def _update_tree(current_path: Path, cached_nodes, unchanged: bool, counts: dict):
+    """
+    Rebuild a directory's node list from its cached nodes.
+    When the directory's mtime is unchanged its entries are the same, so cached file
+    nodes are reused without a stat call and only subdirectories are visited.
+    Otherwise the directory is re-scanned and entries are diffed by path.
+
+    A directory's mtime only changes when entries are added, removed or renamed,
+    so in-place edits of files in an unchanged directory are picked up by a full
+    regeneration only.
+    """
+    if unchanged:
+        tree = []
+        for node in cached_nodes:
+            if node["children"] is None:
+                tree.append(node)
+                continue
+            item = Path(node["file_path"])
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                # Removed after the parent was listed; picked up on the next pass.
+                continue
+            tree.append(
+                {
+                    **node,
+                    "file_size": stat.st_size,
+                    "last_modified_time": stat.st_mtime,
+                    "children": _update_tree(
+                        item,
+                        node["children"],
+                        stat.st_mtime == node["last_modified_time"],
+                        counts,
+                    ),
+                }
+            )
+        return tree
+
+    cached_by_path = {node["file_path"]: node for node in cached_nodes}
+    tree = []
+    try:
+        entries = sorted(os.scandir(current_path), key=lambda e: Path(e.path))
+    except FileNotFoundError:
+        counts["removed"] += _count_nodes(cached_nodes)
+        return []
+    for entry in entries:
+        # Skip the cache file
+        if is_excluded_name(entry.name):
+            continue
+        try:
+            stat = entry.stat()
+            is_dir = entry.is_dir()
+        except FileNotFoundError:
+            continue
+        item = Path(entry.path)
+        cached_node = cached_by_path.pop(str(item), None)
+        if cached_node is not None and (cached_node["children"] is None) == is_dir:
+            # Type changed (file <-> directory): treat as removed and re-added.
+            counts["removed"] += 1 + _count_nodes(cached_node["children"] or [])
+            cached_node = None
+
+        item_data = {
+            "file_path": str(item),
+            "file_name": item.name,
+            "file_size": stat.st_size,
+            "last_modified_time": stat.st_mtime,
+            "file_type": "directory" if is_dir else item.suffix,
+            "children": None,
+        }
+        if cached_node is None:
+            counts["added"] += 1
+            if is_dir:
+                item_data["children"] = _generate_tree(item)
+                counts["added"] += _count_nodes(item_data["children"])
+        elif is_dir:
+            item_data["children"] = _update_tree(
+                item,
+                cached_node["children"],
+                stat.st_mtime == cached_node["last_modified_time"],
+                counts,
+            )
+        elif (
+            stat.st_mtime != cached_node["last_modified_time"]
+            or stat.st_size != cached_node["file_size"]
+        ):
+            counts["changed"] += 1
+        tree.append(item_data)
+
+    for removed in cached_by_path.values():
+        counts["removed"] += 1 + _count_nodes(removed["children"] or [])
+    return tree
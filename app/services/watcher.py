@@ -0,0 +1,428 @@
+import os
+import stat as stat_module
+import threading
+import time
+from pathlib import Path
+
+from app.cache import journal
+from app.cache.journal import JournalChanges, JournalEvent, SnapshotEntry
+from app.cache.utils import (
+    SAVED_JOURNAL_DB,
+    VDR_DB_DIR,
+    is_cache_file,
+    is_excluded_name,
+)
+from app.core.config import settings
+from app.core.logging import log_event
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is a dependency; fall back to polling if it is missing
+    FileSystemEventHandler = object
+    Observer = None
+
+# Journal consumers, each with its own cursor.
+TREE_CONSUMER = "tree"
+SUMMARY_CONSUMER = "summary"
+INDEX_CONSUMER = "index"
+
+# Events arriving within this window are applied in one transaction.
+_EVENT_BATCH_DELAY_S = 0.2
+# How often an idle watchdog-driven watcher wakes up to prune and resync.
+_IDLE_WAKEUP_S = 2.0
+
+_polling_warned = False
+_polling_warned_lock = threading.Lock()
+
+
+def _warn_polling_fallback() -> None:
+    global _polling_warned
+    with _polling_warned_lock:
+        if _polling_warned:
+            return
+        _polling_warned = True
+    log_event(
+        "watcher_polling_fallback",
+        reason="watchdog is not installed",
+        poll_interval_s=settings.WATCHER_POLL_INTERVAL_S,
+    )
+
+
+def _is_ignored(rel_path: str) -> bool:
+    parts = Path(rel_path).parts
+    return (
+        not parts
+        or parts[0] in (os.curdir, os.pardir)
+        or VDR_DB_DIR in parts
+        or is_cache_file(parts[-1])
+    )
+
+
+def _entry(stat: os.stat_result, is_dir: bool) -> SnapshotEntry:
+    return SnapshotEntry(is_dir, 0 if is_dir else stat.st_size, stat.st_mtime)
+
+
+def _walk(root: Path, rel_dir: str = "") -> dict[str, SnapshotEntry]:
+    """
+    Snapshot every entry below root/rel_dir, keyed by path relative to root.
+    """
+    snapshot: dict[str, SnapshotEntry] = {}
+    stack = [rel_dir]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(root / current) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+        for entry in entries:
+            if is_excluded_name(entry.name):
+                continue
+            rel = os.path.join(current, entry.name) if current else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                snapshot[rel] = _entry(entry.stat(follow_symlinks=False), is_dir)
+            except FileNotFoundError:
+                continue
+            if is_dir:
+                stack.append(rel)
+    return snapshot
+
+
+def _diff_snapshots(
+    old: dict[str, SnapshotEntry], new: dict[str, SnapshotEntry]
+) -> list[JournalEvent]:
+    events = []
+    for path, entry in old.items():
+        current = new.get(path)
+        if current is None or current.is_dir != entry.is_dir:
+            events.append(JournalEvent(journal.DELETED, path, entry.is_dir))
+    for path, entry in new.items():
+        previous = old.get(path)
+        if previous is None or previous.is_dir != entry.is_dir:
+            events.append(JournalEvent(journal.CREATED, path, entry.is_dir))
+        elif not entry.is_dir and entry != previous:
+            events.append(JournalEvent(journal.MODIFIED, path))
+    return events
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "FolderWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        self.watcher.enqueue(
+            event.src_path, getattr(event, "dest_path", None) or None
+        )
+
+
+class FolderWatcher:
+    """
+    Records create, modify, delete and move events of one folder in its journal
+    (VDR_DB/.journal.db) and keeps a snapshot of the folder state next to it.
+
+    Events come from watchdog (inotify on Linux). If watchdog cannot be imported
+    the folder is re-scanned every WATCHER_POLL_INTERVAL_S instead. On start the live
+    folder is diffed against the stored snapshot, so changes made while the
+    process was down are journaled as well. Paths are stored relative to the folder.
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder.resolve()
+        self.db_path = self.folder / VDR_DB_DIR / SAVED_JOURNAL_DB
+        self.mode = "inotify" if Observer is not None else "polling"
+        self.live = False
+        self.last_used = time.monotonic()
+        self._snapshot: dict[str, SnapshotEntry] = {}
+        self._pending: list[tuple[str, str | None]] = []
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name=f"watcher:{self.folder}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.live = False
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, src_path: str, dest_path: str | None = None) -> None:
+        with self._pending_lock:
+            self._pending.append((src_path, dest_path))
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        observer = None
+        try:
+            if Observer is not None:
+                # Start observing before the resync so nothing falls in between.
+                observer = Observer()
+                observer.schedule(_EventHandler(self), str(self.folder), recursive=True)
+                observer.start()
+            else:
+                _warn_polling_fallback()
+            self.resync()
+            self.live = True
+            log_event("watcher_start", folder_path=str(self.folder), mode=self.mode)
+            last_resync = time.monotonic()
+            while not self._stop.is_set():
+                if observer is None:
+                    if self._stop.wait(settings.WATCHER_POLL_INTERVAL_S):
+                        break
+                    self.resync()
+                else:
+                    self._wakeup.wait(_IDLE_WAKEUP_S)
+                    self._wakeup.clear()
+                    if self._stop.wait(_EVENT_BATCH_DELAY_S):
+                        break
+                    self._apply_pending()
+                    # Periodic rescan covers events the OS dropped (queue overflow).
+                    if (
+                        time.monotonic() - last_resync
+                        >= settings.WATCHER_RESYNC_INTERVAL_S
+                    ):
+                        self.resync()
+                        last_resync = time.monotonic()
+                journal.prune(self.db_path, settings.WATCHER_JOURNAL_MAX_EVENTS)
+        except Exception as e:
+            log_event("watcher_error", folder_path=str(self.folder), error=str(e))
+        finally:
+            self.live = False
+            if observer is not None:
+                observer.stop()
+                observer.join(timeout=5)
+
+    def resync(self) -> None:
+        """
+        Diff the live folder against the snapshot and journal the differences.
+        Without a stored snapshot the current state becomes the baseline.
+        """
+        start = time.perf_counter()
+        baseline = not self._snapshot and not journal.has_snapshot(self.db_path)
+        if not self._snapshot and not baseline:
+            self._snapshot = journal.load_snapshot(self.db_path)
+        with self._pending_lock:
+            # The rescan supersedes anything queued before it.
+            self._pending.clear()
+        current = _walk(self.folder)
+        if baseline:
+            journal.record_changes(self.db_path, [], current, baseline=True)
+            events = []
+        else:
+            events = _diff_snapshots(self._snapshot, current)
+            journal.record_changes(
+                self.db_path,
+                events,
+                {e.path: current[e.path] for e in events if e.path in current},
+                [e.path for e in events if e.path not in current],
+            )
+        self._snapshot = current
+        if baseline or events:
+            log_event(
+                "watcher_resync",
+                duration_s=time.perf_counter() - start,
+                folder_path=str(self.folder),
+                baseline=baseline,
+                event_count=len(events),
+            )
+
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.folder)
+
+    def _descendants(self, rel_dir: str) -> list[str]:
+        prefix = rel_dir + os.sep
+        return [path for path in self._snapshot if path.startswith(prefix)]
+
+    def _apply_pending(self) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        events: list[JournalEvent] = []
+        upserts: dict[str, SnapshotEntry] = {}
+        deletes: set[str] = set()
+
+        def remove(rel: str) -> None:
+            for path in [rel, *self._descendants(rel)]:
+                entry = self._snapshot.pop(path)
+                events.append(JournalEvent(journal.DELETED, path, entry.is_dir))
+                upserts.pop(path, None)
+                deletes.add(path)
+
+        def add(rel: str, entry: SnapshotEntry) -> None:
+            added = {rel: entry}
+            if entry.is_dir:
+                added.update(_walk(self.folder, rel))
+            for path, added_entry in added.items():
+                if path in self._snapshot:
+                    continue
+                self._snapshot[path] = added_entry
+                events.append(JournalEvent(journal.CREATED, path, added_entry.is_dir))
+                upserts[path] = added_entry
+                deletes.discard(path)
+
+        def reconcile(rel: str) -> None:
+            if _is_ignored(rel):
+                return
+            try:
+                stat = os.lstat(self.folder / rel)
+            except (FileNotFoundError, NotADirectoryError):
+                if rel in self._snapshot:
+                    remove(rel)
+                return
+            live = _entry(stat, stat_module.S_ISDIR(stat.st_mode))
+            previous = self._snapshot.get(rel)
+            if previous is not None and previous.is_dir != live.is_dir:
+                remove(rel)
+                previous = None
+            if previous is None:
+                add(rel, live)
+            elif live != previous:
+                self._snapshot[rel] = upserts[rel] = live
+                if not live.is_dir:
+                    events.append(JournalEvent(journal.MODIFIED, rel))
+
+        def move(src: str, dest: str) -> None:
+            if _is_ignored(src) or src not in self._snapshot:
+                reconcile(dest)
+                return
+            if _is_ignored(dest):
+                remove(src)
+                return
+            if dest in self._snapshot:
+                # Replaced an existing entry, e.g. an editor's atomic save.
+                remove(dest)
+            for path in [src, *self._descendants(src)]:
+                new_path = dest + path[len(src) :]
+                entry = self._snapshot.pop(path)
+                self._snapshot[new_path] = upserts[new_path] = entry
+                upserts.pop(path, None)
+                deletes.add(path)
+                deletes.discard(new_path)
+                events.append(
+                    JournalEvent(journal.MOVED, path, entry.is_dir, dest_path=new_path)
+                )
+
+        for src_path, dest_path in pending:
+            if dest_path:
+                move(self._relative(src_path), self._relative(dest_path))
+            else:
+                reconcile(self._relative(src_path))
+
+        if events or upserts:
+            journal.record_changes(self.db_path, events, upserts, deletes)
+
+
+_WATCHERS: dict[str, FolderWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def ensure_watching(folder: Path) -> FolderWatcher | None:
+    """
+    Start watching a folder that has a VDR_DB directory, if watching is enabled.
+    Beyond WATCHER_MAX_FOLDERS the least recently used watcher is stopped.
+    """
+    if not settings.WATCHER_ENABLED or not (folder / VDR_DB_DIR).is_dir():
+        return None
+    key = str(folder.resolve())
+    evicted = None
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None or not watcher.alive:
+            if watcher is None and len(_WATCHERS) >= settings.WATCHER_MAX_FOLDERS:
+                oldest = min(_WATCHERS, key=lambda k: _WATCHERS[k].last_used)
+                evicted = _WATCHERS.pop(oldest)
+            watcher = _WATCHERS[key] = FolderWatcher(folder)
+            watcher.start()
+        watcher.last_used = time.monotonic()
+    if evicted is not None:
+        evicted.stop()
+        log_event("watcher_evicted", folder_path=str(evicted.folder))
+    return watcher
+
+
+def _live_watcher(folder: Path) -> FolderWatcher | None:
+    watcher = ensure_watching(folder)
+    if watcher is None or not watcher.live:
+        return None
+    return watcher
+
+
+def journal_seq(folder: Path) -> int | None:
+    """
+    Current journal position of a watched folder, to acknowledge after a full scan.
+    None when the folder is not watched.
+    """
+    watcher = _live_watcher(folder)
+    if watcher is None:
+        return None
+    return journal.latest_seq(watcher.db_path)
+
+
+def pending_changes(folder: Path, consumer: str) -> JournalChanges | None:
+    """
+    Return the changes journaled since the consumer last acknowledged, with
+    absolute paths under `folder`. None means the journal cannot answer (the
+    folder is not watched yet, or the consumer has no valid cursor) and the
+    caller should scan the folder instead.
+    """
+    watcher = _live_watcher(folder)
+    if watcher is None:
+        return None
+    cursor = journal.get_cursor(watcher.db_path, consumer)
+    if cursor is None:
+        return None
+    changes = journal.load_changes(watcher.db_path, cursor)
+
+    def absolute(rel: str) -> str:
+        return str(folder / rel)
+
+    changes.added = [absolute(p) for p in changes.added]
+    changes.removed = [absolute(p) for p in changes.removed]
+    changes.modified = [absolute(p) for p in changes.modified]
+    changes.moved = [(absolute(src), absolute(dest)) for src, dest in changes.moved]
+    changes.directories = {absolute(p) for p in changes.directories}
+    log_event(
+        "journal_read",
+        folder_path=str(folder),
+        consumer=consumer,
+        added=len(changes.added),
+        removed=len(changes.removed),
+        modified=len(changes.modified),
+    )
+    return changes
+
+
+def acknowledge(folder: Path, consumer: str, seq: int | None) -> None:
+    """
+    Move the consumer's cursor to seq once it has processed everything up to it.
+    """
+    if seq is None or not settings.WATCHER_ENABLED:
+        return
+    db_path = folder / VDR_DB_DIR / SAVED_JOURNAL_DB
+    if db_path.exists():
+        journal.set_cursor(db_path, consumer, seq)
+
+
+def stop_watchers() -> None:
+    with _WATCHERS_LOCK:
+        watchers = list(_WATCHERS.values())
+        _WATCHERS.clear()
+    for watcher in watchers:
+        watcher.stop()
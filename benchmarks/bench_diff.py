@@ -0,0 +1,132 @@
+"""
+Benchmark the /diff engine against the previous rglob-based implementation.
+
+Builds a synthetic tree (default 100 x 10 directories with 100 files each,
+i.e. 100k files), generates the cached tree, then times each implementation
+on an unchanged tree, a deep added file and a file edited in place.
+
+    uv run python -m benchmarks.bench_diff [--root DIR] [--files-per-dir N]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.cache.utils import (
+    SAVED_TREE_DB,
+    VDR_DB_DIR,
+    get_json_from_cache,
+    is_cache_file,
+)
+from app.services.diff_check import check_diff, compute_diff
+from app.services.tree_generator import get_tree
+
+
+def legacy_check_diff(folder_path: Path) -> bool:
+    # The rglob implementation /diff used before the scandir engine.
+    db_path = folder_path / VDR_DB_DIR / SAVED_TREE_DB
+    cached_tree = get_json_from_cache(db_path, "tree")
+    if not cached_tree:
+        return False
+
+    cached_files = {}
+
+    def flatten_tree(nodes):
+        for node in nodes:
+            cached_files[node["file_path"]] = node["last_modified_time"]
+            if node.get("children"):
+                flatten_tree(node["children"])
+
+    flatten_tree(cached_tree)
+
+    current_files = {}
+    for item in folder_path.rglob("*"):
+        if is_cache_file(item.name) or VDR_DB_DIR in item.parts:
+            continue
+        try:
+            current_files[str(item)] = item.stat().st_mtime
+        except FileNotFoundError:
+            continue
+
+    if set(cached_files.keys()) != set(current_files.keys()):
+        return True
+    for path, mtime in current_files.items():
+        if path in cached_files and cached_files[path] != mtime:
+            return True
+    return False
+
+
+def build_tree(root: Path, top_dirs: int, sub_dirs: int, files_per_dir: int) -> int:
+    count = 0
+    for i in range(top_dirs):
+        for j in range(sub_dirs):
+            directory = root / f"d{i:03d}" / f"s{j:02d}"
+            directory.mkdir(parents=True)
+            for k in range(files_per_dir):
+                (directory / f"f{k:04d}.txt").touch()
+                count += 1
+    return count
+
+
+def timed(func, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(root: Path) -> None:
+    implementations = {
+        "legacy": legacy_check_diff,
+        "fast": check_diff,
+        "full": lambda path: compute_diff(path).changed,
+    }
+
+    def report(scenario: str) -> None:
+        for name, func in implementations.items():
+            seconds, changed = timed(func, root)
+            print(f"{scenario:<10} {name:<7} {seconds * 1000:9.1f} ms  changed={changed}")
+
+    report("unchanged")
+
+    # A new file in the last directory visited: worst case for early exit.
+    last_dir = sorted(p for p in root.iterdir() if p.is_dir() and p.name != VDR_DB_DIR)[-1]
+    added = last_dir / "s00" / "new.txt"
+    added.touch()
+    report("added")
+    added.unlink()
+    get_tree(root, regenerate=True)
+
+    # Edited in place: the directory mtime does not move.
+    edited = last_dir / "s00" / "f0000.txt"
+    later = time.time() + 10
+    os.utime(edited, (later, later))
+    report("modified")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--root", type=Path, default=None)
+    parser.add_argument("--top-dirs", type=int, default=100)
+    parser.add_argument("--sub-dirs", type=int, default=10)
+    parser.add_argument("--files-per-dir", type=int, default=100)
+    args = parser.parse_args()
+
+    root = args.root or Path(tempfile.mkdtemp(prefix="bench_diff_"))
+    try:
+        count = build_tree(root, args.top_dirs, args.sub_dirs, args.files_per_dir)
+        get_tree(root, regenerate=True)
+        print(f"{count} files under {root}")
+        run(root)
+    finally:
+        if args.root is None:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
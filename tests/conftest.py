@@ -0,0 +1,11 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read at import time: keep logs and caches out of the working tree
+# and let the OpenAI clients be constructed without real credentials.
+_TMP = Path(tempfile.mkdtemp(prefix="pdf-summary-tests-"))
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("LOG_FILE_PATH", str(_TMP / "event_times.log"))
+os.environ.setdefault("LLM_CACHE_PATH", str(_TMP / "llmcache.db"))
+os.environ.setdefault("EMBEDDING_CACHE_PATH", str(_TMP / "embeddingcache.db"))
@@ -0,0 +1,62 @@
+import hashlib
+from typing import Any, Callable
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class RecordingChatModel(BaseChatModel):
+    """
+    Chat model answering each prompt with respond(prompt) and recording the
+    prompts it was sent. Streams its answer one word at a time.
+    """
+
+    model_name: str = "fake-model"
+    respond: Callable[[str], str] = lambda prompt: "answer"
+    prompts: list[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def _answer(self, messages: list[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        self.prompts.append(prompt)
+        return self.respond(prompt)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        for i, word in enumerate(self._answer(messages).split(" ")):
+            text = word if i == 0 else " " + word
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+class RecordingEmbeddings(Embeddings):
+    """
+    Embeddings derived from a hash of each text, recording every batch it was
+    asked to embed. Batches containing fail_on raise instead.
+    """
+
+    model = "fake-embedding"
+
+    def __init__(self, fail_on: str | None = None):
+        self.fail_on = fail_on
+        self.batches: list[list[str]] = []
+
+    def _vector(self, text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [byte / 255 for byte in digest[:8]]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        if self.fail_on is not None and any(self.fail_on in text for text in texts):
+            raise RuntimeError("embedding failed")
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._vector(text)
@@ -0,0 +1,54 @@
+import threading
+
+from app.cache.engine import CacheEngine
+
+_SCHEMA = ("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, value TEXT)",)
+
+
+def _put(engine, db_path, key, value):
+    with engine.connection(db_path, _SCHEMA) as conn:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO items VALUES (?, ?)", (key, value))
+
+
+def _get(engine, db_path, key):
+    with engine.connection(db_path, _SCHEMA) as conn:
+        row = conn.execute("SELECT value FROM items WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def test_readers_hold_connections_concurrently(tmp_path):
+    engine = CacheEngine()
+    db_path = tmp_path / "cache.db"
+    _put(engine, db_path, "a", "1")
+    # Both readers must be inside their connection block at the same time.
+    barrier = threading.Barrier(2, timeout=5)
+    results = []
+
+    def read():
+        with engine.connection(db_path, _SCHEMA) as conn:
+            barrier.wait()
+            results.append(conn.execute("SELECT value FROM items").fetchone()[0])
+
+    threads = [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["1", "1"]
+    engine.close_all()
+
+
+def test_deleted_database_is_reopened(tmp_path):
+    engine = CacheEngine()
+    db_path = tmp_path / "cache.db"
+    _put(engine, db_path, "a", "1")
+    for path in tmp_path.iterdir():
+        path.unlink()
+
+    _put(engine, db_path, "b", "2")
+
+    assert db_path.exists()
+    assert _get(engine, db_path, "a") is None
+    assert _get(engine, db_path, "b") == "2"
+    engine.close_all()
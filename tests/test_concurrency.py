@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from app.llm import concurrency
+from app.llm.concurrency import AdaptiveLimiter
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def _complete(limiter, latency, error=None):
+    limiter.acquire_sync()
+    limiter.release(time.perf_counter() - latency, error)
+
+
+def test_limit_grows_on_success_regardless_of_latency():
+    limiter = AdaptiveLimiter("test", initial_limit=2, max_limit=10)
+    # One short answer followed by long ones must not stall growth.
+    _complete(limiter, 0.01)
+    for _ in range(20):
+        _complete(limiter, 5.0)
+    assert limiter.limit > 2
+
+
+def test_limit_backs_off_on_throttling():
+    limiter = AdaptiveLimiter("test", initial_limit=8)
+    _complete(limiter, 0.1, Throttled())
+    assert limiter.limit == 4
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(concurrency, "RETRY_BASE_DELAY_S", 0.0)
+
+
+def test_throttled_calls_are_retried_through_the_limiter(no_backoff):
+    limiter = AdaptiveLimiter("test", initial_limit=8)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Throttled()
+        return "ok"
+
+    assert limiter.call_sync(flaky) == "ok"
+    assert len(attempts) == 3
+    assert limiter.snapshot()["throttled"] == 2
+    assert limiter.snapshot()["in_flight"] == 0
+
+
+def test_other_errors_are_not_retried(no_backoff):
+    limiter = AdaptiveLimiter("test", initial_limit=8)
+    attempts = []
+
+    async def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        asyncio.run(limiter.call(broken))
+    assert len(attempts) == 1
@@ -0,0 +1,54 @@
+import os
+
+from app.services.diff_check import check_diff, compute_diff
+from app.services.tree_generator import get_tree
+
+
+def _make_folder(tmp_path):
+    folder = tmp_path / "docs"
+    (folder / "reports").mkdir(parents=True)
+    (folder / "a.txt").write_text("alpha")
+    (folder / "reports" / "b.txt").write_text("beta")
+    get_tree(folder)
+    return folder
+
+
+def _touch_later(path):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_unchanged_folder_has_no_diff(tmp_path):
+    folder = _make_folder(tmp_path)
+
+    assert check_diff(folder) is False
+
+
+def test_in_place_edit_is_detected(tmp_path):
+    folder = _make_folder(tmp_path)
+    nested = folder / "reports" / "b.txt"
+    directory_mtime = nested.parent.stat().st_mtime
+    nested.write_text("beta, edited")
+    _touch_later(nested)
+    os.utime(nested.parent, (directory_mtime, directory_mtime))
+
+    assert check_diff(folder) is True
+    assert compute_diff(folder).modified == [str(nested)]
+
+
+def test_new_nested_file_is_detected(tmp_path):
+    folder = _make_folder(tmp_path)
+    (folder / "reports" / "c.txt").write_text("gamma")
+
+    assert check_diff(folder) is True
+
+
+def test_dangling_symlink_is_ignored_like_in_full_mode(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    (folder / "a.txt").write_text("alpha")
+    (folder / "broken").symlink_to(folder / "missing")
+    get_tree(folder)
+
+    assert check_diff(folder) is False
+    assert compute_diff(folder).changed is False
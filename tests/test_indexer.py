@@ -0,0 +1,282 @@
+import asyncio
+import threading
+from contextlib import nullcontext
+
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.api.v1.endpoints import rag as rag_endpoint
+from app.cache.index_sources import load_index_sources, save_index_sources
+from app.cache.utils import SAVED_INDEX_DB, VDR_DB_DIR
+from app.rag import indexer
+from app.rag.lexical import LexicalIndex, lexical_db_path
+from app.rag.query_cache import lookup_query_result, store_query_result
+from app.rag.vector_store import chroma_collection
+from app.schemas.rag import IndexFolderRequest
+from tests.fakes import RecordingEmbeddings
+
+
+def _paragraphs(*names: str) -> str:
+    # One chunk per paragraph with the default splitter settings.
+    return "\n\n".join(f"Paragraph {name}. " + "filler text " * 8 for name in names)
+
+
+def _counts(**counts: int) -> dict[str, int]:
+    keys = ("added", "updated", "moved", "deleted", "skipped", "errors")
+    return {key: counts.get(key, 0) for key in keys}
+
+
+class _Folder:
+    def __init__(self, path, monkeypatch):
+        self.path = path
+        self.embeddings = RecordingEmbeddings()
+        self.store = Chroma(
+            collection_name="tests",
+            embedding_function=self.embeddings,
+            persist_directory=str(path / VDR_DB_DIR / "chroma"),
+        )
+        self.loads: list[str] = []
+        monkeypatch.setattr(indexer, "vector_store_lease", self._lease)
+        monkeypatch.setattr(indexer, "get_embedding_cache", lambda: None)
+        monkeypatch.setattr(indexer, "load_file", self._load)
+
+    def _lease(self, folder):
+        return nullcontext(self.store)
+
+    def _load(self, path):
+        # Files are plain text under a supported suffix.
+        self.loads.append(path.name)
+        if "unreadable" in path.name:
+            raise ValueError("cannot parse")
+        return [Document(page_content=path.read_text(), metadata={})]
+
+    def write(self, name: str, *paragraphs: str):
+        path = self.path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(_paragraphs(*paragraphs))
+        return path
+
+    def index(self, regenerate: bool = False) -> dict[str, int]:
+        return indexer.index_folder(self.path, regenerate)
+
+    def chunks(self) -> dict[str, list[str]]:
+        # Source file name -> sorted chunk texts stored for it.
+        stored = self.store.get(include=["metadatas", "documents"])
+        by_name: dict[str, list[str]] = {}
+        for metadata, document in zip(stored["metadatas"], stored["documents"]):
+            name = metadata["source"].rsplit("/", 1)[-1]
+            by_name.setdefault(name, []).append(document.split(".")[0])
+        return {name: sorted(texts) for name, texts in by_name.items()}
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    root = tmp_path / "docs"
+    root.mkdir()
+    return _Folder(root, monkeypatch)
+
+
+def test_edited_file_loses_its_stale_chunks_before_the_next_file(folder, monkeypatch):
+    folder.write("a.pdf", "a1", "a2")
+    folder.write("b.pdf", "b1")
+    folder.index()
+
+    folder.write("a.pdf", "a1", "a3")
+    folder.write("b.pdf", "b2")
+    seen_when_b_embedded = []
+    embed = folder.embeddings.embed_documents
+
+    def embed_documents(texts):
+        if any(text.startswith("Paragraph b2") for text in texts):
+            seen_when_b_embedded.extend(folder.chunks()["a.pdf"])
+        return embed(texts)
+
+    monkeypatch.setattr(folder.embeddings, "embed_documents", embed_documents)
+    monkeypatch.setattr(indexer.settings, "INDEX_EMBED_BATCH_SIZE", 1)
+    monkeypatch.setattr(indexer.settings, "INDEX_EMBED_CONCURRENCY", 1)
+    monkeypatch.setattr(indexer.settings, "INDEX_WRITE_BATCH_SIZE", 1)
+
+    assert folder.index() == _counts(updated=2)
+    assert seen_when_b_embedded == ["Paragraph a1", "Paragraph a3"]
+    assert folder.chunks() == {
+        "a.pdf": ["Paragraph a1", "Paragraph a3"],
+        "b.pdf": ["Paragraph b2"],
+    }
+
+
+def test_saved_source_map_is_rebuilt_when_ids_disagree(folder):
+    folder.write("a.pdf", "a1", "a2")
+    folder.index()
+    db_path = folder.path / VDR_DB_DIR / SAVED_INDEX_DB
+    sources = load_index_sources(db_path)
+    (source,) = sources
+    # Same chunk count, but ids the collection does not have.
+    sources[source].ids = ["missing-1", "missing-2"]
+    save_index_sources(db_path, sources)
+
+    folder.write("a.pdf", "a1")
+    folder.index()
+
+    assert folder.chunks() == {"a.pdf": ["Paragraph a1"]}
+    assert chroma_collection(folder.store).count() == 1
+
+
+def test_chunks_of_several_files_share_an_embedding_batch(folder):
+    folder.write("a.pdf", "a1", "a2")
+    folder.write("b.pdf", "b1")
+    folder.write("sub/c.pdf", "c1")
+
+    assert folder.index() == _counts(added=3)
+    assert len(folder.embeddings.batches) == 1
+    assert len(folder.embeddings.batches[0]) == 4
+
+
+def test_batches_respect_the_size_limit(folder, monkeypatch):
+    monkeypatch.setattr(indexer.settings, "INDEX_EMBED_BATCH_SIZE", 3)
+    folder.write("a.pdf", "a1", "a2")
+    folder.write("b.pdf", "b1", "b2", "b3")
+
+    folder.index()
+
+    assert [len(batch) for batch in folder.embeddings.batches] == [3, 2]
+
+
+def test_unchanged_files_are_skipped_without_parsing(folder):
+    folder.write("a.pdf", "a1")
+    folder.index()
+    folder.loads.clear()
+
+    assert folder.index() == _counts(skipped=1)
+    assert folder.loads == []
+
+
+def test_failed_file_drops_its_new_chunks_and_keeps_the_old_version(
+    folder, monkeypatch
+):
+    folder.write("a.pdf", "a1")
+    folder.write("b.pdf", "b1")
+    folder.index()
+    monkeypatch.setattr(indexer.settings, "INDEX_EMBED_BATCH_SIZE", 1)
+    monkeypatch.setattr(indexer.settings, "INDEX_EMBED_CONCURRENCY", 1)
+    monkeypatch.setattr(indexer.settings, "INDEX_WRITE_BATCH_SIZE", 1)
+    folder.embeddings.fail_on = "Paragraph b3"
+    folder.write("a.pdf", "a2")
+    folder.write("b.pdf", "b2", "b3")
+
+    assert folder.index() == _counts(updated=1, errors=1)
+    assert folder.chunks() == {"a.pdf": ["Paragraph a2"], "b.pdf": ["Paragraph b1"]}
+
+    # The failed file is retried on the next run.
+    folder.embeddings.fail_on = None
+    assert folder.index() == _counts(updated=1, skipped=1)
+    assert folder.chunks()["b.pdf"] == ["Paragraph b2", "Paragraph b3"]
+
+
+def test_unreadable_file_does_not_stop_the_run(folder):
+    folder.write("a.pdf", "a1")
+    folder.write("unreadable.pdf", "u1")
+
+    assert folder.index() == _counts(added=1, errors=1)
+    assert folder.chunks() == {"a.pdf": ["Paragraph a1"]}
+
+
+def test_duplicate_content_is_embedded_once_and_copied(folder):
+    folder.write("a.pdf", "d1", "d2")
+    folder.write("b.pdf", "d1", "d2")
+
+    assert folder.index() == _counts(added=2)
+    embedded = [text for batch in folder.embeddings.batches for text in batch]
+    assert len(embedded) == 2
+    # b.pdf is decided in a second pass and copies the chunks stored for a.pdf.
+    assert folder.loads == ["a.pdf"]
+    assert folder.chunks() == {
+        "a.pdf": ["Paragraph d1", "Paragraph d2"],
+        "b.pdf": ["Paragraph d1", "Paragraph d2"],
+    }
+    assert chroma_collection(folder.store).count() == 4
+
+
+def test_renamed_file_keeps_its_embeddings(folder):
+    path = folder.write("a.pdf", "a1", "a2")
+    folder.index()
+    folder.embeddings.batches.clear()
+    path.rename(folder.path / "renamed.pdf")
+
+    assert folder.index() == _counts(moved=1)
+    assert folder.embeddings.batches == []
+    assert folder.chunks() == {"renamed.pdf": ["Paragraph a1", "Paragraph a2"]}
+
+
+def test_deleted_file_loses_its_chunks(folder):
+    folder.write("a.pdf", "a1")
+    path = folder.write("b.pdf", "b1")
+    folder.index()
+    path.unlink()
+
+    assert folder.index() == _counts(deleted=1, skipped=1)
+    assert folder.chunks() == {"a.pdf": ["Paragraph a1"]}
+
+
+def test_changes_expire_cached_answers(folder):
+    folder.write("a.pdf", "a1")
+    folder.index()
+    version, _ = lookup_query_result(folder.path, "key")
+    store_query_result(folder.path, "key", version, {"answer": "cached"})
+
+    folder.index()
+    assert lookup_query_result(folder.path, "key") == (version, {"answer": "cached"})
+
+    folder.write("a.pdf", "a2")
+    folder.index()
+    assert lookup_query_result(folder.path, "key") == (version + 1, None)
+
+
+def test_lexical_index_follows_the_store(folder):
+    folder.write("a.pdf", "alpha")
+    path = folder.write("b.pdf", "beta")
+    folder.index()
+    lexical = LexicalIndex(lexical_db_path(folder.path))
+
+    assert [doc.metadata["source"] for doc in lexical.search("beta", 4)] == [
+        str(path.resolve())
+    ]
+
+    path.unlink()
+    folder.index()
+    assert lexical.search("beta", 4) == []
+
+
+def test_new_file_at_a_moved_files_old_path_gets_its_own_chunks(folder):
+    path = folder.write("a.pdf", "p1", "p2")
+    folder.index()
+    path.rename(folder.path / "b.pdf")
+    assert folder.index() == _counts(moved=1)
+
+    folder.write("a.pdf", "p1", "p3")
+    assert folder.index() == _counts(added=1, skipped=1)
+
+    assert folder.chunks() == {
+        "a.pdf": ["Paragraph p1", "Paragraph p3"],
+        "b.pdf": ["Paragraph p1", "Paragraph p2"],
+    }
+    assert chroma_collection(folder.store).count() == 4
+    lexical = LexicalIndex(lexical_db_path(folder.path))
+    assert {doc.metadata["source"] for doc in lexical.search("p2", 4)} == {
+        str((folder.path / "b.pdf").resolve())
+    }
+
+
+def test_index_endpoint_does_not_block_the_event_loop(folder, monkeypatch):
+    threads = []
+
+    def index_folder(path, regenerate=False):
+        threads.append(threading.current_thread())
+        return _counts()
+
+    monkeypatch.setattr(rag_endpoint, "index_folder", index_folder)
+    request = IndexFolderRequest(folder_path=str(folder.path))
+
+    asyncio.run(rag_endpoint.index_folder_endpoint(request))
+
+    assert threads[0] is not threading.main_thread()
@@ -0,0 +1,49 @@
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.rag.lexical import LexicalIndex, reciprocal_rank_fusion, tokenize
+from tests.fakes import RecordingEmbeddings
+
+
+def test_tokenize_folds_case_and_splits_cjk_into_bigrams():
+    assert tokenize("Hello, ＷＯＲＬＤ_2") == ["hello", "world", "2"]
+    assert tokenize("東京都の天気") == ["東京", "京都", "都の", "の天", "天気"]
+    assert tokenize("GPU性能") == ["gpu", "性能"]
+
+
+def test_search_ranks_matching_chunks(tmp_path):
+    index = LexicalIndex(tmp_path / "lexical.db")
+    index.add(
+        [
+            ("a", "quarterly revenue grew", {"source": "a.pdf"}),
+            ("b", "revenue revenue forecast", {"source": "b.pdf"}),
+            ("c", "unrelated text", {"source": "c.pdf"}),
+        ]
+    )
+
+    assert [doc.id for doc in index.search("revenue forecast", 4)] == ["b", "a"]
+
+    index.delete(["b"])
+    assert [doc.id for doc in index.search("revenue forecast", 4)] == ["a"]
+
+
+def test_sync_rebuilds_from_the_collection(tmp_path):
+    store = Chroma(
+        collection_name="tests",
+        embedding_function=RecordingEmbeddings(),
+        persist_directory=str(tmp_path / "chroma"),
+    )
+    store.add_texts(["alpha chunk", "beta chunk"], ids=["a", "b"])
+    index = LexicalIndex(tmp_path / "chroma" / "lexical.db")
+
+    index.sync(store)
+
+    assert [doc.id for doc in index.search("beta", 4)] == ["b"]
+
+
+def test_reciprocal_rank_fusion_prefers_documents_in_both_lists():
+    a, b, c = (Document(id=i, page_content=i) for i in "abc")
+
+    fused = reciprocal_rank_fusion([[a, b], [c, b]], k=2)
+
+    assert [doc.id for doc in fused] == ["b", "a"]
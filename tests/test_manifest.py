@@ -0,0 +1,59 @@
+import os
+
+from app.services import manifest
+from app.services.manifest import manifest_files, scan_manifest
+
+
+def _make_folder(tmp_path):
+    folder = tmp_path / "docs"
+    (folder / "b_dir" / "inner").mkdir(parents=True)
+    (folder / "a_dir").mkdir()
+    for rel in ("z.txt", "a_dir/x.txt", "b_dir/y.txt", "b_dir/inner/w.txt", "c.txt"):
+        (folder / rel).write_text(rel)
+    return folder
+
+
+def test_files_are_listed_in_os_walk_order(tmp_path):
+    folder = _make_folder(tmp_path)
+    expected = [
+        os.path.join(root, name)
+        for root, dirs, files in os.walk(folder)
+        if "VDR_DB" not in root.split(os.sep)
+        for name in files
+    ]
+
+    scanned = [entry.path for entry in manifest_files(scan_manifest(folder))]
+
+    assert scanned == expected
+
+
+def test_scan_is_reused_while_the_journal_is_unchanged(tmp_path, monkeypatch):
+    folder = _make_folder(tmp_path)
+    seq = {"value": 1}
+    walks = []
+    walk = manifest._walk
+    monkeypatch.setattr(manifest, "journal_seq", lambda _folder: seq["value"])
+    monkeypatch.setattr(
+        manifest, "_walk", lambda path: walks.append(path) or walk(path)
+    )
+
+    first = scan_manifest(folder)
+    second = scan_manifest(folder)
+    assert len(walks) == 1
+    assert second == first
+
+    (folder / "new.txt").write_text("new")
+    seq["value"] = 2
+    third = scan_manifest(folder)
+    assert len(walks) == 2
+    assert str(folder / "new.txt") in third
+
+
+def test_unwatched_folder_is_walked_every_time(tmp_path, monkeypatch):
+    folder = _make_folder(tmp_path)
+    monkeypatch.setattr(manifest, "journal_seq", lambda _folder: None)
+
+    scan_manifest(folder)
+    (folder / "new.txt").write_text("new")
+
+    assert str(folder / "new.txt") in scan_manifest(folder)
@@ -0,0 +1,74 @@
+from langchain_core.documents import Document
+
+from app.cache.index_sources import bump_index_version
+from app.cache.utils import SAVED_INDEX_DB, VDR_DB_DIR
+from app.rag import agent
+from app.rag.agent import RagAnswer, answer_question
+from app.rag.query_cache import (
+    clear_query_cache,
+    lookup_query_result,
+    normalize_question,
+    query_cache_key,
+    store_query_result,
+)
+from tests.fakes import RecordingChatModel
+
+
+def _indexed_folder(tmp_path):
+    folder = tmp_path / "docs"
+    (folder / VDR_DB_DIR).mkdir(parents=True)
+    bump_index_version(folder / VDR_DB_DIR / SAVED_INDEX_DB)
+    return folder
+
+
+def test_questions_differing_in_form_share_a_key():
+    assert normalize_question("  What is  RAG?? ") == "what is rag"
+    assert query_cache_key("What is RAG?", k=4) == query_cache_key("what is rag", k=4)
+    assert query_cache_key("What is RAG?", k=4) != query_cache_key("What is RAG?", k=8)
+
+
+def test_results_are_only_returned_for_the_current_index_version(tmp_path):
+    folder = _indexed_folder(tmp_path)
+    version, value = lookup_query_result(folder, "key")
+    assert value is None
+    store_query_result(folder, "key", version, {"answer": "cached"})
+
+    assert lookup_query_result(folder, "key") == (version, {"answer": "cached"})
+
+    bump_index_version(folder / VDR_DB_DIR / SAVED_INDEX_DB)
+    assert lookup_query_result(folder, "key") == (version + 1, None)
+
+
+def test_unindexed_folder_is_not_cached(tmp_path):
+    assert lookup_query_result(tmp_path, "key") == (None, None)
+
+
+def test_clear_drops_stored_results(tmp_path):
+    folder = _indexed_folder(tmp_path)
+    version, _ = lookup_query_result(folder, "key")
+    store_query_result(folder, "key", version, {"answer": "cached"})
+
+    clear_query_cache(folder)
+
+    assert lookup_query_result(folder, "key") == (version, None)
+
+
+def test_repeated_question_is_answered_from_the_cache(tmp_path, monkeypatch):
+    folder = _indexed_folder(tmp_path)
+    calls = []
+
+    def answer_direct(question, folder, k, retrieval):
+        calls.append(question)
+        source = Document(id="c1", page_content="chunk", metadata={"source": "a.pdf"})
+        return RagAnswer("generated", [source], "direct", {"total_s": 1.0})
+
+    monkeypatch.setattr(agent, "_answer_direct", answer_direct)
+    monkeypatch.setattr(agent, "get_answer_llm", lambda: RecordingChatModel())
+
+    first = answer_question("What is RAG?", str(folder), mode="direct")
+    second = answer_question("what is rag", str(folder), mode="direct")
+
+    assert calls == ["What is RAG?"]
+    assert not first.cached and second.cached
+    assert second.answer == "generated"
+    assert second.sources[0].metadata == {"source": "a.pdf"}
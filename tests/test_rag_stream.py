@@ -0,0 +1,109 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from app.llm.concurrency import get_limiter
+from app.rag import agent
+from app.rag.agent import astream_answer
+from tests.fakes import RecordingChatModel
+
+
+def _collect(stream, on_token=None):
+    async def run():
+        events = []
+        async for event in stream:
+            events.append(event)
+            if on_token is not None and event["type"] == "token":
+                await on_token()
+        return events
+
+    return asyncio.run(run())
+
+
+def _setup(monkeypatch, tmp_path, llm, retrieve=None):
+    source = Document(id="c1", page_content="chunk", metadata={"source": "a.pdf"})
+    monkeypatch.setattr(
+        agent, "retrieve", retrieve or (lambda folder, question, k, mode: [source])
+    )
+    monkeypatch.setattr(agent, "get_answer_llm", lambda: llm)
+    monkeypatch.setattr(agent, "get_llm_cache", lambda: None)
+    return str(tmp_path)
+
+
+def test_limiter_slot_is_released_before_the_client_reads_all_tokens(
+    monkeypatch, tmp_path
+):
+    llm = RecordingChatModel(model_name="stream-slot", respond=lambda _: "a b c d")
+    folder = _setup(monkeypatch, tmp_path, llm)
+    limiter = get_limiter(llm)
+    in_flight = []
+
+    async def slow_client():
+        await asyncio.sleep(0.05)
+        in_flight.append(limiter.snapshot()["in_flight"])
+
+    events = _collect(astream_answer("q", folder), on_token=slow_client)
+
+    tokens = [event["text"] for event in events if event["type"] == "token"]
+    assert tokens == ["a", " b", " c", " d"]
+    assert events[-1]["type"] == "done"
+    # The model finished while the client was still reading the first token.
+    assert in_flight[0] == 0
+
+
+def test_retrieval_failure_ends_the_stream_with_an_error(monkeypatch, tmp_path):
+    def retrieve(folder, question, k, mode):
+        raise RuntimeError("store unavailable")
+
+    folder = _setup(monkeypatch, tmp_path, RecordingChatModel(), retrieve)
+
+    events = _collect(astream_answer("q", folder))
+
+    assert events == [
+        {"type": "error", "stage": "retrieval", "error": "store unavailable"}
+    ]
+
+
+def test_generation_failure_ends_the_stream_with_an_error(monkeypatch, tmp_path):
+    class FailingChatModel(RecordingChatModel):
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            yield from list(super()._stream(messages, stop, run_manager, **kwargs))[:1]
+            raise RuntimeError("connection reset")
+
+    llm = FailingChatModel(model_name="stream-fail", respond=lambda _: "a b")
+    folder = _setup(monkeypatch, tmp_path, llm)
+
+    events = _collect(astream_answer("q", folder))
+
+    assert [e["type"] for e in events] == ["sources", "token", "error"]
+    assert events[-1] == {
+        "type": "error",
+        "stage": "generation",
+        "error": "connection reset",
+    }
+    assert get_limiter(llm).snapshot()["in_flight"] == 0
+
+
+def test_endpoint_sends_the_error_event(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from app.api.v1.endpoints import rag as rag_endpoint
+    from app.main import app
+
+    async def failing_stream(question, folder, k, retrieval):
+        yield {"type": "error", "stage": "retrieval", "error": "store unavailable"}
+
+    monkeypatch.setattr(rag_endpoint, "astream_answer", failing_stream)
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/v1/rag/query/stream",
+            json={"question": "q", "folderPath": str(tmp_path)},
+            headers={"accept": "text/event-stream"},
+        )
+
+    assert response.status_code == 200
+    assert response.text == (
+        "event: error\n"
+        'data: {"stage": "retrieval", "error": "store unavailable"}\n\n'
+    )
@@ -0,0 +1,69 @@
+import sqlite3
+
+from app.llm.cache import LLMResponseCache
+from app.rag.embedding_cache import EmbeddingCache
+
+
+def test_llm_cache_roundtrip(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.db", max_bytes=1024 * 1024)
+    assert cache.lookup("k", "prompt") is None
+    cache.update("k", "completion")
+    assert cache.lookup("k", "prompt") == "completion"
+    assert cache.stats()["hits"] == 1
+
+
+def test_llm_cache_errors_are_misses(tmp_path):
+    # A directory cannot be opened as a database.
+    cache = LLMResponseCache(tmp_path, max_bytes=1024)
+    cache.update("k", "completion")
+    assert cache.lookup("k", "prompt") is None
+    assert cache.stats()["errors"] == 2
+
+
+def test_embedding_cache_errors_are_skipped(tmp_path):
+    cache = EmbeddingCache(tmp_path, max_bytes=1024)
+    cache.update_many("model", {"digest": [0.5, 0.25]})
+    assert cache.lookup_many("model", ["digest"]) == {}
+    assert cache.stats()["errors"] == 2
+
+
+def test_embedding_cache_evicts_least_recently_used(tmp_path):
+    # Two float32 vectors of four dimensions (16 bytes each) fit; the third write
+    # evicts the least recently used one.
+    cache = EmbeddingCache(tmp_path / "emb.db", max_bytes=40)
+    cache.update_many("model", {"a": [1.0] * 4})
+    cache.update_many("model", {"b": [2.0] * 4})
+    cache.lookup_many("model", ["a"])
+    cache.update_many("model", {"c": [3.0] * 4})
+    assert set(cache.lookup_many("model", ["a", "b", "c"])) == {"a", "c"}
+
+
+def _corrupt(db_path, table, key):
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"UPDATE {table} SET value=? WHERE key=?", (b"corrupt", key))
+    conn.commit()
+    conn.close()
+
+
+def test_llm_cache_corrupt_entry_is_a_miss_and_dropped(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.db", max_bytes=1024 * 1024)
+    cache.update("k", "completion")
+    _corrupt(tmp_path / "llm.db", "llm_cache", "k")
+
+    assert cache.lookup("k", "prompt") is None
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["errors"] == 1
+
+    cache.update("k", "completion")
+    assert cache.lookup("k", "prompt") == "completion"
+
+
+def test_embedding_cache_corrupt_vector_is_a_miss(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.db", max_bytes=1024)
+    cache.update_many("model", {"digest": [0.5, 0.25]})
+    _corrupt(tmp_path / "emb.db", "embedding_cache", "model\x00digest")
+
+    assert cache.lookup_many("model", ["digest"]) == {}
+    conn = sqlite3.connect(tmp_path / "emb.db")
+    assert conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,36 @@
+import asyncio
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.llm.prompts import COLLAPSE_PROMPT, REDUCE_PROMPT
+from app.llm.tokens import estimate_tokens
+from app.services.summarizer.utils import summarize_with_map_reduce_async
+from tests.fakes import RecordingChatModel
+
+
+def _respond(prompt: str) -> str:
+    if "PARTIAL SUMMARIES" in prompt:
+        return "merged summary"
+    # Partial summaries almost as large as a whole collapse call.
+    return "partial " * 70
+
+
+def test_collapse_calls_stay_within_the_reduce_window(monkeypatch):
+    overhead = max(
+        estimate_tokens(COLLAPSE_PROMPT.template),
+        estimate_tokens(REDUCE_PROMPT.template),
+    )
+    window = overhead + 100
+    monkeypatch.setattr(settings, "SUMMARY_REDUCE_BATCH_TOKENS", window)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    llm = RecordingChatModel(respond=_respond, prompts=[])
+    chunks = [Document(page_content=f"section {i}") for i in range(6)]
+    docs = [Document(page_content="", metadata={"source": "report.pdf"})]
+
+    summary, _ = asyncio.run(summarize_with_map_reduce_async(docs, llm, chunks))
+
+    assert summary == "merged summary"
+    reduce_prompts = [p for p in llm.prompts if "PARTIAL SUMMARIES" in p]
+    assert reduce_prompts
+    assert all(estimate_tokens(p) <= window for p in reduce_prompts)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import sqlite3
+from pathlib import Path
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from app.cache.summaries import load_legacy_summaries
+from app.cache.utils import SAVED_SUMMARY_DB, VDR_DB_DIR
+from app.services.summarizer import file as summarizer_file
+from app.services.summarizer.folder import iter_folder_summaries
+from tests.fakes import RecordingChatModel
+
+
+def _legacy_item(path, summary):
+    stat = path.stat()
+    return {
+        "file_path": str(path),
+        "file_name": path.name,
+        "file_size": stat.st_size,
+        "last_modified_time": stat.st_mtime,
+        "file_type": path.suffix,
+        "summary": summary,
+        "duration": 1.5,
+    }
+
+
+def _write_legacy_cache(folder, items):
+    # The single-blob layout written before summaries were stored per file.
+    db_dir = folder / VDR_DB_DIR
+    db_dir.mkdir()
+    conn = sqlite3.connect(db_dir / SAVED_SUMMARY_DB)
+    conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(
+        "INSERT INTO cache (key, value) VALUES ('summaries', ?)",
+        (json.dumps({"summaries": items, "duration": 3.0}),),
+    )
+    conn.commit()
+    conn.close()
+    return db_dir / SAVED_SUMMARY_DB
+
+
+async def _collect(folder, llm):
+    return [
+        event
+        async for event in iter_folder_summaries(
+            str(folder), regenerate=False, sync=False, llm=llm
+        )
+    ]
+
+
+def test_legacy_summaries_are_imported_without_llm_calls(tmp_path):
+    kept = tmp_path / "kept.txt"
+    kept.write_text("unchanged content")
+    edited = tmp_path / "edited.txt"
+    edited.write_text("old content")
+    db_path = _write_legacy_cache(
+        tmp_path, [_legacy_item(kept, "kept summary"), _legacy_item(edited, "stale")]
+    )
+    edited.write_text("new, longer content")
+
+    # The cached path must not reach the model: a bare object without invoke.
+    llm = SimpleNamespace(model_name="test-model")
+    events = asyncio.run(_collect(tmp_path, llm))
+
+    summaries = [e["data"] for e in events if e["type"] == "summary"]
+    assert [(s["file_path"], s["summary"]) for s in summaries] == [
+        (str(kept), "kept summary")
+    ]
+    assert all(e["cached"] for e in events if e["type"] == "summary")
+    assert load_legacy_summaries(db_path) is None
+
+
+def test_failed_summary_is_retried_on_the_next_sync(tmp_path, monkeypatch):
+    (tmp_path / "a.pdf").write_text("some content to summarize")
+
+    async def load_text(file_path):
+        return [Document(page_content=Path(file_path).read_text())]
+
+    monkeypatch.setattr(summarizer_file, "load_file_async", load_text)
+    calls = []
+
+    def respond(prompt):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise RuntimeError("rate limited")
+        return "real summary"
+
+    llm = RecordingChatModel(model_name="retry-model", respond=respond)
+
+    async def sync():
+        return [
+            event["data"]["summary"]
+            async for event in iter_folder_summaries(
+                str(tmp_path), regenerate=False, sync=True, llm=llm
+            )
+            if event["type"] == "summary"
+        ]
+
+    first = asyncio.run(sync())
+    assert first[0].startswith("Error during summarization")
+    assert asyncio.run(sync()) == ["real summary"]
+    assert asyncio.run(sync()) == ["real summary"]
+    assert len(calls) == 2
@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from app.rag import vector_store
+from app.rag.vector_store import VectorStoreRegistry
+
+
+class _SlowStore:
+    def __init__(self, persist_directory, **_kwargs):
+        self.persist_directory = persist_directory
+        time.sleep(0.2)
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    opened = []
+
+    def open_store(**kwargs):
+        opened.append(kwargs["persist_directory"])
+        return _SlowStore(**kwargs)
+
+    monkeypatch.setattr(vector_store, "Chroma", open_store)
+    monkeypatch.setattr(vector_store, "get_embeddings", lambda: None)
+    return opened
+
+
+def test_spellings_of_one_directory_share_a_handle(tmp_path, monkeypatch, opened):
+    registry = VectorStoreRegistry(max_open=4, idle_close_s=0)
+    (tmp_path / "db").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+    first = registry.get(str(tmp_path / "db"))
+    second = registry.get("db")
+    third = registry.get(str(tmp_path / "db" / ".." / "db"))
+
+    assert first is second is third
+    assert opened == [str((tmp_path / "db").resolve())]
+
+
+def test_opening_a_store_does_not_block_other_directories(tmp_path, opened):
+    registry = VectorStoreRegistry(max_open=4, idle_close_s=0)
+    results = {}
+
+    def get(name):
+        results.setdefault(name, []).append(registry.get(str(tmp_path / name)))
+
+    threads = [
+        threading.Thread(target=get, args=(name,))
+        for name in ("a", "a", "a", "b", "c", "d")
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Four directories open in parallel; one handle per directory.
+    assert time.perf_counter() - start < 0.6
+    assert sorted(opened) == [str((tmp_path / name).resolve()) for name in "abcd"]
+    assert len({id(store) for store in results["a"]}) == 1
+
+
+def test_failed_open_is_retried(tmp_path, monkeypatch):
+    registry = VectorStoreRegistry(max_open=4, idle_close_s=0)
+    attempts = []
+
+    def open_store(**kwargs):
+        attempts.append(kwargs["persist_directory"])
+        if len(attempts) == 1:
+            raise RuntimeError("locked")
+        return _SlowStore(**kwargs)
+
+    monkeypatch.setattr(vector_store, "Chroma", open_store)
+    monkeypatch.setattr(vector_store, "get_embeddings", lambda: None)
+
+    with pytest.raises(RuntimeError):
+        registry.get(str(tmp_path))
+    assert registry.get(str(tmp_path)) is not None
+    assert len(attempts) == 2